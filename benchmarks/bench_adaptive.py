@@ -0,0 +1,86 @@
+"""Compare quota per Short of full-part paging against adaptive collection
+
+The stub chart has --pages pages per region. In "front-loaded" regions
+Shorts fill the first pages and then stop; in "sparse" regions a few appear
+on every page; in "dry" regions there are none. The full-part streaming
+collector runs once, then adaptive collection runs several times against
+the same yield history, so the first adaptive run shows the first-pass
+savings alone and the later ones add early termination.
+
+Usage: python benchmarks/bench_adaptive.py [--regions 30] [--pages 10] [--target 50] [--runs 4]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault('APP_ENV', 'benchmark')
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_incremental import ByteCounter
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors.adaptive import AdaptiveCollector, YieldTracker
+from src.collectors.popular_videos import fetch_most_popular_videos
+from src.collectors.youtube_api import build_session
+
+PROFILES = {
+    'front-loaded': lambda page: 0.3 if page < 2 else 0.0,
+    'sparse': lambda page: 0.04,
+    'dry': lambda page: 0.0,
+}
+
+
+def short_share(region, page):
+    return PROFILES[list(PROFILES)[int(region[1:]) % len(PROFILES)]](page)
+
+
+def measured_session():
+    session = build_session(8)
+    counter = ByteCounter()
+    session.hooks['response'].append(counter)
+    return session, counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--regions', type=int, default=30)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--target', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    region_configs = [{'region': f'R{index:03d}', 'language': 'en'} for index in range(args.regions)]
+    max_items = args.pages * 50
+    print(f"{'mode':<16} {'calls':>6} {'Shorts':>7} {'units/Short':>12} {'bytes':>12}  stopped")
+    with StubYouTubeServer(pages=args.pages, latency=0.0, short_share=short_share) as server, \
+            tempfile.TemporaryDirectory() as root:
+        session, counter = measured_session()
+        before = server.stats['requests']
+        results = fetch_most_popular_videos(region_configs, args.target, max_workers=8, api_key='bench',
+                                            session=session, base_url=server.base_url,
+                                            incremental=False, adaptive=False)
+        calls = server.stats['requests'] - before
+        shorts = sum(len(videos) for videos in results.values())
+        print(f"{'full parts':<16} {calls:6d} {shorts:7d} {calls / max(shorts, 1):12.3f} {counter.bytes:12,}")
+
+        tracker = YieldTracker(str(Path(root) / 'yield.json'))
+        for run in range(1, args.runs + 1):
+            collector = AdaptiveCollector(YieldTracker(tracker.path), max_items=max_items)
+            session, counter = measured_session()
+            before = server.stats['requests']
+            results = collector.collect(region_configs, args.target, max_workers=8, api_key='bench',
+                                        session=session, base_url=server.base_url)
+            report = collector.last_report
+            assert report['quota_units'] == server.stats['requests'] - before
+            print(f"{f'adaptive run {run}':<16} {report['quota_units']:6d} {report['shorts']:7d} "
+                  f"{report['quota_per_short'] or 0:12.3f} {counter.bytes:12,}  {report['stopped']}")
+
+
+if __name__ == '__main__':
+    main()
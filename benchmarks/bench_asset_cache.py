@@ -0,0 +1,104 @@
+"""Benchmark the asset cache on the narration and render paths across pipeline runs
+
+Each run narrates the scripts of --candidates content briefs; --repeat of
+the candidates carry over from the previous run, as trending videos do. The
+synthetic TTS backend sleeps --latency-per-word per word to stand in for a
+TTS service. Runs go through NarrationGenerator with and without the asset
+cache, and the script prints per-run seconds, hit ratio and bytes saved.
+When ffmpeg is on PATH, it also times cutting a background clip down to a
+frame-sized still in two fresh worker caches sharing the asset cache.
+
+Usage: python benchmarks/bench_asset_cache.py [--runs 4] [--candidates 40] [--repeat 0.75] [--latency-per-word 0.01]
+"""
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault('APP_ENV', 'benchmark')
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.generators.asset_cache import AssetCache, LocalBlobStore
+from src.generators.narration import NarrationGenerator, SyntheticSpeechBackend
+from src.generators.script_generator import ScriptGenerator, TemplateBackend
+from src.generators.video_renderer import DecodedAssetCache
+
+
+def run_briefs(runs, candidates, repeat):
+    """Briefs per run; each run keeps repeat of the previous run's candidates"""
+    briefs, next_id = [], 0
+    current = []
+    for _ in range(runs):
+        kept = current[:int(len(current) * repeat)]
+        fresh = [{'id': f'v{next_id + index}', 'region': 'US', 'source_title': f'trend {next_id + index}',
+                  'keywords': [f'topic{(next_id + index) % 7}']} for index in range(candidates - len(kept))]
+        next_id += len(fresh)
+        current = fresh + kept
+        briefs.append(current)
+    return briefs
+
+
+def bench_narration(args, root):
+    scripts = ScriptGenerator(TemplateBackend())
+    runs = [[result['script'] for result in scripts.generate(briefs)]
+            for briefs in run_briefs(args.runs, args.candidates, args.repeat)]
+    backend = SyntheticSpeechBackend(latency_per_word=args.latency_per_word)
+
+    print(f"{'mode':<10} {'run':>3} {'seconds':>8} {'hits':>5} {'misses':>6} {'hit ratio':>9} {'MiB saved':>9}")
+    for mode in ('uncached', 'cached'):
+        cache = AssetCache(LocalBlobStore(str(root / 'cache'))) if mode == 'cached' else None
+        for run, texts in enumerate(runs, 1):
+            # Without the cache every run writes into a fresh directory, as a new container would
+            generator = NarrationGenerator(backend, 'Joanna', cache, output_dir=str(root / f'out{run}'))
+            if cache is not None:
+                cache.reset_stats()
+            generator.narrate(texts)
+            report = generator.last_report
+            stats = report['cache'] or {'hits': 0, 'misses': len(texts), 'hit_ratio': 0.0, 'bytes_saved': 0}
+            print(f"{mode:<10} {run:3d} {report['seconds']:8.2f} {stats['hits']:5d} {stats['misses']:6d} "
+                  f"{stats['hit_ratio']:9.2f} {stats['bytes_saved'] / 2 ** 20:9.2f}")
+
+
+def bench_clips(args, root):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        print("ffmpeg not found; skipping the background clip part")
+        return
+    source = root / 'source.mp4'
+    subprocess.run([ffmpeg, '-hide_banner', '-loglevel', 'error', '-y', '-f', 'lavfi',
+                    '-i', 'testsrc2=size=3840x2160:rate=30', '-t', '10', '-c:v', 'libx264',
+                    '-preset', 'ultrafast', str(source)], check=True)
+    cache = AssetCache(LocalBlobStore(str(root / 'clips')))
+    for worker in (1, 2):
+        decoded = DecodedAssetCache(64 * 2 ** 20, ffmpeg, cache)
+        start = time.perf_counter()
+        decoded.background(str(source), 1080, 2208)
+        stats = cache.stats()
+        print(f"worker {worker}: background in {time.perf_counter() - start:.3f} s "
+              f"(asset cache hits {stats['hits']}, misses {stats['misses']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=4)
+    parser.add_argument('--candidates', type=int, default=40)
+    parser.add_argument('--repeat', type=float, default=0.75)
+    parser.add_argument('--latency-per-word', type=float, default=0.01)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as root:
+        bench_narration(args, Path(root))
+        bench_clips(args, Path(root))
+
+
+if __name__ == '__main__':
+    main()
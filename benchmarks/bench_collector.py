@@ -0,0 +1,80 @@
+"""Benchmark the concurrent pooled collector against the sequential per-request loop
+
+Usage: python benchmarks/bench_collector.py [--regions 30] [--pages 4] [--latency 0.05]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import requests
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors.popular_videos import fetch_most_popular_videos, region_key
+from src.collectors.video_parser import parse_video_item
+from src.collectors.youtube_api import build_session
+
+
+def sequential_fetch(base_url, region_configs, target_per_region):
+    """Mirror of the original loop: one region after another, a fresh connection per page"""
+    final_results = {}
+    for region_config in region_configs:
+        collected_videos = []
+        page_token = None
+        while len(collected_videos) < target_per_region:
+            params = {'part': 'snippet,statistics,contentDetails', 'chart': 'mostPopular',
+                      'regionCode': region_config['region'], 'maxResults': 50,
+                      'pageToken': page_token, 'key': 'bench'}
+            response = requests.get(f"{base_url}/videos", params=params, timeout=5,
+                                    headers={'Connection': 'close'})
+            data = response.json()
+            for item in data.get('items', []):
+                parsed = parse_video_item(item)
+                if parsed:
+                    collected_videos.append(parsed)
+            page_token = data.get('nextPageToken')
+            if not page_token:
+                break
+        final_results[region_key(region_config)] = collected_videos
+    return final_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--regions', type=int, default=30)
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    region_configs = [{'region': f'R{i:02d}', 'language': 'en'} for i in range(args.regions)]
+    # Every page of the stub yields ~16-17 Shorts, so this target walks every page
+    target = args.pages * 50
+
+    with StubYouTubeServer(pages=args.pages, latency=args.latency) as server:
+        start = time.perf_counter()
+        baseline = sequential_fetch(server.base_url, region_configs, target)
+        baseline_seconds = time.perf_counter() - start
+
+        session = build_session(pool_size=args.workers)
+        start = time.perf_counter()
+        pooled = fetch_most_popular_videos(region_configs, target, max_workers=args.workers,
+                                           api_key='bench', session=session,
+                                           base_url=server.base_url)
+        pooled_seconds = time.perf_counter() - start
+
+    assert {k: len(v) for k, v in baseline.items()} == {k: len(v) for k, v in pooled.items()}
+    requests_made = args.regions * args.pages
+    print(f"regions={args.regions} pages/region={args.pages} latency={args.latency * 1000:.0f}ms "
+          f"requests={requests_made}")
+    print(f"sequential, fresh connections : {baseline_seconds:8.3f}s")
+    print(f"concurrent, pooled ({args.workers} workers): {pooled_seconds:8.3f}s "
+          f"({baseline_seconds / pooled_seconds:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
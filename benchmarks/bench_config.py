@@ -0,0 +1,77 @@
+"""Benchmark Config cold starts (YAML parse vs cached snapshot) and value lookups
+
+Usage: python benchmarks/bench_config.py [--runs 10] [--lookups 100000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config import Config
+
+COLD_START = (
+    "import time; start = time.perf_counter(); "
+    "from config import Config; Config.get_instance(); "
+    "print(time.perf_counter() - start)"
+)
+
+LOOKUP_PATHS = ['youtube.api_key', 'collector.max_workers', 'quota.daily_limit',
+                'response_cache.ttl_seconds', 'logging.level', 'missing.value']
+
+
+def cold_start(cache_dir: str, fresh: bool) -> float:
+    """Time importing config and building the instance in a new interpreter"""
+    if fresh:
+        for snapshot in Path(cache_dir).glob('*.pickle'):
+            snapshot.unlink()
+    env = dict(os.environ, CONFIG_CACHE_DIR=cache_dir)
+    output = subprocess.run([sys.executable, '-c', COLD_START], cwd=project_root, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def uncached_lookup(data, path):
+    """The pre-memoization get_config_value: walk the dicts on every call"""
+    value = data
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return None
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--lookups', type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        parse_times = [cold_start(cache_dir, fresh=True) for _ in range(args.runs)]
+        cold_start(cache_dir, fresh=True)
+        snapshot_times = [cold_start(cache_dir, fresh=False) for _ in range(args.runs)]
+    print(f"cold start, YAML parse    : {statistics.median(parse_times) * 1000:7.2f} ms (median of {args.runs})")
+    print(f"cold start, snapshot      : {statistics.median(snapshot_times) * 1000:7.2f} ms (median of {args.runs})")
+
+    config = Config.get_instance()
+    data = config.config.to_dict()
+    for label, lookup in (('uncached dict walk', lambda path: uncached_lookup(data, path)),
+                          ('memoized get_config_value', config.get_config_value)):
+        start = time.perf_counter()
+        for i in range(args.lookups):
+            lookup(LOOKUP_PATHS[i % len(LOOKUP_PATHS)])
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26}: {elapsed / args.lookups * 1e9:7.0f} ns/lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark collection throughput against the number of API keys in the credential pool
+
+The stub API gives every key a fixed number of requests before answering
+403 quotaExceeded. For each pool size the script collects every region once
+and reports how many chart pages and Shorts were fetched before the keys ran
+dry, how the requests spread over the keys, and how many 403s were served.
+With --budget-mismatch the pool's own daily_limit is set above what the stub
+allows, so failover rides on quotaExceeded responses instead of local
+accounting; --invalid-key adds a key the stub rejects with keyInvalid.
+
+Usage: python benchmarks/bench_credentials.py [--keys 1 2 4 8] [--key-quota 40] [--regions 64] [--pages 4]
+       [--budget-mismatch] [--invalid-key]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault('APP_ENV', 'benchmark')
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors import credentials as credential_pool
+from src.collectors.credentials import ApiCredential, CredentialPool
+from src.collectors.popular_videos import fetch_most_popular_videos
+from src.collectors.quota import MemoryQuotaBackend, QuotaScheduler
+from src.collectors.youtube_api import build_session
+
+
+def build_pool(keys, daily_limit, invalid_key):
+    backend = MemoryQuotaBackend()
+    names = [f'key{index}' for index in range(keys)] + (['revoked'] if invalid_key else [])
+    return CredentialPool([
+        ApiCredential(name, f'secret-{name}', QuotaScheduler(daily_limit, backend, namespace=f'bench:{name}'))
+        for name in names
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keys', type=int, nargs='*', default=[1, 2, 4, 8])
+    parser.add_argument('--key-quota', type=int, default=40, help='requests the stub allows per key')
+    parser.add_argument('--regions', type=int, default=64)
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--budget-mismatch', action='store_true')
+    parser.add_argument('--invalid-key', action='store_true')
+    args = parser.parse_args()
+    # Every call after the last key runs dry logs an error; the table says the same
+    logging.disable(logging.CRITICAL)
+
+    region_configs = [{'region': f'R{index:03d}', 'language': 'en'} for index in range(args.regions)]
+    daily_limit = args.key_quota * 10 if args.budget_mismatch else args.key_quota
+    print(f"{'keys':>4} {'pages':>6} {'Shorts':>7} {'403s':>5} {'400s':>5} {'failovers':>9} {'seconds':>8}  "
+          f"requests per key")
+    for keys in args.keys:
+        pool = build_pool(keys, daily_limit, args.invalid_key)
+        credential_pool._pool, credential_pool._pool_initialized = pool, True
+        with StubYouTubeServer(pages=args.pages, latency=0.0, key_quota=args.key_quota,
+                               invalid_keys={'secret-revoked'}) as server:
+            start = time.perf_counter()
+            results = fetch_most_popular_videos(region_configs, args.pages * 50, max_workers=8, api_key='unused',
+                                                session=build_session(8), base_url=server.base_url)
+            seconds = time.perf_counter() - start
+            pages = sum(server.key_requests.values()) - server.stats['quota'] - server.stats['key_invalid']
+            spread = ' '.join(f"{key.split('-', 1)[1]}={count}" for key, count in sorted(server.key_requests.items()))
+            print(f"{keys:4d} {pages:6d} {sum(len(videos) for videos in results.values()):7d} "
+                  f"{server.stats['quota']:5d} {server.stats['key_invalid']:5d} {pool.failovers:9d} "
+                  f"{seconds:8.2f}  {spread}")
+
+
+if __name__ == '__main__':
+    main()
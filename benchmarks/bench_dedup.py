@@ -0,0 +1,82 @@
+"""Microbenchmark for the seen-ID index against the original any() list scan
+
+Usage: python benchmarks/bench_dedup.py [--items 100000] [--baseline-items 5000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.collectors.dedup import BloomFilter, SeenIndex
+
+
+def make_items(count, duplicate_ratio=0.3, seed=7):
+    rng = random.Random(seed)
+    unique = int(count * (1 - duplicate_ratio))
+    return [{"id": f"vid{rng.randrange(unique):08d}"} for _ in range(count)]
+
+
+def parse(item):
+    return {"id": item["id"]}
+
+
+def list_scan(items):
+    """The original pagination loop: O(n) scan of collected_videos per item"""
+    collected_videos = []
+    for item in items:
+        if not any(item.get("id") == existing["id"] for existing in collected_videos):
+            collected_videos.append(parse(item))
+    return collected_videos
+
+
+def seen_index(items, regions=4):
+    index = SeenIndex()
+    for position, item in enumerate(items):
+        index.get_or_parse(item, f"R{position % regions}", parse)
+    return index
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--baseline-items', type=int, default=5_000,
+                        help='the list scan is quadratic, so it runs on a smaller sample')
+    args = parser.parse_args()
+
+    baseline_items = make_items(args.baseline_items)
+    collected, baseline_seconds = timed(list_scan, baseline_items)
+    print(f"any() list scan   n={args.baseline_items:>7}: {baseline_seconds:8.3f}s "
+          f"({baseline_seconds / args.baseline_items * 1e6:8.2f} us/item, {len(collected)} unique)")
+
+    for count in (args.baseline_items, args.items):
+        items = make_items(count)
+        index, seconds = timed(seen_index, items)
+        print(f"SeenIndex         n={count:>7}: {seconds:8.3f}s "
+              f"({seconds / count * 1e6:8.2f} us/item, {len(index)} unique)")
+
+    items = make_items(args.items)
+    bloom = BloomFilter(capacity=args.items)
+    _, add_seconds = timed(lambda: [bloom.add(item["id"]) for item in items])
+    _, query_seconds = timed(lambda: sum(item["id"] in bloom for item in items))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'seen.bloom'
+        bloom.save(path)
+        size = path.stat().st_size
+    print(f"BloomFilter       n={args.items:>7}: add {add_seconds / args.items * 1e6:.2f} us/item, "
+          f"query {query_seconds / args.items * 1e6:.2f} us/item, {size / 1024:.0f} KiB on disk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Simulate fan-out collection with worker processes sharing a file-backed queue
+
+The coordinator shards the regions into queue messages and waits on the
+result store; each worker is a separate process that collects its shards'
+regions one at a time from the stub API (with --latency per request), as a
+Lambda worker would. The same run is repeated for each worker count, so the
+speedup over one worker shows how close to linear the fan-out scales. With
+--duplicates every message is sent twice, as SQS may deliver it, and the
+second copies must be skipped by the workers.
+
+Usage: python benchmarks/bench_fanout.py [--workers 1 2 4 8] [--regions 64] [--regions-per-shard 4]
+       [--pages 2] [--latency 0.05] [--duplicates]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+os.environ.setdefault('APP_ENV', 'benchmark')
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors.youtube_api import build_session
+from src.scheduler.fanout import FanoutCoordinator, FanoutWorker, FileQueue, collect_shard
+from src.scheduler.pipeline import LocalCheckpointStore
+
+
+def worker_main(queue_path, store_path, base_url, counts):
+    logging.disable(logging.CRITICAL)
+    handlers = {'collect': partial(collect_shard, max_workers=1, api_key='bench',
+                                   session=build_session(1), base_url=base_url)}
+    worker = FanoutWorker(FileQueue(queue_path, poll_interval=0.01), LocalCheckpointStore(store_path), handlers)
+    counts.put(worker.run(idle_seconds=1.0))
+
+
+def run_once(workers, args, base_url, root):
+    queue = FileQueue(str(root / 'queue'))
+    store = LocalCheckpointStore(str(root / 'results'))
+    counts = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker_main, args=(str(root / 'queue'), str(root / 'results'),
+                                                                   base_url, counts))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    region_configs = [{'region': f'R{index:03d}', 'language': 'en'} for index in range(args.regions)]
+    coordinator = FanoutCoordinator(queue, store, poll_interval=0.01, timeout=600)
+    if args.duplicates:
+        # Sent ahead of the coordinator's own copies, so both copies of a shard are in the queue
+        payloads = [{'regions': region_configs[start:start + args.regions_per_shard],
+                     'target_per_region': args.pages * 50}
+                    for start in range(0, args.regions, args.regions_per_shard)]
+        queue.send_many([{'run_id': 'bench', 'shard_id': f'collect-{index:04d}', 'kind': 'collect',
+                          'payload': payload} for index, payload in enumerate(payloads)])
+    start = time.perf_counter()
+    results = coordinator.collect('bench', region_configs, args.pages * 50, args.regions_per_shard)
+    seconds = time.perf_counter() - start
+
+    for process in processes:
+        process.join()
+    totals = {'completed': 0, 'failed': 0, 'skipped': 0}
+    for _ in processes:
+        for status, count in counts.get().items():
+            totals[status] += count
+    return seconds, results, coordinator.last_report, totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8])
+    parser.add_argument('--regions', type=int, default=64)
+    parser.add_argument('--regions-per-shard', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--duplicates', action='store_true')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    shards = -(-args.regions // args.regions_per_shard)
+    print(f"{args.regions} regions in {shards} shards, {args.pages} pages each, {args.latency * 1000:.0f} ms per call")
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'efficiency':>10} {'Shorts':>7} "
+          f"{'ran':>4} {'skipped':>7} {'used':>5}")
+    baseline = None
+    with StubYouTubeServer(pages=args.pages, latency=args.latency) as server:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as root:
+                seconds, results, report, totals = run_once(workers, args, server.base_url, Path(root))
+            assert len(results) == args.regions and not report['missing'] and not report['failed']
+            assert totals['completed'] + totals['skipped'] == shards * (2 if args.duplicates else 1)
+            baseline = baseline or seconds * workers
+            speedup = baseline / seconds
+            print(f"{workers:7d} {seconds:8.2f} {speedup:8.2f} {speedup / workers:10.0%} "
+                  f"{sum(len(videos) for videos in results.values()):7d} {totals['completed']:4d} "
+                  f"{totals['skipped']:7d} {report['workers']:5d}")
+
+
+if __name__ == '__main__':
+    main()
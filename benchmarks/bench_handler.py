@@ -0,0 +1,61 @@
+"""Simulate cold and warm Lambda invocations of the scheduler handler
+
+A cold invocation is a fresh interpreter importing the handler and calling
+lambda_handler once; warm invocations reuse the same process, as a warm
+container would. The event selects no pipeline stages, so this measures the
+handler's own overhead.
+
+Usage: python benchmarks/bench_handler.py [--cold 5] [--warm 200]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+INVOKE = '''
+import json, sys, time
+start = time.perf_counter()
+from src.scheduler.handler import lambda_handler
+imported = time.perf_counter()
+event = {"source": "aws.events", "detail-type": "Scheduled Event", "detail": {}, "stages": []}
+timings = []
+for _ in range(1 + int(sys.argv[1])):
+    begin = time.perf_counter()
+    response = lambda_handler(event, None)
+    timings.append(time.perf_counter() - begin)
+    assert response["statusCode"] == 200, response
+print(json.dumps({"import": imported - start, "first": timings[0], "warm": timings[1:],
+                  "modules": sorted(m for m in ("boto3", "requests", "isodate", "numpy") if m in sys.modules)}))
+'''
+
+
+def invoke(warm: int):
+    output = subprocess.run([sys.executable, '-c', INVOKE, str(warm)], cwd=project_root,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cold', type=int, default=5)
+    parser.add_argument('--warm', type=int, default=200)
+    args = parser.parse_args()
+
+    invoke(0)  # Write the config snapshot so every measured cold start reads it
+    cold = [invoke(0) for _ in range(args.cold)]
+    warm = invoke(args.warm)['warm']
+
+    import_ms = statistics.median(run['import'] for run in cold) * 1000
+    first_ms = statistics.median(run['first'] for run in cold) * 1000
+    print(f"cold: import {import_ms:.2f} ms + first invocation {first_ms:.2f} ms (median of {args.cold})")
+    print(f"warm: {statistics.median(warm) * 1000:.3f} ms median, "
+          f"{max(warm) * 1000:.3f} ms max over {args.warm} invocations")
+    print(f"heavy modules loaded: {', '.join(cold[0]['modules']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Compare bytes and quota of a full refetch against incremental collection
+
+Each mode runs twice against the stub server, with the statistics changing in
+between; the second run is the one reported, as it is the steady state.
+
+Usage: python benchmarks/bench_incremental.py [--regions 10] [--pages 4]
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors.incremental import KnownVideoStore, collect_incremental
+from src.collectors.popular_videos import fetch_most_popular_videos
+from src.collectors.quota import get_quota_scheduler
+from src.collectors.youtube_api import build_session
+
+
+class ByteCounter:
+    def __init__(self):
+        self.bytes = 0
+
+    def __call__(self, response, *args, **kwargs):
+        self.bytes += len(response.content)
+
+
+def measure(server, collect):
+    """Run two collections, returning bytes, quota units and Shorts of the second one"""
+    collect()
+    server.generation += 1
+    session = build_session()
+    counter = ByteCounter()
+    session.hooks['response'].append(counter)
+    quota = get_quota_scheduler()
+    used_before = quota.used()
+    results = collect(session)
+    return counter.bytes, quota.used() - used_before, sum(len(videos) for videos in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--regions', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=4)
+    parser.add_argument('--target', type=int, default=50)
+    args = parser.parse_args()
+
+    region_configs = [{'region': f'R{i:02d}', 'language': 'en'} for i in range(args.regions)]
+
+    with StubYouTubeServer(pages=args.pages, latency=0) as server, tempfile.TemporaryDirectory() as tmp:
+        full = measure(server, lambda session=None: fetch_most_popular_videos(
+            region_configs, args.target, api_key='bench', session=session,
+            base_url=server.base_url, incremental=False, adaptive=False))
+
+        store = KnownVideoStore(str(Path(tmp) / 'known.sqlite3'))
+        server.generation = 0
+        incremental = measure(server, lambda session=None: collect_incremental(
+            region_configs, args.target, store=store, api_key='bench', session=session,
+            base_url=server.base_url))
+
+    print(f"regions={args.regions} target/region={args.target}")
+    print(f"{'mode':<14}{'bytes':>12}{'quota units':>14}{'Shorts':>10}")
+    for name, (num_bytes, units, shorts) in (('full refetch', full), ('incremental', incremental)):
+        print(f"{name:<14}{num_bytes:>12,}{units:>14}{shorts:>10}")
+    print(f"bytes cut {full[0] / max(incremental[0], 1):.1f}x, quota cut {full[1] / max(incremental[1], 1):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark instrumentation overhead with metrics disabled and enabled
+
+Times a bare loop against span() + incr() calls on NullMetrics and Metrics,
+then runs a collection against the stub API both ways and prints the
+Prometheus dump and EMF documents from the instrumented run.
+
+Usage: python benchmarks/bench_metrics.py [--calls 1000000] [--regions 8] [--pages 4]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors.popular_videos import fetch_most_popular_videos
+from src.collectors.youtube_api import build_session
+from src.telemetry import metrics as telemetry
+
+
+def per_call(metrics, calls):
+    start = time.perf_counter()
+    if metrics is None:
+        for _ in range(calls):
+            pass
+    else:
+        for _ in range(calls):
+            with metrics.span('hot_path', endpoint='videos.list'):
+                pass
+            metrics.incr('items_parsed', 50)
+    return (time.perf_counter() - start) / calls
+
+
+def collect(server, region_configs, pages):
+    start = time.perf_counter()
+    fetch_most_popular_videos(region_configs, pages * 50, max_workers=4, api_key='bench',
+                              session=build_session(4), base_url=server.base_url)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--regions', type=int, default=8)
+    parser.add_argument('--pages', type=int, default=4)
+    args = parser.parse_args()
+
+    baseline = per_call(None, args.calls)
+    for label, metrics in (('disabled (NullMetrics)', telemetry.NullMetrics()), ('enabled (Metrics)', telemetry.Metrics())):
+        cost = per_call(metrics, args.calls) - baseline
+        print(f"{label:<24}: {cost * 1e9:7.0f} ns per span + incr")
+
+    region_configs = [{'region': f'R{i:02d}', 'language': 'en'} for i in range(args.regions)]
+    with StubYouTubeServer(pages=args.pages, latency=0.0) as server:
+        results = {}
+        for label, metrics in (('disabled', telemetry.NullMetrics()), ('enabled', telemetry.Metrics())):
+            telemetry._metrics = metrics
+            collect(server, region_configs, args.pages)
+            results[label] = min(collect(server, region_configs, args.pages) for _ in range(3))
+            print(f"collection, metrics {label:<8}: {results[label] * 1000:8.1f} ms")
+
+    metrics = telemetry.get_metrics()
+    print()
+    print(metrics.to_prometheus(), end='')
+    print()
+    for doc in metrics.to_emf():
+        print(json.dumps(doc))
+
+
+if __name__ == '__main__':
+    main()
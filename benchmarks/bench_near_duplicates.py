@@ -0,0 +1,135 @@
+"""Benchmark MinHash/LSH near-duplicate clustering up to 1M videos
+
+Synthetic videos come in families: an original title, tags and description
+plus re-uploads that add a hashtag, drop a word or swap one. Videos are added
+in steps; per step the script prints the insert rate (which should stay flat
+as the index grows), then pair precision and recall against the families on
+a sample, and the save/load time of the final index. With --days-per-step
+each step is collected that many days after the previous one, so videos
+older than --retention-days are evicted and the index size levels off.
+
+Usage: python benchmarks/bench_near_duplicates.py [--videos 1000000] [--steps 10] [--family-size 4]
+       [--days-per-step 0] [--retention-days 14]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from itertools import combinations
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.analyzers.near_duplicates import NearDuplicateIndex
+
+VOCABULARY = [f'w{index}' for index in range(20000)]
+HASHTAGS = ['#shorts', '#viral', '#trending', '#fyp', '#reels']
+
+
+def make_videos(count, family_size, seed=42):
+    """Videos and their family index; family sizes vary from 1 to 2 * family_size - 1"""
+    rng = random.Random(seed)
+    videos, families = [], []
+    family = 0
+    while len(videos) < count:
+        title = rng.sample(VOCABULARY, rng.randint(6, 10))
+        tags = rng.sample(VOCABULARY, rng.randint(3, 5))
+        description = rng.sample(VOCABULARY, 12)
+        for copy in range(rng.randint(1, 2 * family_size - 1)):
+            words = list(title)
+            if copy:
+                change = rng.random()
+                if change < 0.4:
+                    words.append(rng.choice(HASHTAGS))
+                elif change < 0.7:
+                    del words[rng.randrange(len(words))]
+                else:
+                    words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+            videos.append({'id': f'v{len(videos):08d}', 'title': ' '.join(words), 'tags': tags,
+                           'description': ' '.join(description)})
+            families.append(family)
+        family += 1
+    return videos[:count], families[:count]
+
+
+def pair_quality(index, videos, families, sample):
+    """Precision and recall of same-cluster pairs among the videos of sampled families"""
+    by_family = {}
+    for video, family in zip(videos, families):
+        by_family.setdefault(family, []).append(video['id'])
+    chosen = random.Random(1).sample(sorted(by_family), min(sample, len(by_family)))
+    ids = [video_id for family in chosen for video_id in by_family[family]]
+    family_of = {video['id']: family for video, family in zip(videos, families)}
+    clusters = index.cluster_ids(ids)
+
+    true_pairs = {pair for family in chosen for pair in combinations(by_family[family], 2)}
+    by_cluster = {}
+    for video_id in ids:
+        by_cluster.setdefault(clusters[video_id], []).append(video_id)
+    found_pairs = {pair for members in by_cluster.values() for pair in combinations(sorted(members), 2)}
+    correct = sum(1 for first, second in found_pairs if family_of[first] == family_of[second])
+    precision = correct / len(found_pairs) if found_pairs else 1.0
+    recall = len(true_pairs & found_pairs) / len(true_pairs) if true_pairs else 1.0
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--videos', type=int, default=1_000_000)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--family-size', type=int, default=4)
+    parser.add_argument('--num-perm', type=int, default=32)
+    parser.add_argument('--bands', type=int, default=8)
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--sample-families', type=int, default=2000)
+    parser.add_argument('--days-per-step', type=int, default=0)
+    parser.add_argument('--retention-days', type=int, default=14)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    videos, families = make_videos(args.videos, args.family_size)
+    print(f"generated {len(videos)} videos in {len(set(families))} families "
+          f"({time.perf_counter() - start:.1f} s)")
+
+    settings = {'num_perm': args.num_perm, 'bands': args.bands, 'threshold': args.threshold,
+                'retention_days': args.retention_days}
+    index = NearDuplicateIndex(**settings)
+    step = -(-len(videos) // args.steps)
+    collected_at = time.time()
+    print(f"{'indexed':>9} {'step s':>8} {'us/video':>9}")
+    for offset in range(0, len(videos), step):
+        start = time.perf_counter()
+        index.add_videos(videos[offset:offset + step], collected_at)
+        seconds = time.perf_counter() - start
+        print(f"{len(index):9d} {seconds:8.2f} {seconds / len(videos[offset:offset + step]) * 1e6:9.1f}")
+        collected_at += args.days_per_step * 86400
+
+    # Only families whose videos are all still indexed can be scored
+    kept = [(video, family) for video, family in zip(videos, families) if index.cluster_id(video['id']) is not None]
+    precision, recall = pair_quality(index, [video for video, _ in kept], [family for _, family in kept],
+                                     args.sample_families)
+    print(f"pair precision {precision:.3f}, recall {recall:.3f} "
+          f"({args.sample_families} sampled families)")
+    start = time.perf_counter()
+    clusters = len(set(index.cluster_ids().values()))
+    print(f"{clusters} clusters for {len(set(families))} families "
+          f"(cluster_ids for all videos: {time.perf_counter() - start:.2f} s)")
+
+    with tempfile.TemporaryDirectory() as root:
+        path = str(Path(root) / 'near_duplicates.pickle')
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = NearDuplicateIndex.load(path, **settings)
+        loaded_seconds = time.perf_counter() - start
+        print(f"save {saved:.2f} s, load {loaded_seconds:.2f} s, "
+              f"{Path(path).stat().st_size / 2 ** 20:.0f} MiB on disk")
+        assert loaded.cluster_id(videos[-1]['id']) == index.cluster_id(videos[-1]['id'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the fast-path item parser against the original videoItemParser
+
+Parses synthetic videos.list items (every third one a Short, plus a share of
+rare duration shapes that take the isodate fallback) with the original
+per-item parser, parse_video_item, and the page-at-a-time parse_video_page.
+
+Usage: python benchmarks/bench_parser.py [--items 100000] [--page-size 50]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_youtube_server import make_video_item
+from src.collectors.video_parser import parse_video_item, parse_video_page
+from test_youtube_api import videoItemParser
+
+RARE_DURATIONS = ['P0D', 'PT12.5S', 'P1DT2H', 'PT']
+
+
+def make_items(count):
+    items = [make_video_item(index) for index in range(count)]
+    for index in range(0, count, 100):
+        items[index]['contentDetails']['duration'] = RARE_DURATIONS[index // 100 % len(RARE_DURATIONS)]
+    return items
+
+
+def timed(label, fn, count, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34}: {best * 1000:8.1f} ms ({best / count * 1e6:5.2f} us/item)")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    pages = [items[start:start + args.page_size] for start in range(0, len(items), args.page_size)]
+
+    legacy, legacy_seconds = timed('videoItemParser (original)',
+                                   lambda: [videoItemParser(item) for item in items], args.items)
+    per_item, _ = timed('parse_video_item',
+                        lambda: [parse_video_item(item) for item in items], args.items)
+    batched, batched_seconds = timed('parse_video_page',
+                                     lambda: [record for page in pages for record in parse_video_page(page)],
+                                     args.items)
+
+    expected = [record for record in legacy if record]
+    assert [record for record in per_item if record] == expected
+    assert batched == expected
+    print(f"{len(expected):,} Shorts of {args.items:,} items; "
+          f"speedup {legacy_seconds / batched_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
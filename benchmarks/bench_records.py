@@ -0,0 +1,71 @@
+"""Memory and aggregation benchmark: parser dicts vs VideoRecord vs columnar VideoBatch
+
+Usage: python benchmarks/bench_records.py [--videos 200000]
+"""
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from benchmarks.stub_youtube_server import make_video_item
+from src.collectors.records import VideoBatch, VideoRecord
+from src.collectors.video_parser import parse_video_item
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--videos', type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Every third synthetic item is a Short, so step by 3 to get parseable ones
+    items = [make_video_item(index * 3) for index in range(args.videos)]
+
+    dicts, dict_bytes = measure(lambda: [parse_video_item(item) for item in items])
+    records, record_bytes = measure(lambda: [VideoRecord.from_parsed(video, 'US_en') for video in dicts])
+    batch, batch_bytes = measure(lambda: VideoBatch.from_records(records))
+
+    print(f"videos={args.videos}")
+    print(f"{'representation':<22}{'MiB':>10}{'bytes/video':>14}")
+    for name, size in (('parser dicts', dict_bytes), ('VideoRecord slots', record_bytes),
+                       ('VideoBatch columns', batch_bytes)):
+        print(f"{name:<22}{size / 2 ** 20:>10.1f}{size / args.videos:>14.0f}")
+
+    start = time.perf_counter()
+    views_by_channel = defaultdict(int)
+    for video in dicts:
+        views_by_channel[video['channelId']] += int(video['viewCount'] or 0)
+    dict_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    channels = batch['channel_id']
+    totals = np.bincount(channels.codes, weights=np.maximum(batch['view_count'], 0))
+    batch_seconds = time.perf_counter() - start
+    assert len(totals) == len(views_by_channel)
+    print(f"views per channel: dicts {dict_seconds * 1000:.1f}ms, columns {batch_seconds * 1000:.1f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = batch.save(Path(tmp) / 'snapshots')
+        print(f"on disk ({path.suffix}): {path.stat().st_size / 2 ** 20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
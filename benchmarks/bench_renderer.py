@@ -0,0 +1,84 @@
+"""Benchmark parallel Short rendering: renders per minute for 1/2/4/8 worker processes
+
+Backgrounds and music are synthetic, so this runs offline; ffmpeg (with
+libx264 and aac) must be on PATH or passed with --ffmpeg.
+
+Usage: python benchmarks/bench_renderer.py [--jobs 16] [--seconds 10] [--workers 1 2 4 8]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.generators.video_renderer import RenderJob, RenderSettings, Segment, VideoRenderer
+
+CAPTIONS = ['Wait for it...', "You won't believe this", 'Part 2 tomorrow!', 'Follow for more']
+
+
+def make_jobs(count: int, seconds: float, width: int, height: int, fps: int, output_dir: Path):
+    segment_seconds = seconds / 4
+    return [
+        RenderJob(
+            job_id=f'bench{index:03d}',
+            output_path=str(output_dir / f'bench{index:03d}.mp4'),
+            # Eight shared backgrounds, so the per-worker asset cache gets reuse
+            segments=[Segment(f'synthetic:gradient:{(index + part) % 8}', segment_seconds, CAPTIONS[part])
+                      for part in range(4)],
+            music=f'synthetic:tone:{220 + 110 * (index % 3)}',
+            width=width, height=height, fps=fps,
+        )
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--width', type=int, default=540)
+    parser.add_argument('--height', type=int, default=960)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--ffmpeg', default='ffmpeg')
+    parser.add_argument('--preset', default='veryfast')
+    args = parser.parse_args()
+
+    if shutil.which(args.ffmpeg) is None:
+        sys.exit(f"ffmpeg not found ({args.ffmpeg}); install it or pass --ffmpeg /path/to/ffmpeg")
+
+    settings = RenderSettings(ffmpeg_path=args.ffmpeg, preset=args.preset)
+    print(f"{args.jobs} jobs of {args.seconds:.0f}s at {args.width}x{args.height}@{args.fps}")
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = make_jobs(args.jobs, args.seconds, args.width, args.height, args.fps, Path(tmp))
+            with VideoRenderer(workers, settings) as renderer:
+                start = time.perf_counter()
+                results = renderer.render_many(jobs)
+                elapsed = time.perf_counter() - start
+        failures = [result for result in results if not result['success']]
+        if failures:
+            sys.exit(f"{len(failures)} renders failed, first error: {failures[0]['error']}")
+        per_minute = len(jobs) / elapsed * 60
+        baseline = baseline or per_minute
+        # Cache stats are cumulative per worker process; keep each worker's latest
+        caches = {}
+        for result in results:
+            cache = result['data']['cache']
+            pid = result['data']['pid']
+            if cache['hits'] + cache['misses'] >= sum(caches.get(pid, {}).values()):
+                caches[pid] = {'hits': cache['hits'], 'misses': cache['misses']}
+        hits = sum(cache['hits'] for cache in caches.values())
+        lookups = hits + sum(cache['misses'] for cache in caches.values())
+        print(f"workers={workers}: {per_minute:7.1f} renders/min ({per_minute / baseline:.2f}x), "
+              f"{elapsed:6.2f}s total, asset cache {hits}/{lookups} hits")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark batched, concurrent script generation and the prompt memo
+
+Generates scripts for synthetic briefs through the template backend with a
+simulated model latency (a fixed cost per request plus a cost per prompt),
+first one brief at a time as the generate stage used to, then through
+ScriptGenerator at each batch size with a cold memo and again with a warm one.
+A share of the briefs repeat, as candidates do between 6-hourly runs.
+
+Usage: python benchmarks/bench_script_generator.py [--briefs 256] [--batch-sizes 1 4 8 16 32]
+       [--workers 4] [--call-latency 0.05] [--prompt-latency 0.005]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.generators.script_generator import ScriptGenerator, SQLiteScriptMemo, TemplateBackend, build_prompt
+
+TOPICS = ['street food', 'cricket', 'budget phones', 'monsoon travel', 'exam hacks', 'gym form', 'pet tricks']
+
+
+def make_briefs(count, repeat_share=0.25):
+    unique = max(1, int(count * (1 - repeat_share)))
+    return [{'id': f'v{index % unique:05d}', 'region': 'IN_en',
+             'source_title': f'{TOPICS[index % unique % len(TOPICS)]} #{index % unique}',
+             'keywords': ['viral', TOPICS[index % unique % len(TOPICS)].split()[0]]}
+            for index in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--briefs', type=int, default=256)
+    parser.add_argument('--batch-sizes', type=int, nargs='*', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--call-latency', type=float, default=0.05)
+    parser.add_argument('--prompt-latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    backend = TemplateBackend(call_latency=args.call_latency, prompt_latency=args.prompt_latency)
+    briefs = make_briefs(args.briefs)
+
+    start = time.perf_counter()
+    sequential = [backend.generate_batch([build_prompt(brief)])[0] for brief in briefs]
+    seconds = time.perf_counter() - start
+    print(f"{'one at a time':<22}: {seconds:7.2f} s {len(briefs) / seconds:8.1f} prompts/s")
+
+    print(f"{'batch size':<10} {'cold s':>8} {'cold p/s':>9} {'generated':>10} {'warm s':>8} {'warm p/s':>10}")
+    with tempfile.TemporaryDirectory() as root:
+        for batch_size in args.batch_sizes:
+            memo = SQLiteScriptMemo(str(Path(root) / f'memo-{batch_size}.sqlite3'), ttl_seconds=3600)
+            generator = ScriptGenerator(backend, memo, batch_size=batch_size, max_workers=args.workers)
+            cold = generator.generate(briefs)
+            cold_report = generator.last_report
+            warm = generator.generate(briefs)
+            warm_report = generator.last_report
+            assert [result['script'] for result in cold] == sequential
+            assert [result['script'] for result in warm] == sequential
+            assert warm_report['generated'] == 0
+            print(f"{batch_size:<10} {cold_report['seconds']:8.2f} {cold_report['prompts_per_second']:9.1f} "
+                  f"{cold_report['generated']:10d} {warm_report['seconds']:8.3f} "
+                  f"{warm_report['prompts_per_second']:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
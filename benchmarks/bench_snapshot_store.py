@@ -0,0 +1,133 @@
+"""Benchmark the partitioned snapshot store against rescanning raw JSON collection dumps
+
+Simulates --days of collections (--runs per day, --videos per region per run)
+and times the two trend queries both ways: one video's history and the top
+channels by view velocity over the last seven days.
+
+Usage: python benchmarks/bench_snapshot_store.py [--days 30] [--runs 4] [--videos 200]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.collectors.records import VideoRecord
+from src.collectors.snapshot_store import SnapshotStore, SQLiteSnapshotStore
+
+REGIONS = ['IN_te', 'IN_hi']
+START_TIME = 1_750_000_000
+
+
+def iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def make_collections(rng, args):
+    """Yield (captured_at, results) per run; a pool of videos keeps gaining views"""
+    pool = {}
+    for day in range(args.days):
+        for run in range(args.runs):
+            captured_at = START_TIME + day * 86400 + run * 86400 // args.runs
+            results = {}
+            for region in REGIONS:
+                videos = []
+                for number in rng.sample(range(args.videos * 3), args.videos):
+                    video_id = f'{region}-{number:06d}'
+                    video = pool.get(video_id)
+                    if video is None:
+                        video = pool[video_id] = {
+                            'id': video_id, 'publishedAt': iso(captured_at - rng.randrange(1, 48) * 3600),
+                            'channelId': f'UC{rng.randrange(500):04d}', 'channelTitle': 'channel',
+                            'title': f'short {video_id} #shorts', 'description': 'x' * 300,
+                            'tags': ['shorts', 'trending'], 'durationInSeconds': rng.randrange(10, 60),
+                            'viewCount': str(rng.randrange(1000, 100_000)), 'likeCount': '10', 'commentCount': '1',
+                        }
+                    video['viewCount'] = str(int(video['viewCount']) + rng.randrange(0, 50_000))
+                    videos.append(dict(video))
+                results[region] = videos
+            yield captured_at, results
+
+
+class JSONScanStore(SnapshotStore):
+    """Baseline: every query re-reads and re-parses every raw collection dump"""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def dump(self, captured_at, results):
+        (self.root / f'{captured_at}.json').write_text(json.dumps(results))
+
+    def _records(self):
+        for path in sorted(self.root.glob('*.json')):
+            captured_at = int(path.stem)
+            for region, videos in json.loads(path.read_text()).items():
+                for video in videos:
+                    yield VideoRecord.from_parsed(video, region, captured_at)
+
+    def scan(self, columns, since, until, regions=None):
+        for record in self._records():
+            if since <= record.captured_at <= until and (not regions or record.region in regions):
+                yield tuple(getattr(record, column) for column in columns)
+
+    def video_history(self, video_id, since=None, until=None, regions=None):
+        return [record for record in self._records() if record.id == video_id]
+
+
+def timed(label, fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40}: {best * 1000:9.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--runs', type=int, default=4)
+    parser.add_argument('--videos', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = JSONScanStore(Path(tmp) / 'raw')
+        raw.root.mkdir()
+        store = SQLiteSnapshotStore(str(Path(tmp) / 'snapshots'))
+
+        rows = 0
+        append_seconds = 0.0
+        for captured_at, results in make_collections(random.Random(5), args):
+            raw.dump(captured_at, results)
+            start = time.perf_counter()
+            rows += store.append(results, captured_at)
+            append_seconds += time.perf_counter() - start
+        print(f"append: {rows:,} snapshots in {append_seconds:.2f}s "
+              f"({append_seconds / rows * 1e6:.1f} us/row), {len(store.partitions())} partitions")
+
+        until = START_TIME + args.days * 86400
+        since = until - 7 * 86400
+        video_id = f'{REGIONS[0]}-000001'
+        history = timed('video_history, raw JSON rescan', lambda: raw.video_history(video_id))
+        indexed = timed('video_history, partitioned store', lambda: store.video_history(video_id))
+        assert len(history) == len(indexed), (len(history), len(indexed))
+
+        expected = timed('top channels (7d), raw JSON rescan',
+                         lambda: raw.top_channels_by_velocity(since, until, n=10), repeat=1)
+        top = timed('top channels (7d), partitioned store',
+                    lambda: store.top_channels_by_velocity(since, until, n=10))
+        assert [c['channel_id'] for c in top] == [c['channel_id'] for c in expected]
+        print(f"history of {video_id}: {len(indexed)} snapshots; top channel {top[0]['channel_id']} "
+              f"at {top[0]['velocity']:,.0f} views/hour over {top[0]['videos']} videos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark TrendIndex ingestion and rising-term queries on synthetic titles
+
+Usage: python benchmarks/bench_trend_index.py [--videos 200000] [--days 14]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.analyzers.trend_index import WINDOWS, TrendIndex
+
+REGIONS = ['IN_te', 'IN_hi', 'US_en', 'BR_pt', 'JP_ja', 'DE_de']
+
+
+def make_video(rng, index, vocabulary):
+    words = rng.choices(vocabulary, k=rng.randint(4, 10))
+    return {
+        'id': f'vid{index:08d}',
+        'title': ' '.join(words) + ' #shorts',
+        'description': ' '.join(rng.choices(vocabulary, k=12)),
+        'tags': rng.sample(vocabulary[:500], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--videos', type=int, default=200_000)
+    parser.add_argument('--days', type=int, default=14)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    vocabulary = [f'word{i}' for i in range(args.vocabulary)]
+    start_time = 1_750_000_000
+    step = args.days * 86400 / args.videos
+    videos = [(make_video(rng, i, vocabulary), rng.choice(REGIONS), start_time + i * step)
+              for i in range(args.videos)]
+
+    index = TrendIndex()
+    start = time.perf_counter()
+    for video, region, collected_at in videos:
+        index.add_video(video, region, collected_at)
+    ingest_seconds = time.perf_counter() - start
+    print(f"ingest: {args.videos:,} videos in {ingest_seconds:.2f}s "
+          f"({ingest_seconds / args.videos * 1e6:.1f} us/video)")
+
+    for window in WINDOWS:
+        for region in ('IN_te', '*'):
+            start = time.perf_counter()
+            rising = index.rising_terms(region, window, n=20)
+            elapsed = time.perf_counter() - start
+            print(f"rising_terms({region!r:>8}, {window:>3}): {elapsed * 1000:7.2f} ms, top={rising[0][0]!r}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'trend_index.pickle'
+        start = time.perf_counter()
+        index.save(path)
+        save_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        TrendIndex.load(path)
+        load_seconds = time.perf_counter() - start
+        print(f"persist: {path.stat().st_size / 2 ** 20:.1f} MiB, save {save_seconds:.2f}s, load {load_seconds:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Benchmark resumable chunked uploads against the local stand-in upload server
+
+Reports throughput for sequential vs parallel uploads, bytes re-sent with
+injected chunk failures, resuming an interrupted upload from its persisted
+session, and peak Python heap use (files are memory-mapped, never read whole).
+
+Usage: python benchmarks/bench_uploader.py [--videos 6] [--size-mb 64] [--chunk-mb 8]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_upload_server import StubUploadServer
+from src.collectors.quota import MemoryQuotaBackend, QuotaScheduler
+from src.collectors.youtube_api import build_session
+from src.uploaders.resumable import LocalSessionStore, ResumableUploader
+
+
+class Interrupted(Exception):
+    """Raised from the progress hook to cut an upload off like a Lambda timeout would"""
+
+
+def make_files(directory: Path, count: int, size: int):
+    paths = []
+    block = os.urandom(1 << 20)
+    for index in range(count):
+        path = directory / f'video{index}.mp4'
+        with open(path, 'wb') as f:
+            written = 0
+            while written < size:
+                piece = block[:min(len(block), size - written)]
+                f.write(piece)
+                written += len(piece)
+        paths.append(path)
+    return paths
+
+
+def sha256_of(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def uploader_for(server, store_dir, chunk_size, quota_units=10 ** 7):
+    quota = QuotaScheduler(daily_limit=quota_units, backend=MemoryQuotaBackend())
+    return ResumableUploader(access_token='bench-token', chunk_size=chunk_size, upload_url=server.upload_url,
+                             store=LocalSessionStore(store_dir), quota=quota, session=build_session(16),
+                             retry_base_delay=0.01)
+
+
+def run(label, server, uploader, paths, workers, digests):
+    start = time.perf_counter()
+    results = uploader.upload_many([{'path': str(path), 'metadata': {'snippet': {'title': path.stem}}}
+                                    for path in paths], max_workers=workers)
+    elapsed = time.perf_counter() - start
+    ok = [result for result in results if result['success']]
+    assert all(result['data']['video']['sha256'] == digests[index] for index, result in enumerate(results)
+               if result['success']), 'server received different bytes'
+    total = sum(result['data']['bytes'] for result in ok)
+    print(f"{label:<34}: {total / 2 ** 20 / elapsed:8.1f} MiB/s, {len(ok)}/{len(paths)} uploaded, "
+          f"{server.counters['bytes'] / max(total, 1):.2f}x bytes sent, {server.counters['chunks']} chunks")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', type=int, default=6)
+    parser.add_argument('--size-mb', type=int, default=64)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+    chunk_size = args.chunk_mb * 2 ** 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp, args.videos, args.size_mb * 2 ** 20)
+        digests = [sha256_of(path) for path in paths]
+        tracemalloc.start()
+
+        with StubUploadServer() as server:
+            run('sequential', server, uploader_for(server, tmp / 's1', chunk_size), paths, 1, digests)
+        with StubUploadServer() as server:
+            run(f'parallel ({args.workers} workers)', server, uploader_for(server, tmp / 's2', chunk_size),
+                paths, args.workers, digests)
+        with StubUploadServer(fail_every=5) as server:
+            run('parallel, every 5th chunk fails', server, uploader_for(server, tmp / 's3', chunk_size),
+                paths, args.workers, digests)
+
+        # Quota for only two videos.insert calls: the rest are refused before sending bytes
+        with StubUploadServer() as server:
+            run('quota for 2 uploads', server, uploader_for(server, tmp / 's4', chunk_size, quota_units=3200),
+                paths, args.workers, digests)
+
+        # An invocation dies halfway through; the next one resumes the persisted session
+        with StubUploadServer() as server:
+            store_dir = tmp / 's5'
+            first = uploader_for(server, store_dir, chunk_size)
+            target = paths[0].stat().st_size // 2
+
+            def stop_halfway(offset, total):
+                if offset >= target:
+                    raise Interrupted()
+
+            interrupted = first.upload_file(str(paths[0]), {'snippet': {'title': 'resume'}}, progress=stop_halfway)
+            assert not interrupted['success']
+            result = uploader_for(server, store_dir, chunk_size).upload_file(str(paths[0]), {'snippet': {}})
+            assert result['success'] and result['data']['video']['sha256'] == digests[0]
+            print(f"{'resume after interruption':<34}: resumed at byte {result['data']['resumed_from']:,} "
+                  f"of {result['data']['bytes']:,}, {server.counters['sessions']} session, "
+                  f"{server.counters['bytes'] / result['data']['bytes']:.2f}x bytes sent")
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak Python heap (client and stub server): {peak / 2 ** 20:.1f} MiB "
+              f"for {args.videos} x {args.size_mb} MiB files")
+
+
+if __name__ == '__main__':
+    main()
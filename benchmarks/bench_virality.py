@@ -0,0 +1,58 @@
+"""Benchmark vectorized virality scoring and top-k selection on synthetic snapshot rows
+
+Usage: python benchmarks/bench_virality.py [--rows 1000000] [--regions 30] [--k 10]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.analyzers.virality import score_arrays, top_k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--regions', type=int, default=30)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    now = 1_750_000_000
+    view_count = rng.lognormal(11, 2, args.rows).astype(np.int64)
+    like_count = (view_count * rng.uniform(0, 0.1, args.rows)).astype(np.int64)
+    like_count[rng.random(args.rows) < 0.05] = -1
+    comment_count = (view_count * rng.uniform(0, 0.01, args.rows)).astype(np.int64)
+    published_at = now - rng.integers(60, 14 * 86400, args.rows)
+    region_codes = rng.integers(0, args.regions, args.rows).astype(np.int32)
+
+    score_times, select_times, sort_times = [], [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        scores = score_arrays(view_count, like_count, comment_count, published_at, region_codes, now)
+        score_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        selected = top_k(scores.score, args.k)
+        select_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        full_sort = np.argsort(scores.score)[::-1][:args.k]
+        sort_times.append(time.perf_counter() - start)
+        assert np.array_equal(scores.score[selected], scores.score[full_sort])
+
+    print(f"rows={args.rows:,} regions={args.regions} k={args.k} (best of {args.repeat})")
+    print(f"score (velocity, ratios, region z-scores): {min(score_times) * 1000:8.1f} ms")
+    print(f"top-k via argpartition                  : {min(select_times) * 1000:8.1f} ms")
+    print(f"top-k via full argsort                  : {min(sort_times) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
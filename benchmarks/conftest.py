@@ -0,0 +1,80 @@
+"""pytest-benchmark suite for the collector, parser and ranking, run offline against the stub server
+
+Needs pytest and pytest-benchmark (pip install -r requirements-dev.txt):
+
+    python -m pytest -q benchmarks --benchmark-disable
+    python -m pytest benchmarks --benchmark-only
+    python -m pytest benchmarks --benchmark-only --fixtures-dir benchmarks/recorded \\
+        --stub-latency 0.02 --stub-error-rate 0.01 --benchmark-compare
+
+Without --fixtures-dir (or YT_FIXTURES_DIR) the stub serves synthetic items;
+record real responses once with benchmarks/record_fixtures.py. The suite runs
+with APP_ENV=benchmark (config/config_benchmark.yaml): no response cache, no
+quota limit and no state kept between rounds.
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ['APP_ENV'] = 'benchmark'
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import pytest
+
+from benchmarks.fixtures import FixtureSet
+from benchmarks.stub_youtube_server import StubYouTubeServer, make_video_item
+from config import Config
+
+Config.reset()
+
+SCALES = [10, 100, 1000]
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('stub', 'stub YouTube API server')
+    group.addoption('--fixtures-dir', default=os.environ.get('YT_FIXTURES_DIR'),
+                    help='replay recorded responses from this directory')
+    group.addoption('--stub-pages', type=int, default=2, help='chart pages per region (synthetic mode)')
+    group.addoption('--stub-latency', type=float, default=0.0, help='seconds added to every response')
+    group.addoption('--stub-error-rate', type=float, default=0.0, help='fraction answered 503 backendError')
+    group.addoption('--stub-rate-limit-rate', type=float, default=0.0,
+                    help='fraction answered 429 rateLimitExceeded')
+    group.addoption('--stub-quota-after', type=int, default=None,
+                    help='answer 403 quotaExceeded after this many requests')
+    group.addoption('--bench-rounds', type=int, default=3, help='rounds for the network benchmarks')
+
+
+@pytest.fixture(scope='session')
+def fixture_set(request):
+    root = request.config.getoption('--fixtures-dir')
+    return FixtureSet(root) if FixtureSet.exists(root) else None
+
+
+@pytest.fixture(scope='session')
+def stub_server(request, fixture_set):
+    option = request.config.getoption
+    with StubYouTubeServer(pages=option('--stub-pages'), latency=option('--stub-latency'),
+                           fixtures=fixture_set, error_rate=option('--stub-error-rate'),
+                           rate_limit_rate=option('--stub-rate-limit-rate'),
+                           quota_after=option('--stub-quota-after')) as server:
+        yield server
+
+
+@pytest.fixture(scope='session')
+def bench_rounds(request):
+    return request.config.getoption('--bench-rounds')
+
+
+@pytest.fixture(scope='session')
+def make_pages(fixture_set):
+    """Build n pages of videos.list items: recorded pages cycled, or synthetic ones"""
+    def build(count):
+        if fixture_set is None:
+            return [[make_video_item(page * 50 + index) for index in range(50)] for page in range(count)]
+        recorded = [fixture_set.page(region, page)['items'] for region in fixture_set.regions
+                    for page in range(fixture_set.page_counts[region])]
+        return [recorded[page % len(recorded)] for page in range(count)]
+    return build
@@ -0,0 +1,75 @@
+"""Recorded videos.list responses for replay through the stub server
+
+Layout of a fixture directory:
+
+    index.json                 {"regions": {"IN": 4, "US": 3}, "recorded_at": ...}
+    <REGION>/page-<n>.json     the response body of page n of that region's chart
+
+Page tokens are rewritten to the page number at record time, so replay does
+not depend on YouTube's opaque tokens. Request parameters (and with them the
+API key) are never stored.
+"""
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class FixtureSet:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        index = json.loads((self.root / 'index.json').read_text(encoding='utf-8'))
+        self.page_counts: Dict[str, int] = index['regions']
+        self.regions = sorted(self.page_counts)
+        self._pages: Dict[tuple, Dict[str, Any]] = {}
+        self._items: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def exists(root: Optional[str]) -> bool:
+        return bool(root) and (Path(root) / 'index.json').is_file()
+
+    def recorded_region(self, region: str) -> str:
+        """The recorded region that serves a requested one; unrecorded regions map stably onto recorded ones"""
+        if region in self.page_counts:
+            return region
+        return self.regions[zlib.crc32(region.encode('utf-8')) % len(self.regions)]
+
+    def page(self, region: str, page: int) -> Optional[Dict[str, Any]]:
+        region = self.recorded_region(region)
+        if page >= self.page_counts[region]:
+            return None
+        key = (region, page)
+        if key not in self._pages:
+            path = self.root / region / f'page-{page}.json'
+            self._pages[key] = json.loads(path.read_text(encoding='utf-8'))
+        return self._pages[key]
+
+    def items_by_id(self, video_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        if self._items is None:
+            self._items = {}
+            for region in self.regions:
+                for page in range(self.page_counts[region]):
+                    for item in self.page(region, page).get('items', ()):
+                        self._items.setdefault(item['id'], item)
+        return [self._items[video_id] for video_id in video_ids if video_id in self._items]
+
+
+def save_region(root: str, region: str, pages: List[Dict[str, Any]]):
+    """Store one region's recorded pages and add it to the index"""
+    root_path = Path(root)
+    (root_path / region).mkdir(parents=True, exist_ok=True)
+    for number, body in enumerate(pages):
+        body = dict(body)
+        if number + 1 < len(pages):
+            body['nextPageToken'] = str(number + 1)
+        else:
+            body.pop('nextPageToken', None)
+        body.pop('prevPageToken', None)
+        (root_path / region / f'page-{number}.json').write_text(json.dumps(body), encoding='utf-8')
+
+    index_path = root_path / 'index.json'
+    index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {'regions': {}}
+    index['regions'][region] = len(pages)
+    index['recorded_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    index_path.write_text(json.dumps(index, indent=2, sort_keys=True), encoding='utf-8')
@@ -0,0 +1,77 @@
+"""Summarize `python -X importtime` for the Lambda entry point and its heavy dependencies
+
+Each target is imported in a fresh interpreter; the report lists the total
+import time, the slowest modules by self time and self time per top-level
+package.
+
+Usage: python benchmarks/profile_imports.py [--top 15] [module ...]
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+
+DEFAULT_TARGETS = [
+    'src.scheduler.handler',
+    'boto3',
+    'requests',
+    'isodate',
+    'numpy',
+    'src.collectors.popular_videos',
+    'src.analyzers.virality',
+]
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_profile(module: str):
+    """(self us, cumulative us, depth, name) rows for importing module in a fresh interpreter"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=project_root, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return rows
+
+
+def summarize(module: str, rows, top: int):
+    # Modules imported by site before the -c code ran are not part of the target
+    names = [row[3] for row in rows]
+    target_rows = rows[names.index('site') + 1:] if 'site' in names else rows
+    total_us = sum(row[1] for row in target_rows if row[2] == 0)
+    print(f"\n{module}: {total_us / 1000:.1f} ms, {len(target_rows)} modules")
+
+    for self_us, cumulative_us, _, name in sorted(target_rows, reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+    packages = defaultdict(int)
+    for self_us, _, _, name in target_rows:
+        packages[name.split('.')[0]] += self_us
+    largest = sorted(packages.items(), key=lambda entry: entry[1], reverse=True)[:5]
+    print('  by package: ' + ', '.join(f"{name} {us / 1000:.1f} ms" for name, us in largest))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=DEFAULT_TARGETS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            summarize(module, import_profile(module), args.top)
+        except RuntimeError as e:
+            print(f"\n{module}: import failed: {e}")
+
+
+if __name__ == '__main__':
+    main()
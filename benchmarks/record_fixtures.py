@@ -0,0 +1,58 @@
+"""Record real mostPopular videos.list responses once, for replay by the stub server
+
+Spends real quota (one videos.list unit per page); the API key comes from the
+config as usual and is not written to the fixtures. Regions default to
+collector.regions.
+
+Usage: python benchmarks/record_fixtures.py --output benchmarks/recorded [--regions IN US] [--pages 4]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.fixtures import save_region
+from config import Config
+from src.collectors.youtube_api import get_api_base_url, load_api_key, make_api_call
+
+
+def record_region(region: str, pages: int, api_key: str):
+    url = f"{get_api_base_url()}/videos"
+    bodies = []
+    page_token = None
+    while len(bodies) < pages:
+        params = {'part': 'snippet,statistics,contentDetails', 'chart': 'mostPopular',
+                  'regionCode': region, 'maxResults': 50, 'pageToken': page_token, 'key': api_key}
+        response = make_api_call(url, params, "GET")
+        if not response["success"]:
+            raise RuntimeError(f"Recording {region} page {len(bodies)} failed: {response['error']}")
+        bodies.append(response["data"])
+        page_token = response["data"].get("nextPageToken")
+        if not page_token:
+            break
+    return bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--regions', nargs='*')
+    parser.add_argument('--pages', type=int, default=4)
+    args = parser.parse_args()
+
+    regions = args.regions or sorted({section.region for section in
+                                      Config.get_instance().get_config_value('collector.regions') or ()})
+    api_key = load_api_key()
+    if not api_key:
+        sys.exit("No youtube.apiKey configured")
+    for region in regions:
+        bodies = record_region(region, args.pages, api_key)
+        save_region(args.output, region, bodies)
+        print(f"{region}: {len(bodies)} pages, {sum(len(body.get('items', ())) for body in bodies)} items")
+
+
+if __name__ == '__main__':
+    main()
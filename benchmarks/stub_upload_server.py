@@ -0,0 +1,160 @@
+"""Local stand-in for the YouTube resumable upload endpoints, used by the uploader benchmark
+
+POST .../videos?uploadType=resumable opens a session and returns its URI in
+Location. PUT to the session URI with Content-Range "bytes a-b/total"
+appends a chunk (308 with Range while incomplete, 200 with the video
+resource at the end); "bytes */total" reports progress. Failures can be
+injected: every fail_every-th chunk keeps only part of its bytes and returns
+503, the way a dropped connection loses the tail of a request.
+"""
+import hashlib
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_CONTENT_RANGE = re.compile(r'bytes (?:(\d+)-(\d+)|\*)/(\d+)')
+
+
+class UploadSession:
+    def __init__(self, total, metadata):
+        self.total = total
+        self.metadata = metadata
+        self.received = 0
+        self.sha = hashlib.sha256()
+        self.video = None
+        self.lock = threading.Lock()
+
+
+class StubUploadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not parsed.path.endswith("/videos") or query.get("uploadType") != "resumable":
+            self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            return
+        session_id = uuid.uuid4().hex
+        self.server.sessions[session_id] = UploadSession(
+            int(self.headers.get("X-Upload-Content-Length", 0)), json.loads(body or b"{}"))
+        self.server.count("sessions")
+        host, port = self.server.server_address[:2]
+        self.send_response(200)
+        self.send_header("Location", f"http://{host}:{port}/upload/session/{session_id}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_PUT(self):
+        session = self.server.sessions.get(self.path.rsplit("/", 1)[-1])
+        length = int(self.headers.get("Content-Length", 0))
+        if session is None:
+            self.rfile.read(length)
+            self._send_json(404, {"error": {"code": 404, "message": "Upload session not found"}})
+            return
+        match = _CONTENT_RANGE.match(self.headers.get("Content-Range", ""))
+        if not match:
+            self.rfile.read(length)
+            self._send_json(400, {"error": {"code": 400, "message": "Bad Content-Range"}})
+            return
+
+        with session.lock:
+            start = match.group(1)
+            if start is not None:
+                start = int(start)
+                if start != session.received:
+                    self.rfile.read(length)
+                    self._send_json(400, {"error": {"code": 400, "message": "Chunk does not continue upload"}})
+                    return
+                chunk_number = self.server.count("chunks")
+                fail = self.server.fail_every and chunk_number % self.server.fail_every == 0
+                # A failed chunk keeps only its first half, like a connection dropped mid-request
+                keep = length // 2 if fail else length
+                remaining = length
+                while remaining:
+                    data = self.rfile.read(min(remaining, 1 << 20))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    usable = data[:max(0, keep - (length - remaining - len(data)))]
+                    session.sha.update(usable)
+                    session.received += len(usable)
+                self.server.count("bytes", length)
+                if fail:
+                    self._send_json(503, {"error": {"code": 503, "message": "Backend Error"}})
+                    return
+            else:
+                self.rfile.read(length)
+                self.server.count("status_queries")
+
+            if session.received >= session.total:
+                if session.video is None:
+                    session.video = {
+                        "kind": "youtube#video",
+                        "id": f"up{len(self.server.completed):08d}",
+                        "snippet": session.metadata.get("snippet", {}),
+                        "status": {"uploadStatus": "uploaded"},
+                        "sha256": session.sha.hexdigest(),
+                    }
+                    self.server.completed.append(session.video)
+                self._send_json(200, session.video)
+                return
+            self.send_response(308)
+            if session.received:
+                self.send_header("Range", f"bytes=0-{session.received - 1}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubUploadServer(ThreadingHTTPServer):
+    """Threaded resumable-upload stub; fail_every=N fails every Nth chunk"""
+
+    daemon_threads = True
+
+    def __init__(self, fail_every=0, host="127.0.0.1", port=0):
+        super().__init__((host, port), StubUploadHandler)
+        self.fail_every = fail_every
+        self.sessions = {}
+        self.completed = []
+        self.counters = {"sessions": 0, "chunks": 0, "bytes": 0, "status_queries": 0}
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    def count(self, name, value=1):
+        with self._counter_lock:
+            self.counters[name] += value
+            return self.counters[name]
+
+    @property
+    def upload_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/upload/youtube/v3/videos"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
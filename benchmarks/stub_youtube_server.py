@@ -0,0 +1,226 @@
+"""Local stand-in for the YouTube Data API videos endpoint, used by the benchmarks
+
+Serves synthetic items by default, or replays recorded responses (see
+benchmarks/fixtures.py). Latency, server errors, 429 rate limiting and
+quotaExceeded responses can be injected to measure the collector under the
+conditions it meets against the real API, without spending quota.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 50
+
+
+def make_video_item(index, region="US", generation=0):
+    """Build a synthetic videos.list item; every third video is a Short
+
+    generation stands for elapsed collection runs: only the statistics change with it.
+    """
+    if index % 3 == 0:
+        duration = f"PT{15 + index % 40}S"
+    else:
+        duration = f"PT{2 + index % 9}M{index % 60}S"
+    return {
+        "kind": "youtube#video",
+        "id": f"vid{index:08d}",
+        "snippet": {
+            "publishedAt": f"2025-07-0{1 + index % 9}T{index % 24:02d}:00:00Z",
+            "channelId": f"UC{index % 997:06d}",
+            "title": f"Viral short number {index} #shorts",
+            "description": f"Synthetic description {index} for {region}",
+            "channelTitle": f"Channel {index % 997}",
+            "tags": ["shorts", "viral", f"topic{index % 50}"],
+        },
+        "contentDetails": {
+            "duration": duration,
+            "dimension": "2d",
+            "definition": "hd",
+            "caption": "false",
+            "licensedContent": True,
+        },
+        "statistics": {
+            "viewCount": str(1000 * (index + 1) * (generation + 1)),
+            "likeCount": str(50 * (index + 1) * (generation + 1)),
+            "favoriteCount": "0",
+            "commentCount": str(index % 500),
+        },
+    }
+
+
+class StubYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if not parsed.path.endswith("/videos"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+            return
+
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        fault = self.server.next_fault(query.get("key"))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if fault:
+            self._send_json(*FAULTS[fault])
+            return
+
+        region = query.get("regionCode", "US")
+        generation = self.server.generation
+        fixtures = self.server.fixtures
+        if query.get("id") and fixtures:
+            body = {"kind": "youtube#videoListResponse", "items": fixtures.items_by_id(query["id"].split(","))}
+            items = body["items"]
+        elif query.get("id"):
+            items = [make_video_item(int(video_id[3:]), region, generation)
+                     for video_id in query["id"].split(",")]
+            body = {"kind": "youtube#videoListResponse", "items": items}
+        elif fixtures:
+            body = fixtures.page(region, int(query.get("pageToken", "0") or 0))
+            if body is None:
+                self._send_json(400, error_body(400, "invalidPageToken", "The page token is invalid."))
+                return
+            body = dict(body)
+            items = body.get("items", [])
+        else:
+            page = int(query.get("pageToken", "0") or 0)
+            start = page * PAGE_SIZE
+            if self.server.short_share:
+                # Durations differ per region here, so each region gets its own videos
+                start += zlib.crc32(region.encode("utf-8")) % 100000 * 1000
+            items = [make_video_item(start + i, region, generation) for i in range(PAGE_SIZE)]
+            if self.server.short_share:
+                shorts = round(self.server.short_share(region, page) * PAGE_SIZE)
+                for position, item in enumerate(items):
+                    item["contentDetails"]["duration"] = "PT30S" if position < shorts else "PT3M10S"
+            body = {"kind": "youtube#videoListResponse", "items": items,
+                    "pageInfo": {"totalResults": self.server.pages * PAGE_SIZE, "resultsPerPage": PAGE_SIZE}}
+            if page + 1 < self.server.pages:
+                body["nextPageToken"] = str(page + 1)
+
+        parts = set(query.get("part", "snippet,statistics,contentDetails").split(","))
+        body["items"] = [
+            {key: value for key, value in item.items() if key in parts or key in ("kind", "id")}
+            for item in items
+        ]
+        self._send_json(200, body)
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        etag = '"%s"' % hashlib.md5(payload).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def error_body(code, reason, message):
+    """Error payload in the Data API's format"""
+    return {"error": {"code": code, "message": message,
+                      "errors": [{"message": message, "domain": "youtube.quota" if reason == "quotaExceeded"
+                                  else "global", "reason": reason}]}}
+
+
+FAULTS = {
+    "error": (503, error_body(503, "backendError", "Backend Error")),
+    "rate_limit": (429, error_body(429, "rateLimitExceeded", "Too many requests.")),
+    "quota": (403, error_body(403, "quotaExceeded", "The request cannot be completed because you have "
+                                                     "exceeded your quota.")),
+    "key_invalid": (400, error_body(400, "keyInvalid", "Bad Request")),
+}
+
+
+class StubYouTubeServer(ThreadingHTTPServer):
+    """Threaded stub server with a fixed number of pages per region and an artificial latency
+
+    error_rate and rate_limit_rate are the fractions of requests answered with
+    503 backendError and 429 rateLimitExceeded (seeded, so runs repeat);
+    after quota_after requests every request gets 403 quotaExceeded, and
+    with key_quota so does every request past key_quota made with the same
+    API key. Keys in invalid_keys get 400 keyInvalid. With
+    fixtures (a FixtureSet), chart pages and ID lookups come from recorded
+    responses instead of synthetic items. short_share(region, page), when
+    given, sets the share of Shorts on each synthetic chart page. stats
+    counts what was served and
+    key_requests the requests per API key.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages=10, latency=0.05, host="127.0.0.1", port=0, fixtures=None,
+                 error_rate=0.0, rate_limit_rate=0.0, quota_after=None, seed=0, key_quota=None,
+                 invalid_keys=(), short_share=None):
+        super().__init__((host, port), StubYouTubeHandler)
+        self.pages = pages
+        self.latency = latency
+        self.generation = 0
+        self.fixtures = fixtures
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_after = quota_after
+        self.key_quota = key_quota
+        self.invalid_keys = set(invalid_keys)
+        self.short_share = short_share
+        self.stats = {"requests": 0, "error": 0, "rate_limit": 0, "quota": 0, "key_invalid": 0}
+        self.key_requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def next_fault(self, key=None):
+        """Count a request and pick the fault (if any) it gets"""
+        with self._lock:
+            self.stats["requests"] += 1
+            self.key_requests[key] = self.key_requests.get(key, 0) + 1
+            fault = None
+            if key in self.invalid_keys:
+                fault = "key_invalid"
+            elif self.quota_after is not None and self.stats["requests"] > self.quota_after:
+                fault = "quota"
+            elif self.key_quota is not None and self.key_requests[key] > self.key_quota:
+                fault = "quota"
+            else:
+                roll = self._random.random()
+                if roll < self.error_rate:
+                    fault = "error"
+                elif roll < self.error_rate + self.rate_limit_rate:
+                    fault = "rate_limit"
+            if fault:
+                self.stats[fault] += 1
+            return fault
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
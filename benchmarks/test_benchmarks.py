@@ -0,0 +1,62 @@
+"""Collector, parser and ranking benchmarks at 10, 100 and 1000 regions/pages (see conftest.py)"""
+import time
+
+import pytest
+
+from benchmarks.conftest import SCALES
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.analyzers.virality import top_viral_videos
+from src.collectors.popular_videos import fetch_most_popular_videos
+from src.collectors.records import VideoBatch
+from src.collectors.video_parser import parse_video_item, parse_video_page
+from src.collectors.youtube_api import build_session
+
+
+def region_configs(count):
+    return [{'region': f'R{index:04d}', 'language': 'en'} for index in range(count)]
+
+
+@pytest.mark.parametrize('regions', SCALES)
+def test_fetch_most_popular_videos(benchmark, stub_server, bench_rounds, regions):
+    configs = region_configs(regions)
+    session = build_session(16)
+    before = stub_server.stats['requests']
+    results = benchmark.pedantic(
+        fetch_most_popular_videos, args=(configs,),
+        kwargs={'target_per_region': 1000, 'session': session, 'base_url': stub_server.base_url},
+        rounds=bench_rounds, iterations=1,
+    )
+    benchmark.extra_info['requests_per_round'] = (stub_server.stats['requests'] - before) // bench_rounds
+    benchmark.extra_info['shorts'] = sum(len(videos) for videos in results.values())
+    assert len(results) == regions
+
+
+def test_fetch_with_faults(benchmark, fixture_set, bench_rounds):
+    """100 regions with 5% backend errors and 5% 429s: how long a run takes and how many pages are lost"""
+    configs = region_configs(100)
+    with StubYouTubeServer(pages=2, latency=0.0, fixtures=fixture_set,
+                           error_rate=0.05, rate_limit_rate=0.05, seed=7) as server:
+        results = benchmark.pedantic(
+            fetch_most_popular_videos, args=(configs,),
+            kwargs={'target_per_region': 1000, 'session': build_session(16), 'base_url': server.base_url},
+            rounds=bench_rounds, iterations=1,
+        )
+        benchmark.extra_info.update({name: count // bench_rounds for name, count in server.stats.items()})
+    benchmark.extra_info['shorts'] = sum(len(videos) for videos in results.values())
+
+
+@pytest.mark.parametrize('pages', SCALES)
+def test_parse_video_page(benchmark, make_pages, pages):
+    data = make_pages(pages)
+    records = benchmark(lambda: [record for page in data for record in parse_video_page(page)])
+    expected = [record for page in data for item in page for record in [parse_video_item(item)] if record]
+    assert records == expected
+
+
+@pytest.mark.parametrize('pages', SCALES)
+def test_top_viral_videos(benchmark, make_pages, pages):
+    data = make_pages(pages)
+    batch = VideoBatch.from_records([record for page in data for record in parse_video_page(page)],
+                                    'US_en', int(time.time()))
+    top = benchmark(top_viral_videos, batch, k=10, min_views=0, max_age_hours=0)
+    assert len(top) == min(10, len({record['id'] for page in data for record in parse_video_page(page)}))
@@ -1,118 +1,222 @@
 import os
-import yaml
-import json
-import types
+import pickle
 import logging
+import threading
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+CONFIG_DIR = Path(__file__).resolve().parent
+SNAPSHOT_VERSION = 1
+
+_MISSING = object()
+_NOT_FOUND = object()
+
+
+class ConfigSection:
+    """Read-only dot-notation view over a config dict.
+
+    Nested sections are wrapped on first access and kept, so only the
+    sections a caller actually touches are materialized.
+    """
+
+    __slots__ = ('_data', '_children')
+
+    def __init__(self, data):
+        self._data = data
+        self._children = {}
+
+    def __getattr__(self, name):
+        try:
+            value = self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        if isinstance(value, (dict, list)):
+            child = self._children.get(name)
+            if child is None:
+                child = self._children[name] = self._wrap(value)
+            return child
+        return value
+
+    @classmethod
+    def _wrap(cls, value):
+        if isinstance(value, dict):
+            return cls(value)
+        if isinstance(value, list):
+            return [cls._wrap(item) for item in value]
+        return value
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def to_dict(self):
+        """The underlying (shared, do not mutate) dict."""
+        return self._data
+
+    def __repr__(self):
+        return f"ConfigSection({self._data!r})"
+
+
 class Config:
-    """Professional configuration management with environment-specific overrides."""
-    
+    """Professional configuration management with environment-specific overrides.
+
+    The merged YAML is cached as a pickled snapshot next to the config files
+    (or in CONFIG_CACHE_DIR) and reused until one of the YAML files changes,
+    so a cold start skips YAML parsing entirely.
+    """
+
     _instance = None
     _initialized = False
-    
+    _lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
         if not self._initialized:
-            self._load_config()
-            Config._initialized = True
-    
+            with Config._lock:
+                if not self._initialized:
+                    self._values = {}
+                    self._load_config()
+                    Config._initialized = True
+
     @classmethod
     def get_instance(cls):
         """Get the singleton configuration instance."""
-        if cls._instance is None:
+        if cls._instance is None or not cls._initialized:
             cls._instance = cls()
         return cls._instance
-    
+
+    @classmethod
+    def reset(cls):
+        """Drop the singleton so the next get_instance() reloads (environment switches, tests)."""
+        with cls._lock:
+            cls._instance = None
+            cls._initialized = False
+
     def _load_config(self):
-        """Load and merge configuration files."""
+        """Load and merge configuration files, preferring a fresh cached snapshot."""
         try:
-            # Load base configuration
-            base_config = self._load_yaml_file('config/config_default.yaml')
-            
-            # Detect environment and load overrides
             environment = self._detect_environment()
-            env_config = self._load_environment_config(environment)
-            
-            # Deep merge configurations
-            merged_config = self._deep_merge(base_config, env_config)
-            
-            # Convert to dot notation access
-            self.config = self._dict_to_namespace(merged_config)
+            sources = self._config_sources(environment)
+            merged_config = self._load_snapshot(environment, sources)
+            if merged_config is None:
+                # Load base configuration, then environment overrides
+                base_config = self._load_yaml_file(sources[0])
+                env_config = self._load_yaml_file(sources[1])
+                merged_config = self._deep_merge(base_config, env_config)
+                self._save_snapshot(environment, sources, merged_config)
+
+            self._data = merged_config
+            self.config = ConfigSection(merged_config)
             self.environment = environment
-            
-            logger.info(f"Configuration loaded for environment: {environment}")
-            
+
+            logger.info("Configuration loaded for environment: %s", environment)
+
         except Exception as e:
-            logger.error(f"Failed to load configuration: {e}")
+            logger.error("Failed to load configuration: %s", e)
             # Fallback to minimal config
-            self.config = self._get_fallback_config()
+            self._data = self._get_fallback_config()
+            self.config = ConfigSection(self._data)
             self.environment = 'fallback'
-    
+
     def _detect_environment(self):
         """Detect current environment from APP_ENV variable."""
         return os.environ.get('APP_ENV', 'local').lower()
-    
+
+    def _config_sources(self, environment):
+        """YAML files that make up the configuration, in merge order."""
+        return [CONFIG_DIR / 'config_default.yaml', CONFIG_DIR / f'config_{environment}.yaml']
+
+    def _snapshot_path(self, environment):
+        cache_dir = Path(os.environ.get('CONFIG_CACHE_DIR', CONFIG_DIR / '.cache'))
+        return cache_dir / f'config_{environment}.pickle'
+
+    @staticmethod
+    def _source_stamps(sources):
+        stamps = []
+        for source in sources:
+            try:
+                stat = source.stat()
+                stamps.append((str(source), stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamps.append((str(source), None, None))
+        return stamps
+
+    def _load_snapshot(self, environment, sources):
+        """Return the cached merged config if it was built from the current YAML files."""
+        snapshot_path = self._snapshot_path(environment)
+        try:
+            with open(snapshot_path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug("Ignoring unreadable config snapshot %s: %s", snapshot_path, e)
+            return None
+        if (snapshot.get('version') != SNAPSHOT_VERSION
+                or snapshot.get('sources') != self._source_stamps(sources)):
+            return None
+        return snapshot['data']
+
+    def _save_snapshot(self, environment, sources, merged_config):
+        """Write the merged config snapshot; read-only filesystems (Lambda) are not an error."""
+        snapshot_path = self._snapshot_path(environment)
+        try:
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = snapshot_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as file:
+                pickle.dump({
+                    'version': SNAPSHOT_VERSION,
+                    'sources': self._source_stamps(sources),
+                    'data': merged_config,
+                }, file, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(snapshot_path)
+        except OSError as e:
+            logger.debug("Could not write config snapshot %s: %s", snapshot_path, e)
+
     def _load_yaml_file(self, filepath):
         """Load a YAML file safely."""
+        import yaml
+
         try:
             config_path = Path(filepath)
             if not config_path.exists():
-                logger.warning(f"Config file not found: {filepath}")
+                logger.warning("Config file not found: %s", filepath)
                 return {}
-            
+
             with open(config_path, 'r', encoding='utf-8') as file:
                 return yaml.safe_load(file) or {}
-                
+
         except yaml.YAMLError as e:
-            logger.error(f"YAML parsing error in {filepath}: {e}")
+            logger.error("YAML parsing error in %s: %s", filepath, e)
             return {}
         except Exception as e:
-            logger.error(f"Error loading {filepath}: {e}")
+            logger.error("Error loading %s: %s", filepath, e)
             return {}
-    
-    def _load_environment_config(self, environment):
-        """Load environment-specific configuration."""
-        env_file = f'config/config_{environment}.yaml'
-        return self._load_yaml_file(env_file)
-    
+
     def _deep_merge(self, base_dict, override_dict):
         """Recursively merge dictionaries with override precedence."""
         if not isinstance(override_dict, dict):
             return base_dict
-        
+
         result = base_dict.copy()
-        
+
         for key, value in override_dict.items():
-            if (key in result and 
-                isinstance(result[key], dict) and 
+            if (key in result and
+                isinstance(result[key], dict) and
                 isinstance(value, dict)):
                 result[key] = self._deep_merge(result[key], value)
             else:
                 result[key] = value
-        
+
         return result
-    
-    def _dict_to_namespace(self, config_dict):
-        """Convert nested dictionary to SimpleNamespace for dot notation."""
-        try:
-            return json.loads(
-                json.dumps(config_dict), 
-                object_hook=lambda d: types.SimpleNamespace(**d)
-            )
-        except Exception as e:
-            logger.error(f"Failed to convert config to namespace: {e}")
-            return types.SimpleNamespace()
-    
+
     def _get_fallback_config(self):
         """Provide minimal fallback configuration."""
-        fallback = {
+        return {
             'logging': {
                 'level': 'INFO',
                 'handler': 'console',
@@ -120,60 +224,55 @@ class Config:
                 'file_path': None
             }
         }
-        return self._dict_to_namespace(fallback)
-    
+
     # Industry standard: Provide commonly used config as properties
     @property
     def log_level(self):
         """Get logging level with validation."""
-        try:
-            level = self.config.logging.level
-            valid_levels = {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'}
-            if level.upper() in valid_levels:
-                return level.upper()
-            else:
-                logger.warning(f"Invalid log level '{level}', using INFO")
-                return 'INFO'
-        except AttributeError:
-            return 'INFO'
-    
+        level = self.get_config_value('logging.level', 'INFO')
+        valid_levels = {'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'}
+        if isinstance(level, str) and level.upper() in valid_levels:
+            return level.upper()
+        logger.warning("Invalid log level '%s', using INFO", level)
+        return 'INFO'
+
     @property
     def log_handler(self):
         """Get logging handler type."""
-        try:
-            return self.config.logging.handler
-        except AttributeError:
-            return 'console'
-    
+        return self.get_config_value('logging.handler', 'console')
+
     @property
     def log_file_path(self):
         """Get log file path."""
-        try:
-            return self.config.logging.file_path
-        except AttributeError:
-            return None
-    
+        return self.get_config_value('logging.file_path')
+
     @property
     def should_create_log_folder(self):
         """Check if log folder should be created."""
-        try:
-            return bool(self.config.logging.create_folder)
-        except AttributeError:
-            return False
-    
+        return bool(self.get_config_value('logging.create_folder', False))
+
     def get_config_value(self, path, default=None):
-        """Generic method to get any config value by dot notation path."""
-        try:
-            parts = path.split('.')
-            current = self.config
-            
-            for part in parts:
-                current = getattr(current, part)
-            
-            return current
-        except AttributeError:
-            logger.debug(f"Config path '{path}' not found, using default: {default}")
+        """Generic method to get any config value by dot notation path.
+
+        Lookups are memoized per path; sections come back as ConfigSection.
+        """
+        value = self._values.get(path, _MISSING)
+        if value is _MISSING:
+            value = self._data
+            for part in path.split('.'):
+                if isinstance(value, dict) and part in value:
+                    value = value[part]
+                else:
+                    value = _NOT_FOUND
+                    break
+            else:
+                value = ConfigSection._wrap(value)
+            self._values[path] = value
+
+        if value is _NOT_FOUND:
+            logger.debug("Config path '%s' not found, using default: %s", path, default)
             return default
-    
+        return value
+
     def __repr__(self):
-        return f"Config(environment='{self.environment}')"
\ No newline at end of file
+        return f"Config(environment='{self.environment}')"
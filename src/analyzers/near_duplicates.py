@@ -0,0 +1,281 @@
+import logging
+import pickle
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.analyzers.trend_index import video_terms
+
+logger = logging.getLogger(__name__)
+
+SEED = 0x5EED
+CHUNK_SIZE = 4096
+DAY_SECONDS = 86400
+
+
+def term_hashes(video: Dict[str, Any], description_tokens: int = 32) -> List[int]:
+    """Stable 32-bit hashes of a parsed video's shingles: title and description n-grams plus tags
+
+    crc32 rather than hash() so signatures stay comparable across processes
+    and with a saved index.
+    """
+    return [zlib.crc32(term.encode('utf-8')) for term in video_terms(video, 2, description_tokens)]
+
+
+class MinHasher:
+    """MinHash signatures for many term sets at once, one numpy pass per chunk
+
+    Hash function i is the splitmix64 finalizer applied to the term hash XOR
+    a per-function seed; the minimum per function is kept in 32 bits.
+    """
+
+    def __init__(self, num_perm: int = 32, seed: int = SEED):
+        self.num_perm = num_perm
+        self.seeds = np.random.default_rng(seed).integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+    @staticmethod
+    def _mix(values: np.ndarray) -> np.ndarray:
+        """splitmix64 finalizer, in place on a uint64 array (multiplications wrap)"""
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+        return values
+
+    def signatures(self, hash_lists: Sequence[Sequence[int]]) -> np.ndarray:
+        """(len(hash_lists), num_perm) uint32 signatures; every list must be non-empty"""
+        lengths = np.fromiter((len(hashes) for hashes in hash_lists), dtype=np.int64, count=len(hash_lists))
+        if not len(lengths):
+            return np.empty((0, self.num_perm), dtype=np.uint32)
+        flat = np.fromiter((h for hashes in hash_lists for h in hashes), dtype=np.uint64, count=int(lengths.sum()))
+        permuted = self._mix(flat[:, None] ^ self.seeds)
+        starts = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        return np.minimum.reduceat(permuted, starts, axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Incremental MinHash/LSH clustering of near-duplicate videos
+
+    Signatures are split into bands of rows; videos sharing any band land in
+    the same bucket. Every bucket keeps only the first video that filled it,
+    so an insert costs one dictionary lookup per band no matter how large the
+    index is. A bucket match is accepted when the estimated Jaccard similarity
+    of the two signatures reaches threshold, and accepted matches are merged
+    with union-find. The earliest video of a cluster is its root, so cluster
+    IDs stay the same as later runs add videos.
+
+    Videos are kept for retention_days days after the day they were added.
+    Once the oldest ones age out, the index is rebuilt from the stored
+    signatures of the rest (at most once a day); a cluster whose root aged
+    out is then named after its earliest remaining video.
+    """
+
+    def __init__(self, num_perm: int = 32, bands: int = 8, threshold: float = 0.5, description_tokens: int = 32,
+                 retention_days: Optional[int] = 14):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.description_tokens = description_tokens
+        self.retention_days = retention_days
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._parent = np.zeros(1024, dtype=np.int64)
+        self._signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self._days = np.zeros(1024, dtype=np.int32)
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._band_weights = np.random.default_rng(SEED + 1).integers(
+            1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items() if key != '_lock'}
+        state['_parent'] = self._parent[:len(self.ids)].copy()
+        state['_signatures'] = self._signatures[:len(self.ids)].copy()
+        state['_days'] = self._days[:len(self.ids)].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _grow(self, needed: int):
+        capacity = len(self._parent)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self._parent = np.resize(self._parent, capacity)
+        self._days = np.resize(self._days, capacity)
+        signatures = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+        signatures[:len(self.ids)] = self._signatures[:len(self.ids)]
+        self._signatures = signatures
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """One uint64 key per band: the band's rows mixed with odd multipliers (wrapping)"""
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (banded * self._band_weights).sum(axis=2, dtype=np.uint64)
+
+    def _find(self, position: int) -> int:
+        parent = self._parent
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = int(parent[position])
+        return position
+
+    def _union(self, first: int, second: int):
+        first, second = self._find(first), self._find(second)
+        if first != second:
+            # The older video stays the root, keeping cluster IDs stable
+            self._parent[max(first, second)] = min(first, second)
+
+    def _similarity(self, first: int, second: int) -> float:
+        return float(np.count_nonzero(self._signatures[first] == self._signatures[second])) / self.num_perm
+
+    def _link(self, positions: Iterable[int], band_keys: List[List[int]]):
+        """Put positions into their band buckets, merging each with a similar bucket holder"""
+        for position, keys in zip(positions, band_keys):
+            for buckets, key in zip(self._buckets, keys):
+                existing = buckets.setdefault(key, position)
+                if existing != position and self._similarity(existing, position) >= self.threshold:
+                    self._union(existing, position)
+
+    def _evict(self, day: int):
+        """Drop videos added before the retention span, rebuilding buckets and clusters from the rest"""
+        count = len(self.ids)
+        if not self.retention_days or not count or int(self._days[:count].min()) > day - self.retention_days:
+            return
+        keep = np.flatnonzero(self._days[:count] > day - self.retention_days)
+        signatures = self._signatures[keep]
+        days = self._days[keep]
+        self.ids = [self.ids[position] for position in keep.tolist()]
+        self._positions = {video_id: position for position, video_id in enumerate(self.ids)}
+        self._parent = np.arange(max(len(keep), 1024), dtype=np.int64)
+        self._signatures = np.zeros((len(self._parent), self.num_perm), dtype=np.uint32)
+        self._signatures[:len(keep)] = signatures
+        self._days = np.zeros(len(self._parent), dtype=np.int32)
+        self._days[:len(keep)] = days
+        self._buckets = [{} for _ in range(self.bands)]
+        # Videos without terms have an all-zero signature and stay out of the buckets
+        hashed = np.flatnonzero(signatures.any(axis=1))
+        self._link(hashed.tolist(), self._band_keys(signatures[hashed]).tolist())
+        logger.info("Near-duplicate index: evicted %s videos older than %s days, %s left",
+                    count - len(keep), self.retention_days, len(keep))
+
+    def add_videos(self, videos: Iterable[Dict[str, Any]], collected_at: Optional[float] = None) -> int:
+        """Index parsed videos not seen before; returns how many were added
+
+        Videos without any title, description or tag terms get a cluster of
+        their own. Videos added more than retention_days before collected_at
+        (now by default) are evicted first.
+        """
+        day = int((time.time() if collected_at is None else collected_at) // DAY_SECONDS)
+        with self._lock:
+            self._evict(day)
+        added = 0
+        chunk: List[Dict[str, Any]] = []
+        for video in videos:
+            chunk.append(video)
+            if len(chunk) == CHUNK_SIZE:
+                added += self._add_chunk(chunk, day)
+                chunk = []
+        if chunk:
+            added += self._add_chunk(chunk, day)
+        return added
+
+    def _add_chunk(self, videos: List[Dict[str, Any]], day: int) -> int:
+        fresh, hash_lists, seen = [], [], set()
+        for video in videos:
+            video_id = video.get('id')
+            if not video_id or video_id in self._positions or video_id in seen:
+                continue
+            seen.add(video_id)
+            fresh.append(video_id)
+            hash_lists.append(term_hashes(video, self.description_tokens))
+        if not fresh:
+            return 0
+
+        hashed = [index for index, hashes in enumerate(hash_lists) if hashes]
+        signatures = np.zeros((len(fresh), self.num_perm), dtype=np.uint32)
+        signatures[hashed] = self._hasher.signatures([hash_lists[index] for index in hashed])
+        band_keys = self._band_keys(signatures).tolist()
+
+        with self._lock:
+            start = len(self.ids)
+            self._grow(start + len(fresh))
+            self._signatures[start:start + len(fresh)] = signatures
+            self._parent[start:start + len(fresh)] = np.arange(start, start + len(fresh))
+            self._days[start:start + len(fresh)] = day
+            self.ids.extend(fresh)
+            for offset, video_id in enumerate(fresh):
+                self._positions[video_id] = start + offset
+            self._link((start + index for index in hashed), (band_keys[index] for index in hashed))
+        return len(fresh)
+
+    def add_results(self, results: Dict[str, List[Dict[str, Any]]], collected_at: Optional[float] = None) -> int:
+        """Index fetch_most_popular_videos output; returns the number of newly indexed videos"""
+        return self.add_videos((video for videos in results.values() for video in videos), collected_at)
+
+    def cluster_id(self, video_id: str) -> Optional[str]:
+        """ID of the earliest indexed video in the same cluster, or None if the video is not indexed"""
+        position = self._positions.get(video_id)
+        if position is None:
+            return None
+        with self._lock:
+            return self.ids[self._find(position)]
+
+    def cluster_ids(self, video_ids: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Cluster ID per video (all indexed videos by default); unindexed IDs map to themselves"""
+        video_ids = self.ids if video_ids is None else video_ids
+        with self._lock:
+            return {
+                video_id: self.ids[self._find(self._positions[video_id])] if video_id in self._positions else video_id
+                for video_id in video_ids
+            }
+
+    def clusters(self, min_size: int = 2) -> Dict[str, List[str]]:
+        """Members of every cluster with at least min_size videos, keyed by cluster ID"""
+        members: Dict[str, List[str]] = {}
+        for video_id, cluster in self.cluster_ids().items():
+            members.setdefault(cluster, []).append(video_id)
+        return {cluster: ids for cluster, ids in members.items() if len(ids) >= min_size}
+
+    def save(self, path: str):
+        """Persist the index so the next run adds to it"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with self._lock, open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Optional[str], **kwargs) -> 'NearDuplicateIndex':
+        """Load a saved index, or start an empty one if there is none or its settings differ"""
+        if path and Path(path).exists():
+            try:
+                with open(path, 'rb') as f:
+                    index = pickle.load(f)
+                fresh = cls(**kwargs)
+                # Indexes saved before retention was added have no per-video days
+                if (index.num_perm, index.bands, index.description_tokens) == \
+                        (fresh.num_perm, fresh.bands, fresh.description_tokens) and '_days' in index.__dict__:
+                    index.threshold = fresh.threshold
+                    index.retention_days = fresh.retention_days
+                    return index
+                logger.warning("Near-duplicate index at %s was built with other settings, starting empty", path)
+                return fresh
+            except Exception as e:
+                logger.error("Could not load near-duplicate index from %s, starting empty: %s", path, e)
+        return cls(**kwargs)
@@ -0,0 +1,232 @@
+import heapq
+import logging
+import pickle
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600
+WINDOWS = {'6h': 6, '24h': 24, '7d': 168}
+ALL_REGIONS = '*'
+POSTINGS_PER_TERM = 50
+
+# Whitespace and punctuation, including the danda and ellipsis common in Indic titles
+_SPLIT = re.compile(r"[\s!-/:-@\[-`{-~।॥‐-‧　-〿]+")
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have i in is it its me my of on or our so '
+    'that the this to was we with you your'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a title or description, hashtags without the #, stopwords dropped"""
+    return [token for token in _SPLIT.split(text.lower()) if token and token not in STOPWORDS]
+
+
+def ngrams(tokens: List[str], max_n: int = 2) -> Iterable[str]:
+    for n in range(1, max_n + 1):
+        for start in range(len(tokens) - n + 1):
+            yield ' '.join(tokens[start:start + n])
+
+
+def video_terms(video: Dict[str, Any], max_n: int = 2, description_tokens: int = 64) -> Set[str]:
+    """Distinct terms of a parsed video: title and description n-grams plus whole tags"""
+    terms = set(ngrams(tokenize(video.get('title') or ''), max_n))
+    terms.update(ngrams(tokenize(video.get('description') or '')[:description_tokens], max_n))
+    tags = video.get('tags') or ()
+    if not isinstance(tags, str):
+        terms.update(tag.lower().strip() for tag in tags if tag.strip())
+    return terms
+
+
+def _add(total: Dict[str, int], counts: Dict[str, int]):
+    get = total.get
+    for term, count in counts.items():
+        total[term] = get(term, 0) + count
+
+
+def _remove(total: Dict[str, int], counts: Dict[str, int]):
+    get = total.get
+    for term, count in counts.items():
+        remaining = get(term, 0) - count
+        if remaining > 0:
+            total[term] = remaining
+        else:
+            total.pop(term, None)
+
+
+class TrendIndex:
+    """Incremental term index over titles, tags and descriptions in hourly buckets
+
+    Every video is counted once per term (document frequency) in the bucket of
+    the hour it was collected. For each window the index keeps running totals
+    of the current window and of the window before it, updated as buckets age,
+    so top and rising queries never rescan raw records or buckets.
+    """
+
+    def __init__(self, max_n: int = 2, windows: Optional[Dict[str, int]] = None):
+        self.max_n = max_n
+        self.windows = dict(windows or WINDOWS)
+        self.retention_buckets = 2 * max(self.windows.values())
+        self.head: Optional[int] = None
+        self._buckets: Dict[str, Dict[int, Dict[str, int]]] = {}
+        self._current: Dict[str, Dict[str, Dict[str, int]]] = {name: {} for name in self.windows}
+        self._previous: Dict[str, Dict[str, Dict[str, int]]] = {name: {} for name in self.windows}
+        self._postings: Dict[str, Deque[str]] = {}
+        # Bucket of every (region, video ID) indexed, and of the first region's entry per video ID
+        self._indexed: Dict[Tuple[str, str], int] = {}
+        self._indexed_all: Dict[str, int] = {}
+        self._bucket_ids: Dict[int, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _window_totals(self, totals: Dict[str, Dict[str, Dict[str, int]]], window: str, region: str) -> Dict[str, int]:
+        return totals[window].setdefault(region, {})
+
+    def _advance(self, bucket: int):
+        """Move the head to bucket, shifting aged buckets between window totals"""
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        old_head = self.head
+        for region, buckets in self._buckets.items():
+            for window, hours in self.windows.items():
+                current = self._window_totals(self._current, window, region)
+                previous = self._window_totals(self._previous, window, region)
+                # Buckets in (old_head - hours, bucket - hours] leave the current window
+                for aged in self._bucket_range(buckets, old_head - hours, bucket - hours):
+                    _remove(current, buckets[aged])
+                    if aged > bucket - 2 * hours:
+                        _add(previous, buckets[aged])
+                # Buckets that were in the previous window and are now older than it
+                for aged in self._bucket_range(buckets, old_head - 2 * hours,
+                                               min(bucket - 2 * hours, old_head - hours)):
+                    _remove(previous, buckets[aged])
+            for aged in self._bucket_range(buckets, old_head - self.retention_buckets,
+                                           bucket - self.retention_buckets):
+                del buckets[aged]
+        for aged in self._bucket_range(self._bucket_ids, old_head - self.retention_buckets,
+                                       bucket - self.retention_buckets):
+            for key in self._bucket_ids.pop(aged):
+                self._indexed.pop(key, None)
+                if self._indexed_all.get(key[1]) == aged:
+                    del self._indexed_all[key[1]]
+        self.head = bucket
+
+    @staticmethod
+    def _bucket_range(buckets: Dict[int, Any], after: int, up_to: int) -> List[int]:
+        """Existing bucket keys in (after, up_to]"""
+        if up_to - after <= len(buckets):
+            return [aged for aged in range(after + 1, up_to + 1) if aged in buckets]
+        return [aged for aged in buckets if after < aged <= up_to]
+
+    def add_video(self, video: Dict[str, Any], region: str, collected_at: Optional[float] = None) -> bool:
+        """Index one parsed video; returns False if it was already indexed for region in the retention span
+
+        A video trending in several regions counts once in each of them, and
+        once in the all-regions totals.
+        """
+        video_id = video.get('id')
+        bucket = int((time.time() if collected_at is None else collected_at) // BUCKET_SECONDS)
+        with self._lock:
+            if (region, video_id) in self._indexed:
+                return False
+            self._advance(bucket)
+            if bucket <= self.head - self.retention_buckets:
+                return False
+            self._indexed[(region, video_id)] = bucket
+            self._bucket_ids.setdefault(bucket, []).append((region, video_id))
+            target_regions = [region]
+            if video_id not in self._indexed_all:
+                self._indexed_all[video_id] = bucket
+                target_regions.append(ALL_REGIONS)
+
+            counts = dict.fromkeys(video_terms(video, self.max_n), 1)
+            if ALL_REGIONS in target_regions:
+                for term in counts:
+                    self._postings.setdefault(term, deque(maxlen=POSTINGS_PER_TERM)).append(video_id)
+            for target_region in target_regions:
+                _add(self._buckets.setdefault(target_region, {}).setdefault(bucket, {}), counts)
+                for window, hours in self.windows.items():
+                    age = self.head - bucket
+                    if age < hours:
+                        _add(self._window_totals(self._current, window, target_region), counts)
+                    elif age < 2 * hours:
+                        _add(self._window_totals(self._previous, window, target_region), counts)
+            return True
+
+    def add_results(self, results: Dict[str, List[Dict[str, Any]]],
+                    collected_at: Optional[float] = None) -> int:
+        """Index fetch_most_popular_videos output; returns the number of newly indexed videos"""
+        return sum(
+            self.add_video(video, region, collected_at)
+            for region, videos in results.items() for video in videos
+        )
+
+    def advance(self, now: Optional[float] = None):
+        """Age the windows up to now without adding videos"""
+        with self._lock:
+            self._advance(int((time.time() if now is None else now) // BUCKET_SECONDS))
+
+    def count(self, term: str, region: str = ALL_REGIONS, window: str = '24h') -> int:
+        return self._current[window].get(region, {}).get(term, 0)
+
+    def top_terms(self, region: str = ALL_REGIONS, window: str = '24h', n: int = 20) -> List[Tuple[str, int]]:
+        """Most frequent terms in the window"""
+        with self._lock:
+            return heapq.nlargest(n, self._current[window].get(region, {}).items(),
+                                  key=lambda entry: entry[1])
+
+    def rising_terms(self, region: str = ALL_REGIONS, window: str = '24h', n: int = 20,
+                     min_count: int = 3) -> List[Tuple[str, float, int, int]]:
+        """Terms growing fastest against the previous window of the same length
+
+        Returns (term, growth, current count, previous count) tuples, where
+        growth is (current + 1) / (previous + 1).
+        """
+        with self._lock:
+            current = self._current[window].get(region, {})
+            previous = self._previous[window].get(region, {})
+            candidates = (
+                (term, (count + 1) / (previous.get(term, 0) + 1), count, previous.get(term, 0))
+                for term, count in current.items() if count >= min_count
+            )
+            return heapq.nlargest(n, candidates, key=lambda entry: (entry[1], entry[2]))
+
+    def videos_for(self, term: str) -> List[str]:
+        """Most recently indexed video IDs containing the term"""
+        return list(self._postings.get(term, ()))
+
+    def save(self, path: str):
+        """Persist the index so the next run resumes from it"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with self._lock, open(tmp_path, 'wb') as f:
+            state = {key: value for key, value in self.__dict__.items() if key != '_lock'}
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Optional[str], **kwargs) -> 'TrendIndex':
+        """Load a saved index, or start an empty one if there is none"""
+        index = cls(**kwargs)
+        if path and Path(path).exists():
+            try:
+                with open(path, 'rb') as f:
+                    state = pickle.load(f)
+                if '_indexed_all' in state:
+                    index.__dict__.update(state)
+                else:
+                    # Saved before videos were deduplicated per region; its region counts undercount
+                    logger.warning("Trend index at %s uses an older layout, starting empty", path)
+            except Exception as e:
+                logger.error("Could not load trend index from %s, starting empty: %s", path, e)
+                index = cls(**kwargs)
+        return index
@@ -0,0 +1,163 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from src.collectors.records import MISSING_COUNT, VideoBatch
+from src.telemetry.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Videos younger than this are scored as if they were this old, so a video
+# published minutes ago does not get an unbounded views/hour
+MIN_AGE_HOURS = 1.0
+
+DEFAULT_WEIGHTS = {
+    'velocity': 0.6,
+    'like_ratio': 0.25,
+    'comment_ratio': 0.15,
+}
+
+
+@dataclass
+class ViralityScores:
+    """Per-row features and the combined score, aligned with the scored batch"""
+
+    velocity: np.ndarray
+    like_ratio: np.ndarray
+    comment_ratio: np.ndarray
+    age_hours: np.ndarray
+    score: np.ndarray
+
+
+def group_zscores(values: np.ndarray, groups: np.ndarray, num_groups: Optional[int] = None) -> np.ndarray:
+    """Z-score each value against the mean and standard deviation of its group
+
+    Groups with a single member or no spread score 0.
+    """
+    num_groups = num_groups or (int(groups.max()) + 1 if len(groups) else 0)
+    counts = np.bincount(groups, minlength=num_groups)
+    sums = np.bincount(groups, weights=values, minlength=num_groups)
+    squares = np.bincount(groups, weights=values * values, minlength=num_groups)
+    safe_counts = np.maximum(counts, 1)
+    means = sums / safe_counts
+    variances = np.maximum(squares / safe_counts - means * means, 0.0)
+    stds = np.sqrt(variances)
+    stds[stds == 0] = np.inf
+    return (values - means[groups]) / stds[groups]
+
+
+def score_arrays(view_count: np.ndarray, like_count: np.ndarray, comment_count: np.ndarray,
+                 published_at: np.ndarray, region_codes: np.ndarray, now: Optional[float] = None,
+                 weights: Optional[Dict[str, float]] = None) -> ViralityScores:
+    """Score raw columns; counts use MISSING_COUNT for hidden values"""
+    now = time.time() if now is None else now
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+
+    views = np.maximum(view_count, 0).astype(np.float64)
+    likes = np.where(like_count == MISSING_COUNT, 0, like_count).astype(np.float64)
+    comments = np.where(comment_count == MISSING_COUNT, 0, comment_count).astype(np.float64)
+    age_hours = np.maximum((now - published_at) / 3600.0, MIN_AGE_HOURS)
+    safe_views = np.maximum(views, 1.0)
+
+    velocity = views / age_hours
+    like_ratio = likes / safe_views
+    comment_ratio = comments / safe_views
+
+    # Velocity is heavy-tailed, so it is compared on a log scale
+    score = (weights['velocity'] * group_zscores(np.log1p(velocity), region_codes)
+             + weights['like_ratio'] * group_zscores(like_ratio, region_codes)
+             + weights['comment_ratio'] * group_zscores(comment_ratio, region_codes))
+    return ViralityScores(velocity, like_ratio, comment_ratio, age_hours, score)
+
+
+def score_batch(batch: VideoBatch, now: Optional[float] = None,
+                weights: Optional[Dict[str, float]] = None) -> ViralityScores:
+    """Score every row of a VideoBatch, normalizing within each region"""
+    return score_arrays(batch['view_count'], batch['like_count'], batch['comment_count'],
+                        batch['published_at'], batch['region'].codes, now, weights)
+
+
+def top_k(values: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the k largest values in descending order, via argpartition
+
+    Only the k selected values are sorted, so this is O(n + k log k).
+    """
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+    if k <= 0 or not len(candidates):
+        return np.empty(0, dtype=np.int64)
+    if k < len(candidates):
+        partition = np.argpartition(values[candidates], -k)[-k:]
+        candidates = candidates[partition]
+    return candidates[np.argsort(values[candidates])[::-1]]
+
+
+def viral_mask(batch: VideoBatch, scores: ViralityScores, min_views: Optional[int] = None,
+               max_age_hours: Optional[float] = None) -> np.ndarray:
+    """Rows meeting the view threshold within the age window (youtube.* config by default)"""
+    config = Config.get_instance()
+    if min_views is None:
+        min_views = config.get_config_value('youtube.min_views_threshold', 0)
+    if max_age_hours is None:
+        max_age_hours = config.get_config_value('youtube.max_video_age_hours')
+    mask = batch['view_count'] >= min_views
+    if max_age_hours:
+        mask &= scores.age_hours <= max_age_hours
+    return mask
+
+
+@timed('rank_videos')
+def top_viral_videos(batch: VideoBatch, k: int = 10, now: Optional[float] = None,
+                     min_views: Optional[int] = None, max_age_hours: Optional[float] = None,
+                     weights: Optional[Dict[str, float]] = None,
+                     cluster_ids: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Rank a batch and return the k most viral distinct videos
+
+    A video trending in several regions appears once, under its best-scoring
+    region. With cluster_ids (video ID to near-duplicate cluster ID) only the
+    best-scoring video of each cluster is returned.
+    """
+    if not len(batch):
+        return []
+    scores = score_batch(batch, now, weights)
+    mask = viral_mask(batch, scores, min_views, max_age_hours)
+
+    group_codes = batch['id'].codes
+    if cluster_ids:
+        lookup: Dict[str, int] = {}
+        category_groups = np.fromiter(
+            (lookup.setdefault(cluster_ids.get(video_id, video_id), len(lookup))
+             for video_id in batch['id'].categories),
+            dtype=np.int64, count=len(batch['id'].categories))
+        group_codes = category_groups[group_codes]
+
+    # Over-select so rows of the same video (or cluster) can be dropped,
+    # widening until k distinct groups are found or every row is a candidate
+    available = int(np.count_nonzero(mask))
+    limit = k * 4
+    while True:
+        candidates = top_k(scores.score, limit, mask)
+        _, first = np.unique(group_codes[candidates], return_index=True)
+        if len(first) >= k or limit >= available:
+            break
+        limit *= 4
+    selected = candidates[np.sort(first)][:k]
+
+    return [
+        {
+            'id': batch['id'][index],
+            'clusterId': (cluster_ids or {}).get(batch['id'][index], batch['id'][index]),
+            'region': batch['region'][index],
+            'title': batch['title'][index],
+            'channelTitle': batch['channel_title'][index],
+            'viewCount': int(batch['view_count'][index]),
+            'viewsPerHour': float(scores.velocity[index]),
+            'likeRatio': float(scores.like_ratio[index]),
+            'commentRatio': float(scores.comment_ratio[index]),
+            'viralityScore': float(scores.score[index]),
+        }
+        for index in selected
+    ]
@@ -0,0 +1,288 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config import Config
+from src.collectors.streaming import region_key
+from src.collectors.video_parser import (MAX_SHORT_SECONDS, MIN_SHORT_SECONDS, parse_duration_seconds,
+                                         parse_video_details)
+from src.collectors.youtube_api import (MAX_IDS_PER_CALL, fetch_videos_by_id, get_api_base_url, get_session,
+                                        load_api_key, make_api_call, quota_units_charged)
+from src.telemetry.metrics import get_metrics
+from src.telemetry.structured_logging import LazyJson
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+FIRST_PASS_PARTS = 'id,contentDetails'
+DETAIL_PARTS = 'snippet,statistics'
+
+
+class YieldTracker:
+    """Per-region, per-page Shorts yield of the mostPopular chart across runs
+
+    The yield of each page position is an exponentially weighted average of
+    the share of its items that were Shorts. predicted_shorts() sums it over
+    the pages still ahead, so a region whose later pages have held no Shorts
+    in recent runs stops paging early. Pages past the recorded chart end
+    count as empty; pages no run has reached make the prediction unknown. Every explore_every-th run of a region
+    ignores the prediction, so a region whose chart changes is noticed.
+    """
+
+    def __init__(self, path: Optional[str] = None, alpha: float = 0.3, explore_every: int = 8):
+        self.path = path
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self._regions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and Path(path).exists():
+            try:
+                self._regions = json.loads(Path(path).read_text(encoding='utf-8'))['regions']
+            except Exception as e:
+                logger.error("Could not load Shorts yield history from %s, starting empty: %s", path, e)
+
+    def start_run(self, key: str) -> bool:
+        """Count a run of the region; True when this run should ignore the prediction"""
+        with self._lock:
+            region = self._regions.setdefault(key, {'runs': 0, 'pages': []})
+            region['runs'] += 1
+            return not region['pages'] or bool(self.explore_every and region['runs'] % self.explore_every == 0)
+
+    def record(self, key: str, page: int, items: int, shorts: int):
+        """Fold one fetched page into the history"""
+        if not items:
+            return
+        share = shorts / items
+        with self._lock:
+            region = self._regions.setdefault(key, {'runs': 0, 'pages': []})
+            if region.get('ended_at') is not None and page >= region['ended_at']:
+                # The chart has grown past where it last ended
+                region['ended_at'] = None
+            pages = region['pages']
+            while len(pages) <= page:
+                pages.append(None)
+            pages[page] = share if pages[page] is None else pages[page] + self.alpha * (share - pages[page])
+
+    def record_end(self, key: str, pages_seen: int):
+        """The chart ended after pages_seen pages; forget positions beyond it"""
+        with self._lock:
+            region = self._regions.get(key)
+            if region:
+                del region['pages'][pages_seen:]
+                region['ended_at'] = pages_seen
+
+    def predicted_shorts(self, key: str, from_page: int, max_pages: int) -> Optional[float]:
+        """Expected Shorts on pages from_page..max_pages-1, or None if some of them were never seen
+
+        Positions past a recorded chart end were not there last time and count
+        as empty; positions past the pages fetched so far without one are unknown.
+        """
+        with self._lock:
+            region = self._regions.get(key) or {}
+            pages = region.get('pages') or []
+            ended_at = region.get('ended_at')
+            if max_pages > len(pages) and (ended_at is None or ended_at > len(pages)):
+                return None
+            ahead = pages[from_page:max_pages]
+            if any(share is None for share in ahead):
+                return None
+            return sum(ahead) * PAGE_SIZE
+
+    def yields(self) -> Dict[str, List[Optional[float]]]:
+        with self._lock:
+            return {key: list(region['pages']) for key, region in self._regions.items()}
+
+    def save(self):
+        """Write the history; a read-only filesystem only costs the next run its predictions"""
+        if not self.path:
+            return
+        path = Path(self.path)
+        with self._lock:
+            payload = json.dumps({'regions': self._regions}, separators=(',', ':'))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            tmp_path.write_text(payload, encoding='utf-8')
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("Could not save Shorts yield history to %s: %s", path, e)
+
+
+class AdaptiveCollector:
+    """Collect Shorts with a contentDetails-only chart pass and batched detail lookups
+
+    Chart pages are fetched with part=id,contentDetails, enough to filter on
+    duration. Paging stops at target_per_region Shorts, at max_items, when the
+    yield history predicts fewer than min_expected_shorts Shorts on the pages
+    left, or after max_empty_pages pages in a row without a Short. The
+    surviving IDs of all regions are then looked up with part=snippet,statistics,
+    50 per call and once per ID, and merged with the contentDetails already
+    fetched. last_report holds the quota units actually charged (cache hits
+    are free, failover retries are not) and the quota per Short.
+    """
+
+    def __init__(self, tracker: Optional[YieldTracker] = None, min_expected_shorts: float = 1.0,
+                 max_empty_pages: int = 2, max_items: int = 500):
+        self.tracker = tracker or YieldTracker()
+        self.min_expected_shorts = min_expected_shorts
+        self.max_empty_pages = max_empty_pages
+        self.max_items = max_items
+        self.last_report: Dict[str, Any] = {}
+
+    def list_region(self, region_config: Dict[str, str], target_per_region: int, api_key: Optional[str],
+                    session: requests.Session, base_url: Optional[str]) -> Dict[str, Any]:
+        """First pass over one region's chart: Short IDs with their contentDetails, and calls made"""
+        key = region_key(region_config)
+        url = f"{base_url or get_api_base_url()}/videos"
+        explore = self.tracker.start_run(key)
+        max_pages = -(-self.max_items // PAGE_SIZE)
+        shorts: Dict[str, Dict[str, Any]] = {}
+        page = calls = empty_pages = 0
+        page_token = None
+        stopped = 'target'
+
+        while len(shorts) < target_per_region:
+            if page >= max_pages:
+                stopped = 'max_items'
+                break
+            if page and not explore:
+                predicted = self.tracker.predicted_shorts(key, page, max_pages)
+                if predicted is not None and predicted < self.min_expected_shorts:
+                    stopped = 'predicted_empty'
+                    break
+                if empty_pages >= self.max_empty_pages:
+                    stopped = 'empty_pages'
+                    break
+            params = {
+                'part': FIRST_PASS_PARTS,
+                'chart': 'mostPopular',
+                'regionCode': region_config.get('region'),
+                'relevanceLanguage': region_config.get('language'),
+                'maxResults': PAGE_SIZE,
+                'pageToken': page_token,
+                'key': api_key
+            }
+            calls += 1
+            api_response = make_api_call(url, params, "GET", session=session)
+            if not api_response["success"]:
+                stopped = 'error'
+                break
+            response_data = api_response["data"]
+            items = response_data.get("items") or []
+            page_shorts = 0
+            for item in items:
+                content_details = item.get("contentDetails") or {}
+                duration = parse_duration_seconds(content_details.get("duration", ""))
+                if duration is not None and MIN_SHORT_SECONDS < duration < MAX_SHORT_SECONDS \
+                        and item.get("id") not in shorts:
+                    page_shorts += 1
+                    if len(shorts) < target_per_region:
+                        shorts[item["id"]] = dict(content_details, durationInSeconds=duration)
+            self.tracker.record(key, page, len(items), page_shorts)
+            empty_pages = 0 if page_shorts else empty_pages + 1
+            page += 1
+            page_token = response_data.get("nextPageToken")
+            if not page_token:
+                self.tracker.record_end(key, page)
+                stopped = 'chart_end'
+                break
+
+        return {'key': key, 'shorts': shorts, 'pages': page, 'calls': calls, 'stopped': stopped}
+
+    def collect(self, region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                max_workers: Optional[int] = None, api_key: Optional[str] = None,
+                session: Optional[requests.Session] = None,
+                base_url: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Collect every region; same {"REGION_lang": [records]} shape as fetch_most_popular_videos"""
+        start = time.perf_counter()
+        units_before = quota_units_charged()
+        config = Config.get_instance()
+        api_key = api_key or load_api_key()
+        session = session or get_session()
+        max_workers = max_workers or config.get_config_value('collector.max_workers', 8)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(region_configs) or 1)),
+                                thread_name_prefix='collector') as executor:
+            listings = list(executor.map(
+                lambda region_config: self.list_region(region_config, target_per_region, api_key,
+                                                       session, base_url),
+                region_configs
+            ))
+
+            content_details: Dict[str, Dict[str, Any]] = {}
+            for listing in listings:
+                for video_id, details in listing['shorts'].items():
+                    content_details.setdefault(video_id, details)
+            video_ids = list(content_details)
+            batches = [video_ids[i:i + MAX_IDS_PER_CALL] for i in range(0, len(video_ids), MAX_IDS_PER_CALL)]
+            items = [item for batch_items in executor.map(
+                lambda batch: fetch_videos_by_id(batch, DETAIL_PARTS, api_key, session, base_url), batches)
+                for item in batch_items]
+        self.tracker.save()
+
+        records = {}
+        for item in items:
+            details = dict(content_details.get(item.get("id")) or {})
+            duration = details.pop('durationInSeconds', None)
+            records[item["id"]] = parse_video_details(dict(item, contentDetails=details), duration)
+
+        final_results = {}
+        for listing in listings:
+            collected_videos = [records[video_id] for video_id in listing['shorts'] if video_id in records]
+            if collected_videos:
+                final_results[listing['key']] = collected_videos
+
+        first_pass_calls = sum(listing['calls'] for listing in listings)
+        # Charged by this process meanwhile, so concurrent collections in it are counted too
+        quota_units = quota_units_charged() - units_before
+        shorts = sum(len(videos) for videos in final_results.values())
+        stopped: Dict[str, int] = {}
+        for listing in listings:
+            stopped[listing['stopped']] = stopped.get(listing['stopped'], 0) + 1
+        self.last_report = {
+            'regions': len(region_configs),
+            'pages': first_pass_calls,
+            'lookup_calls': len(batches),
+            'quota_units': quota_units,
+            'shorts': shorts,
+            'unique_shorts': len(records),
+            'quota_per_short': round(quota_units / shorts, 3) if shorts else None,
+            'stopped': stopped,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        metrics = get_metrics()
+        metrics.incr('collect_quota_units', quota_units, mode='adaptive')
+        metrics.incr('shorts_collected', shorts, mode='adaptive')
+        logger.info("Adaptive collection: %s", LazyJson(self.last_report))
+        return final_results
+
+
+def build_adaptive_collector(config: Optional[Config] = None) -> AdaptiveCollector:
+    """Collector from the collector.adaptive_* settings"""
+    config = config or Config.get_instance()
+    tracker = YieldTracker(
+        config.get_config_value('collector.yield_history_path'),
+        alpha=config.get_config_value('collector.yield_alpha', 0.3),
+        explore_every=config.get_config_value('collector.yield_explore_every', 8),
+    )
+    return AdaptiveCollector(
+        tracker,
+        min_expected_shorts=config.get_config_value('collector.min_expected_shorts', 1.0),
+        max_empty_pages=config.get_config_value('collector.max_empty_pages', 2),
+        max_items=config.get_config_value('collector.max_items_per_region', 500),
+    )
+
+
+def collect_adaptive(region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                     max_workers: Optional[int] = None, api_key: Optional[str] = None,
+                     session: Optional[requests.Session] = None,
+                     base_url: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Adaptive collection with the configured yield history; see AdaptiveCollector"""
+    return build_adaptive_collector().collect(region_configs, target_per_region, max_workers=max_workers,
+                                              api_key=api_key, session=session, base_url=base_url)
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from src.collectors.quota import (DEFAULT_DAILY_QUOTA, QuotaBackend, QuotaExhaustedError, QuotaScheduler,
+                                  build_quota_backend, quota_day, seconds_until_reset)
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Error reasons after which a key is taken out of rotation for the rest of the quota day
+EXHAUSTED_REASONS = frozenset({'quotaExceeded', 'dailyLimitExceeded'})
+INVALID_REASONS = frozenset({'keyInvalid', 'keyExpired', 'accessNotConfigured', 'ipRefererBlocked',
+                             'API_KEY_INVALID', 'API_KEY_SERVICE_BLOCKED'})
+FAILOVER_REASONS = EXHAUSTED_REASONS | INVALID_REASONS
+
+
+@dataclass
+class ApiCredential:
+    """One API key and the quota scheduler that accounts for it
+
+    Each key draws on the daily quota of its Cloud project, so every key gets
+    its own scheduler namespace in the shared quota backend.
+    """
+
+    name: str
+    key: str = field(repr=False)
+    scheduler: QuotaScheduler = field(repr=False)
+    estimated_remaining: int = 0
+    refreshed_at: float = 0.0
+    disabled_day: Optional[str] = None
+    disabled_reason: Optional[str] = None
+
+    @property
+    def daily_limit(self) -> int:
+        return self.scheduler.daily_limit
+
+
+class CredentialPool:
+    """Spread API calls over several keys by remaining quota, failing over on quota and auth errors
+
+    acquire() charges the key with the most quota left (from a local estimate
+    refreshed from the quota backend every refresh_seconds), so concurrent
+    workers fan out over the keys in proportion to their budgets. A key that
+    is out of quota in the backend or that YouTube answers with quotaExceeded
+    or an auth error is skipped until the next quota day; the remaining units
+    are charged to its namespace so other processes skip it as well.
+    """
+
+    def __init__(self, credentials: List[ApiCredential], refresh_seconds: float = 60.0):
+        if not credentials:
+            raise ValueError("A credential pool needs at least one API key")
+        self.credentials = credentials
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._failovers = 0
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def _refresh(self, credential: ApiCredential, now: float):
+        if now - credential.refreshed_at >= self.refresh_seconds:
+            credential.estimated_remaining = credential.scheduler.remaining()
+            credential.refreshed_at = now
+
+    def _available(self, day: str) -> List[ApiCredential]:
+        now = time.monotonic()
+        available = []
+        for credential in self.credentials:
+            if credential.disabled_day == day:
+                continue
+            credential.disabled_day = credential.disabled_reason = None
+            self._refresh(credential, now)
+            available.append(credential)
+        return available
+
+    def acquire(self, endpoint: str, units: Optional[int] = None, timeout: Optional[float] = None) -> ApiCredential:
+        """Charge a call to the key with the most remaining quota and return that key
+
+        Raises QuotaExhaustedError when no key can cover the call today.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            day = quota_day()
+            with self._lock:
+                candidates = sorted(self._available(day), key=lambda c: c.estimated_remaining, reverse=True)
+            waits = []
+            for credential in candidates:
+                cost = credential.scheduler.cost_of(endpoint) if units is None else units
+                try:
+                    wait = credential.scheduler.try_acquire(endpoint, cost)
+                except QuotaExhaustedError:
+                    with self._lock:
+                        credential.estimated_remaining = 0
+                        credential.disabled_day = day
+                        credential.disabled_reason = 'quota exhausted'
+                    continue
+                if wait:
+                    waits.append(wait)
+                    continue
+                with self._lock:
+                    credential.estimated_remaining -= cost
+                return credential
+
+            if not waits:
+                cost = self.credentials[0].scheduler.cost_of(endpoint) if units is None else units
+                raise QuotaExhaustedError(endpoint, cost, 0, seconds_until_reset())
+            wait = min(waits)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Timed out waiting for quota on {endpoint}")
+            time.sleep(wait)
+
+    def report_failure(self, credential: ApiCredential, reason: Optional[str]) -> bool:
+        """Take a key out of rotation for the day after a quota or auth error; True if it was
+
+        Other reasons (rate limits, backend errors) are left to the caller's
+        retry handling.
+        """
+        if reason not in FAILOVER_REASONS:
+            return False
+        day = quota_day()
+        with self._lock:
+            if credential.disabled_day == day:
+                return True
+            credential.disabled_day = day
+            credential.disabled_reason = reason
+            credential.estimated_remaining = 0
+            self._failovers += 1
+        get_metrics().incr('credential_failovers', reason=reason)
+        if reason in INVALID_REASONS:
+            logger.error("API key '%s' rejected (%s), skipping it until the next quota day", credential.name, reason)
+        else:
+            logger.warning("API key '%s' is out of quota (%s), failing over", credential.name, reason)
+        remaining = credential.scheduler.remaining()
+        if remaining:
+            try:
+                credential.scheduler.backend.consume(credential.scheduler.namespace, day, reason, remaining,
+                                                     credential.daily_limit)
+            except Exception as e:
+                logger.warning("Could not record exhaustion of API key '%s': %s", credential.name, e)
+        return True
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-key usage for logging and the pipeline status; keys themselves are never included"""
+        day = quota_day()
+        return [
+            dict(credential.scheduler.metrics(), name=credential.name,
+                 disabled=credential.disabled_day == day, disabled_reason=credential.disabled_reason)
+            for credential in self.credentials
+        ]
+
+    @property
+    def failovers(self) -> int:
+        return self._failovers
+
+
+def build_credential_pool(config: Optional[Config] = None,
+                          backend: Optional[QuotaBackend] = None) -> Optional[CredentialPool]:
+    """Pool from youtube.api_keys, or None when only the single youtube.apiKey is configured
+
+    Every entry needs a key; name (used as the quota namespace suffix),
+    daily_limit, rate_per_second and burst are optional and default to the
+    quota section.
+    """
+    config = config or Config.get_instance()
+    entries = config.get_config_value('youtube.api_keys') or []
+    if not entries:
+        return None
+    backend = backend or build_quota_backend(config)
+    namespace = config.get_config_value('quota.namespace', 'default')
+    credentials = []
+    for position, entry in enumerate(entries):
+        entry = entry.to_dict() if hasattr(entry, 'to_dict') else dict(entry)
+        if not entry.get('key'):
+            logger.warning("youtube.api_keys[%s] has no key, skipping it", position)
+            continue
+        name = str(entry.get('name') or f'key{position}')
+        scheduler = QuotaScheduler(
+            daily_limit=entry.get('daily_limit') or config.get_config_value('quota.daily_limit', DEFAULT_DAILY_QUOTA),
+            backend=backend,
+            rate_per_second=entry.get('rate_per_second') or config.get_config_value('quota.rate_per_second'),
+            burst=entry.get('burst') or config.get_config_value('quota.burst'),
+            namespace=f'{namespace}:{name}',
+        )
+        credentials.append(ApiCredential(name, entry['key'], scheduler))
+    if not credentials:
+        return None
+    return CredentialPool(credentials, config.get_config_value('quota.credential_refresh_seconds', 60))
+
+
+_pool: Optional[CredentialPool] = None
+_pool_initialized = False
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> Optional[CredentialPool]:
+    """Get the shared credential pool, or None when youtube.api_keys is not configured"""
+    global _pool, _pool_initialized
+    if not _pool_initialized:
+        with _pool_lock:
+            if not _pool_initialized:
+                _pool = build_credential_pool()
+                _pool_initialized = True
+                if _pool is not None:
+                    logger.info("Credential pool with %s API keys", len(_pool))
+    return _pool
@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over string keys, persisted as a small binary file"""
+
+    _HEADER_SIZE = 16
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001,
+                 num_bits: Optional[int] = None, num_hashes: Optional[int] = None):
+        if num_bits is None:
+            num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        if num_hashes is None:
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self._bits = bytearray((num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def to_bytes(self) -> bytes:
+        return self.num_bits.to_bytes(8, 'little') + self.num_hashes.to_bytes(8, 'little') + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        """Filter from to_bytes() output; trailing data is ignored"""
+        bloom = cls(num_bits=int.from_bytes(data[:8], 'little'), num_hashes=int.from_bytes(data[8:16], 'little'))
+        bloom._bits = bytearray(data[cls._HEADER_SIZE:cls._HEADER_SIZE + len(bloom._bits)])
+        return bloom
+
+    def save(self, path: str):
+        _write_atomic(Path(path), self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str, capacity: int = 1_000_000, error_rate: float = 0.001) -> 'BloomFilter':
+        """Load a saved filter, or start an empty one if the file does not exist"""
+        path = Path(path)
+        if not path.exists():
+            return cls(capacity, error_rate)
+        return cls.from_bytes(path.read_bytes())
+
+
+class RotatingBloomFilter:
+    """Two bloom filter generations, so old keys age out and the false-positive rate stays bounded
+
+    Keys go into the current generation; once it holds capacity keys it
+    becomes the previous one and the generation before it is dropped.
+    Membership checks both, so a key is remembered for one to two
+    generations and the false-positive rate stays below about twice
+    error_rate, however many runs have added keys.
+    """
+
+    _MAGIC = b'BLOOMGN2'
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: Optional[BloomFilter] = None
+        self.count = 0
+
+    def rotate(self):
+        self.previous = self.current
+        self.current = BloomFilter(self.capacity, self.error_rate)
+        self.count = 0
+
+    def add(self, key: str):
+        if key in self.current:
+            return
+        if self.count >= self.capacity:
+            self.rotate()
+        self.current.add(key)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def save(self, path: str):
+        generations = [self.current] + ([self.previous] if self.previous is not None else [])
+        _write_atomic(Path(path), b''.join([
+            self._MAGIC, self.count.to_bytes(8, 'little'), len(generations).to_bytes(8, 'little'),
+            *(generation.to_bytes() for generation in generations),
+        ]))
+
+    @classmethod
+    def load(cls, path: str, capacity: int = 1_000_000, error_rate: float = 0.001) -> 'RotatingBloomFilter':
+        """Load saved generations, or start empty if the file does not exist
+
+        A single BloomFilter file from before rotation becomes a full current
+        generation, so it moves to previous on the first new key.
+        """
+        bloom = cls(capacity, error_rate)
+        path = Path(path)
+        if not path.exists():
+            return bloom
+        data = path.read_bytes()
+        if not data.startswith(cls._MAGIC):
+            bloom.current, bloom.count = BloomFilter.from_bytes(data), capacity
+            return bloom
+        offset = len(cls._MAGIC)
+        bloom.count = int.from_bytes(data[offset:offset + 8], 'little')
+        generations = []
+        offset += 16
+        for _ in range(int.from_bytes(data[offset - 8:offset], 'little')):
+            generation = BloomFilter.from_bytes(data[offset:])
+            generations.append(generation)
+            offset += BloomFilter._HEADER_SIZE + len(generation._bits)
+        bloom.current = generations[0]
+        bloom.previous = generations[1] if len(generations) > 1 else None
+        return bloom
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+class SeenIndex:
+    """Run-wide index of video IDs shared by every region
+
+    Each ID is parsed once per run; later sightings in other regions reuse the
+    parsed record and only add the region to its membership set. An optional
+    rotating bloom filter remembers the Shorts of previous runs: records it holds
+    are flagged with seenBefore, or left out entirely with skip_seen, so the
+    region's target is filled with videos no earlier run collected.
+    """
+
+    def __init__(self, history: Optional[RotatingBloomFilter] = None, history_path: Optional[str] = None,
+                 skip_seen: bool = False):
+        self.history = history
+        self.history_path = history_path
+        self.skip_seen = skip_seen
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._regions: Dict[str, Set[str]] = {}
+        self._repeats: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def with_history(cls, history_path: Optional[str], skip_seen: bool = False,
+                     capacity: int = 1_000_000) -> 'SeenIndex':
+        """Build an index backed by the bloom filter generations stored at history_path, if any"""
+        if not history_path:
+            return cls()
+        return cls(RotatingBloomFilter.load(history_path, capacity), history_path, skip_seen)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._records
+
+    def get_or_parse(self, item: Dict[str, Any], region: str,
+                     parser: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the parsed record for an item, parsing it only the first time its ID is seen
+
+        Returns None for videos a previous run saw when skip_seen is set.
+        """
+        video_id = item.get("id")
+        record = self._records.get(video_id)
+        if record is None:
+            record = parser(item)
+            if record and self.history is not None:
+                record['seenBefore'] = self.seen_in_previous_runs(video_id)
+            with self._lock:
+                record = self._records.setdefault(video_id, record)
+                self._regions.setdefault(video_id, set()).add(region)
+                if record and record.get('seenBefore'):
+                    self._repeats.add(video_id)
+        else:
+            with self._lock:
+                self._regions[video_id].add(region)
+        if self.skip_seen and record and record.get('seenBefore'):
+            return None
+        return record
+
+    def seen_in_previous_runs(self, video_id: str) -> bool:
+        """Whether a previous run saw this ID (bloom filter, so false positives are possible)"""
+        return self.history is not None and video_id in self.history
+
+    def repeat_count(self) -> int:
+        """Parsed videos of this run that a previous run had already seen"""
+        with self._lock:
+            return len(self._repeats)
+
+    def regions_for(self, video_id: str) -> Set[str]:
+        return set(self._regions.get(video_id, ()))
+
+    def cross_region_videos(self) -> Dict[str, List[str]]:
+        """Parsed Shorts that appeared in more than one region, mapped to those regions"""
+        with self._lock:
+            return {
+                video_id: sorted(regions)
+                for video_id, regions in self._regions.items()
+                if len(regions) > 1 and self._records.get(video_id)
+            }
+
+    def save_history(self):
+        """Fold this run's Shorts into the bloom filter and persist it"""
+        if self.history is None or not self.history_path:
+            return
+        with self._lock:
+            shorts = [video_id for video_id, record in self._records.items() if record]
+            for video_id in shorts:
+                self.history.add(video_id)
+        try:
+            self.history.save(self.history_path)
+        except OSError as e:
+            logger.warning("Could not save seen-history to %s: %s", self.history_path, e)
+            return
+        logger.info("Saved %s Shorts to seen-history %s", len(shorts), self.history_path)
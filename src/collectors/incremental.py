@@ -0,0 +1,264 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import requests
+
+from config import Config
+from src.collectors.streaming import region_key
+from src.collectors.video_parser import is_short_duration, parse_video_item
+from src.collectors.youtube_api import (fetch_videos_by_id, get_api_base_url, get_session,
+                                        load_api_key, make_api_call)
+
+logger = logging.getLogger(__name__)
+
+FULL_PARTS = 'snippet,statistics,contentDetails'
+STATISTICS_FIELDS = ('viewCount', 'likeCount', 'favoriteCount', 'commentCount')
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class KnownVideoStore:
+    """SQLite store of parsed Shorts, rejected IDs and statistics snapshots"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS videos ('
+                ' id TEXT PRIMARY KEY, metadata TEXT NOT NULL,'
+                ' first_seen_at REAL NOT NULL, last_seen_at REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS rejected ('
+                ' id TEXT PRIMARY KEY, seen_at REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                ' id TEXT NOT NULL, captured_at REAL NOT NULL, view_count INTEGER,'
+                ' like_count INTEGER, comment_count INTEGER, PRIMARY KEY (id, captured_at));'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _chunks(ids: List[str], size: int = 500) -> Iterable[List[str]]:
+        for start in range(0, len(ids), size):
+            yield ids[start:start + size]
+
+    def classify(self, video_ids: Iterable[str]) -> Dict[str, Set[str]]:
+        """Split IDs into known Shorts, known non-Shorts and new IDs"""
+        video_ids = list(dict.fromkeys(video_ids))
+        known, rejected = set(), set()
+        with self._connect() as conn:
+            for chunk in self._chunks(video_ids):
+                marks = ','.join('?' * len(chunk))
+                known.update(row[0] for row in conn.execute(
+                    f'SELECT id FROM videos WHERE id IN ({marks})', chunk))
+                rejected.update(row[0] for row in conn.execute(
+                    f'SELECT id FROM rejected WHERE id IN ({marks})', chunk))
+        return {
+            'known': known,
+            'rejected': rejected,
+            'new': set(video_ids) - known - rejected,
+        }
+
+    def get_metadata(self, video_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        video_ids = list(video_ids)
+        metadata = {}
+        with self._connect() as conn:
+            for chunk in self._chunks(video_ids):
+                marks = ','.join('?' * len(chunk))
+                for video_id, raw in conn.execute(
+                        f'SELECT id, metadata FROM videos WHERE id IN ({marks})', chunk):
+                    metadata[video_id] = json.loads(raw)
+        return metadata
+
+    def save_videos(self, records: Iterable[Dict[str, Any]], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        rows = [(record['id'], json.dumps(record), now, now) for record in records]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO videos (id, metadata, first_seen_at, last_seen_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET metadata = excluded.metadata, last_seen_at = excluded.last_seen_at',
+                rows
+            )
+
+    def save_rejected(self, video_ids: Iterable[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock, self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO rejected (id, seen_at) VALUES (?, ?)',
+                             [(video_id, now) for video_id in video_ids])
+
+    def add_snapshots(self, statistics: Dict[str, Dict[str, Any]], now: Optional[float] = None):
+        """Record one statistics snapshot per video"""
+        now = time.time() if now is None else now
+        rows = [
+            (video_id, now, _to_int(stats.get('viewCount')), _to_int(stats.get('likeCount')),
+             _to_int(stats.get('commentCount')))
+            for video_id, stats in statistics.items()
+        ]
+        with self._lock, self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)', rows)
+
+    def velocities(self, video_ids: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Views per hour between the two most recent snapshots of each video"""
+        video_ids = list(video_ids)
+        velocities = {}
+        with self._connect() as conn:
+            for chunk in self._chunks(video_ids):
+                marks = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    'SELECT id, captured_at, view_count FROM ('
+                    ' SELECT id, captured_at, view_count, ROW_NUMBER() OVER'
+                    ' (PARTITION BY id ORDER BY captured_at DESC) AS position'
+                    f' FROM snapshots WHERE id IN ({marks})'
+                    ') WHERE position <= 2 ORDER BY id, captured_at',
+                    chunk
+                ).fetchall()
+                previous = None
+                for video_id, captured_at, view_count in rows:
+                    if previous and previous[0] == video_id:
+                        hours = (captured_at - previous[1]) / 3600
+                        if hours > 0 and view_count is not None and previous[2] is not None:
+                            velocities[video_id] = (view_count - previous[2]) / hours
+                    previous = (video_id, captured_at, view_count)
+        return {video_id: velocities.get(video_id) for video_id in video_ids}
+
+
+def list_chart_ids(region_config: Dict[str, str], target_per_region: int, store: KnownVideoStore,
+                   api_key: Optional[str] = None, session: Optional[requests.Session] = None,
+                   base_url: Optional[str] = None, max_items: Optional[int] = None) -> Dict[str, Any]:
+    """Page through the mostPopular chart fetching only IDs and durations
+
+    contentDetails is a small part, and the duration in it is enough to tell
+    whether a new ID is a Short without fetching its snippet. Paging stops once
+    target_per_region Shorts (known or new) have been listed.
+    """
+    max_items = max_items or Config.get_instance().get_config_value('collector.max_items_per_region', 500)
+    url = f"{base_url or get_api_base_url()}/videos"
+    chart_ids, new_shorts, new_rejected = [], [], []
+    shorts = 0
+    page_token = None
+
+    while shorts < target_per_region and len(chart_ids) < max_items:
+        params = {
+            'part': 'id,contentDetails',
+            'chart': 'mostPopular',
+            'regionCode': region_config.get('region'),
+            'relevanceLanguage': region_config.get('language'),
+            'maxResults': 50,
+            'pageToken': page_token,
+            'key': api_key
+        }
+        api_response = make_api_call(url, params, "GET", session=session)
+        if not api_response["success"]:
+            break
+        response_data = api_response["data"]
+        items = response_data.get("items") or []
+        page_classes = store.classify(item.get("id") for item in items)
+        for item in items:
+            video_id = item.get("id")
+            chart_ids.append(video_id)
+            if video_id in page_classes['known']:
+                shorts += 1
+            elif video_id in page_classes['new']:
+                if is_short_duration(item.get("contentDetails", {}).get("duration", "")):
+                    new_shorts.append(video_id)
+                    shorts += 1
+                else:
+                    new_rejected.append(video_id)
+        page_token = response_data.get("nextPageToken")
+        if not page_token:
+            break
+
+    return {
+        'chart_ids': list(dict.fromkeys(chart_ids)),
+        'new_shorts': new_shorts,
+        'new_rejected': new_rejected,
+    }
+
+
+def collect_incremental(region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                        store: Optional[KnownVideoStore] = None, max_workers: Optional[int] = None,
+                        api_key: Optional[str] = None, session: Optional[requests.Session] = None,
+                        base_url: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Collect Shorts refetching only statistics for videos already in the store
+
+    The chart is listed with part=id,contentDetails; known Shorts get a
+    statistics-only lookup, new Shorts a full lookup, and non-Shorts (known or
+    new) are skipped. Lookups are batched 50 IDs per call across all regions, so
+    a Short trending in several regions is fetched once. Each returned record
+    carries viewsPerHour from the last two snapshots (None on first sight).
+    """
+    config = Config.get_instance()
+    store = store or KnownVideoStore(config.get_config_value('collector.known_videos_path',
+                                                             'temp/known_videos.sqlite3'))
+    api_key = api_key or load_api_key()
+    session = session or get_session()
+    max_workers = max_workers or config.get_config_value('collector.max_workers', 8)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(region_configs) or 1)),
+                            thread_name_prefix='collector') as executor:
+        listings = list(executor.map(
+            lambda region_config: list_chart_ids(region_config, target_per_region, store,
+                                                 api_key, session, base_url),
+            region_configs
+        ))
+
+        known_ids = sorted(store.classify(
+            video_id for listing in listings for video_id in listing['chart_ids'])['known'])
+        new_ids = sorted({video_id for listing in listings for video_id in listing['new_shorts']})
+        rejected = {video_id for listing in listings for video_id in listing['new_rejected']}
+
+        statistics_future = executor.submit(fetch_videos_by_id, known_ids, 'id,statistics',
+                                            api_key, session, base_url)
+        full_future = executor.submit(fetch_videos_by_id, new_ids, FULL_PARTS,
+                                      api_key, session, base_url)
+        statistics_items, full_items = statistics_future.result(), full_future.result()
+
+    now = time.time()
+    records = store.get_metadata(known_ids)
+    statistics = {}
+    for item in statistics_items:
+        video_id = item.get("id")
+        if video_id in records:
+            records[video_id].update({field: item.get("statistics", {}).get(field, "")
+                                      for field in STATISTICS_FIELDS})
+            statistics[video_id] = item.get("statistics", {})
+
+    new_records = []
+    for item in full_items:
+        record = parse_video_item(item)
+        if record:
+            new_records.append(record)
+            records[record['id']] = record
+            statistics[record['id']] = item.get("statistics", {})
+        else:
+            rejected.add(item.get("id"))
+
+    store.save_videos(records.values(), now)
+    store.save_rejected(rejected, now)
+    store.add_snapshots(statistics, now)
+    for video_id, velocity in store.velocities(records).items():
+        records[video_id]['viewsPerHour'] = velocity
+
+    logger.info("Incremental collection: %s known Shorts refreshed, %s new Shorts, %s new non-Shorts",
+                len(known_ids), len(new_records), len(rejected))
+
+    final_results = {}
+    for region_config, listing in zip(region_configs, listings):
+        collected_videos = [records[video_id] for video_id in listing['chart_ids'] if video_id in records]
+        if collected_videos:
+            final_results[region_key(region_config)] = collected_videos
+    return final_results
@@ -0,0 +1,104 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config import Config
+from src.collectors.credentials import get_credential_pool
+from src.collectors.dedup import SeenIndex
+from src.collectors.response_cache import get_response_cache
+from src.collectors.streaming import collect_into_dict, region_key, region_stream, stream_most_popular_videos
+from src.collectors.youtube_api import get_session, load_api_key
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_region_videos(region_config: Dict[str, str], target_per_region: int = 50,
+                        api_key: Optional[str] = None,
+                        session: Optional[requests.Session] = None,
+                        max_items: Optional[int] = None,
+                        base_url: Optional[str] = None,
+                        seen_index: Optional[SeenIndex] = None) -> List[Dict[str, Any]]:
+    """Page through the mostPopular chart of one region until enough Shorts are collected
+
+    With a shared seen_index, an ID already parsed for another region is not
+    parsed again; its record is reused and the region is added to its membership.
+    """
+    logger.info("Beginning Processing the Region %s", region_config)
+    collected_videos = list(region_stream(region_config, target_per_region, api_key, session,
+                                          base_url, seen_index, max_items))
+    logger.info("Ending Processing the Region %s", region_config)
+    return collected_videos
+
+
+def fetch_most_popular_videos(region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                              max_workers: Optional[int] = None,
+                              api_key: Optional[str] = None,
+                              session: Optional[requests.Session] = None,
+                              base_url: Optional[str] = None,
+                              seen_index: Optional[SeenIndex] = None,
+                              incremental: Optional[bool] = None,
+                              adaptive: Optional[bool] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch Shorts for every region concurrently over one pooled session
+
+    Pages inside a region still follow the nextPageToken chain one after another,
+    but regions are spread over a bounded thread pool so the total wall-clock time
+    tracks the slowest region instead of the sum of all regions. This is the
+    dict sink over stream_most_popular_videos; consumers that want records as
+    they land should iterate the stream directly. All regions share one
+    SeenIndex, so a Short trending in several regions is parsed once and the
+    same record object is listed under each region key.
+
+    In incremental mode (collector.incremental) videos already in the known-video
+    store only get their statistics refreshed; see collect_incremental. In
+    adaptive mode (collector.adaptive) the chart is paged with contentDetails
+    only and paging stops early where past runs found no more Shorts; see
+    collect_adaptive.
+    """
+    if not region_configs:
+        return {}
+
+    config = Config.get_instance()
+    if incremental is None:
+        incremental = config.get_config_value('collector.incremental', False)
+    if incremental:
+        from src.collectors.incremental import collect_incremental
+        return collect_incremental(region_configs, target_per_region, max_workers=max_workers,
+                                   api_key=api_key, session=session, base_url=base_url)
+    if adaptive is None:
+        adaptive = config.get_config_value('collector.adaptive', False)
+    if adaptive:
+        from src.collectors.adaptive import collect_adaptive
+        return collect_adaptive(region_configs, target_per_region, max_workers=max_workers,
+                                api_key=api_key, session=session, base_url=base_url)
+
+    api_key = api_key or load_api_key()
+    session = session or get_session()
+    if seen_index is None:
+        seen_index = SeenIndex.with_history(config.get_config_value('collector.seen_history_path'),
+                                            config.get_config_value('collector.skip_seen_videos', False),
+                                            config.get_config_value('collector.seen_history_capacity', 1_000_000))
+    response_cache = get_response_cache()
+    if response_cache:
+        response_cache.reset_stats()
+
+    stream = stream_most_popular_videos(region_configs, target_per_region, max_workers, api_key,
+                                        session, base_url, seen_index)
+    final_results = collect_into_dict(stream, [region_key(region_config) for region_config in region_configs])
+
+    cross_region = seen_index.cross_region_videos()
+    if cross_region:
+        logger.info("%s Shorts trend in more than one region", len(cross_region))
+    repeats = seen_index.repeat_count()
+    if repeats:
+        logger.info("%s Shorts were already collected by a previous run%s",
+                    repeats, ', skipped' if seen_index.skip_seen else '')
+    seen_index.save_history()
+    if response_cache:
+        logger.info("Response cache: %s", response_cache.stats())
+    credentials = get_credential_pool()
+    if credentials and logger.isEnabledFor(logging.INFO):
+        # stats() reads every key's usage from the quota backend
+        logger.info("API keys: %s",
+                    [(entry['name'], entry['used'], entry['remaining']) for entry in credentials.stats()])
+    return final_results
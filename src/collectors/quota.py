@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import Config
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# YouTube Data API v3 unit costs per call
+QUOTA_COSTS = {
+    'videos.list': 1,
+    'channels.list': 1,
+    'playlistItems.list': 1,
+    'commentThreads.list': 1,
+    'search.list': 100,
+    'videos.update': 50,
+    'videos.insert': 1600,
+    'thumbnails.set': 50,
+}
+DEFAULT_DAILY_QUOTA = 10000
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:  # tz database not available, fall back to PST
+    _QUOTA_TZ = timezone(timedelta(hours=-8))
+
+
+class QuotaExhaustedError(Exception):
+    """Raised when the daily quota cannot cover a call"""
+
+    def __init__(self, endpoint: str, units: int, remaining: int, reset_in: float):
+        super().__init__(f"Quota exhausted for {endpoint}: needs {units} units, "
+                         f"{remaining} remaining, resets in {reset_in:.0f}s")
+        self.endpoint = endpoint
+        self.units = units
+        self.remaining = remaining
+        self.reset_in = reset_in
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """Quota day identifier; YouTube resets quotas at midnight Pacific Time"""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(_QUOTA_TZ).strftime('%Y-%m-%d')
+
+
+def seconds_until_reset(now: Optional[datetime] = None) -> float:
+    """Seconds until the next Pacific midnight quota reset"""
+    now = (now or datetime.now(timezone.utc)).astimezone(_QUOTA_TZ)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - now).total_seconds()
+
+
+class QuotaBackend:
+    """Storage for daily quota usage; consume() must be atomic across its clients"""
+
+    def consume(self, namespace: str, day: str, endpoint: str, units: int, limit: int) -> bool:
+        """Record units if the day's total stays within limit; False otherwise"""
+        raise NotImplementedError
+
+    def usage(self, namespace: str, day: str) -> Dict[str, int]:
+        """Units used per endpoint for a day"""
+        raise NotImplementedError
+
+
+class MemoryQuotaBackend(QuotaBackend):
+    """Process-local usage counters"""
+
+    def __init__(self):
+        self._usage: Dict[tuple, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, namespace, day, endpoint, units, limit):
+        with self._lock:
+            by_endpoint = self._usage.setdefault((namespace, day), {})
+            if sum(by_endpoint.values()) + units > limit:
+                return False
+            by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + units
+            return True
+
+    def usage(self, namespace, day):
+        with self._lock:
+            return dict(self._usage.get((namespace, day), {}))
+
+
+class SQLiteQuotaBackend(QuotaBackend):
+    """File-backed usage shared by every process on the same machine"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS quota_usage ('
+                ' namespace TEXT NOT NULL, day TEXT NOT NULL, endpoint TEXT NOT NULL,'
+                ' units INTEGER NOT NULL, PRIMARY KEY (namespace, day, endpoint))'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def consume(self, namespace, day, endpoint, units, limit):
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            used = conn.execute(
+                'SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE namespace = ? AND day = ?',
+                (namespace, day)
+            ).fetchone()[0]
+            if used + units > limit:
+                conn.execute('ROLLBACK')
+                return False
+            conn.execute(
+                'INSERT INTO quota_usage (namespace, day, endpoint, units) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (namespace, day, endpoint) DO UPDATE SET units = units + excluded.units',
+                (namespace, day, endpoint, units)
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def usage(self, namespace, day):
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT endpoint, units FROM quota_usage WHERE namespace = ? AND day = ?',
+                (namespace, day)
+            ).fetchall()
+        return dict(rows)
+
+
+class DynamoDBQuotaBackend(QuotaBackend):
+    """Usage shared by every Lambda invocation through a conditional DynamoDB update
+
+    The table needs a string partition key named ``pk``; items expire through
+    the ``expires_at`` TTL attribute two days after their quota day.
+    """
+
+    def __init__(self, table_name: str, region_name: Optional[str] = None,
+                 endpoint_url: Optional[str] = None):
+        import boto3
+        self.table_name = table_name
+        self._client = boto3.client('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+
+    def consume(self, namespace, day, endpoint, units, limit):
+        from botocore.exceptions import ClientError
+        try:
+            self._client.update_item(
+                TableName=self.table_name,
+                Key={'pk': {'S': f'{namespace}#{day}'}},
+                UpdateExpression='ADD used :units, #endpoint :units SET expires_at = :expires_at',
+                ConditionExpression='attribute_not_exists(used) OR used <= :ceiling',
+                ExpressionAttributeNames={'#endpoint': f'endpoint_{endpoint}'},
+                ExpressionAttributeValues={
+                    ':units': {'N': str(units)},
+                    ':ceiling': {'N': str(limit - units)},
+                    ':expires_at': {'N': str(int(time.time()) + 2 * 86400)},
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def usage(self, namespace, day):
+        response = self._client.get_item(TableName=self.table_name,
+                                          Key={'pk': {'S': f'{namespace}#{day}'}},
+                                          ConsistentRead=True)
+        item = response.get('Item', {})
+        return {
+            name[len('endpoint_'):]: int(value['N'])
+            for name, value in item.items() if name.startswith('endpoint_')
+        }
+
+
+class QuotaScheduler:
+    """Token-bucket scheduler over the YouTube daily quota
+
+    Every call is charged its endpoint cost against the shared daily budget, so
+    concurrent workers and Lambda invocations using the same backend see one
+    budget. Without rate_per_second, callers may burst up to whatever is left
+    of the day; with it, a local token bucket of size burst smooths the spend.
+    """
+
+    def __init__(self, daily_limit: int = DEFAULT_DAILY_QUOTA, backend: Optional[QuotaBackend] = None,
+                 rate_per_second: Optional[float] = None, burst: Optional[int] = None,
+                 namespace: str = 'default', costs: Optional[Dict[str, int]] = None):
+        self.daily_limit = daily_limit
+        self.backend = backend or MemoryQuotaBackend()
+        self.namespace = namespace
+        self.costs = dict(QUOTA_COSTS, **(costs or {}))
+        self.rate_per_second = rate_per_second
+        self.burst = burst or daily_limit
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._units = 0
+        self._rejected = 0
+        self._waited_seconds = 0.0
+
+    def cost_of(self, endpoint: str) -> int:
+        """Unit cost of one call to an endpoint"""
+        return self.costs.get(endpoint, 1)
+
+    def _refill(self, now: float):
+        if self.rate_per_second:
+            elapsed = now - self._last_refill
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_per_second)
+        self._last_refill = now
+
+    def try_acquire(self, endpoint: str, units: Optional[int] = None) -> float:
+        """Charge a call if possible; returns 0 when granted, else the seconds to wait
+
+        Only the local token bucket is touched under the lock; the backend
+        round trip runs outside it, and the tokens are given back if the
+        backend refuses the call or fails. A call costing more than burst
+        waits for a full bucket and leaves it in debt, so the calls after it
+        wait out the rest of its cost. Raises QuotaExhaustedError when the
+        rest of the day cannot cover the call.
+        """
+        units = self.cost_of(endpoint) if units is None else units
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.rate_per_second:
+                needed = min(units, self.burst)
+                if self._tokens < needed:
+                    return (needed - self._tokens) / self.rate_per_second
+                self._tokens -= units
+
+        try:
+            granted = self.backend.consume(self.namespace, quota_day(), endpoint, units, self.daily_limit)
+        except Exception:
+            self._give_back(units)
+            raise
+        if not granted:
+            self._give_back(units)
+            with self._lock:
+                self._rejected += 1
+            get_metrics().incr('quota_rejections', endpoint=endpoint)
+            raise QuotaExhaustedError(endpoint, units, self.remaining(), seconds_until_reset())
+
+        with self._lock:
+            self._calls += 1
+            self._units += units
+        get_metrics().incr('quota_units', units, endpoint=endpoint)
+        return 0.0
+
+    def _give_back(self, units: int):
+        if self.rate_per_second:
+            with self._lock:
+                self._tokens = min(float(self.burst), self._tokens + units)
+
+    def acquire(self, endpoint: str, units: Optional[int] = None, timeout: Optional[float] = None):
+        """Block until the call is granted"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(endpoint, units)
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Timed out waiting for quota on {endpoint}")
+            self._waited_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, endpoint: str, units: Optional[int] = None,
+                            timeout: Optional[float] = None):
+        """Wait for the call to be granted without blocking the event loop thread"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(endpoint, units)
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError(f"Timed out waiting for quota on {endpoint}")
+            self._waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def used(self) -> int:
+        """Units used today across every client of the backend"""
+        return sum(self.backend.usage(self.namespace, quota_day()).values())
+
+    def remaining(self) -> int:
+        """Units left today across every client of the backend"""
+        return max(0, self.daily_limit - self.used())
+
+    @property
+    def units_charged(self) -> int:
+        """Units granted to this client since it was created, without a backend round trip"""
+        with self._lock:
+            return self._units
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of quota usage for logging and the pipeline status"""
+        by_endpoint = self.backend.usage(self.namespace, quota_day())
+        used = sum(by_endpoint.values())
+        return {
+            'namespace': self.namespace,
+            'day': quota_day(),
+            'daily_limit': self.daily_limit,
+            'used': used,
+            'remaining': max(0, self.daily_limit - used),
+            'by_endpoint': by_endpoint,
+            'calls': self._calls,
+            'units_charged': self.units_charged,
+            'rejected': self._rejected,
+            'waited_seconds': round(self._waited_seconds, 3),
+            'resets_in_seconds': round(seconds_until_reset()),
+        }
+
+
+_scheduler: Optional[QuotaScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def build_quota_backend(config: Optional[Config] = None) -> QuotaBackend:
+    """Build the usage backend selected by quota.backend"""
+    config = config or Config.get_instance()
+    backend = config.get_config_value('quota.backend', 'memory')
+    if backend == 'sqlite':
+        return SQLiteQuotaBackend(config.get_config_value('quota.sqlite_path', 'temp/quota.sqlite3'))
+    if backend == 'dynamodb':
+        return DynamoDBQuotaBackend(
+            config.get_config_value('quota.dynamodb_table', 'youtube-quota'),
+            region_name=config.get_config_value('aws.region', 'us-east-1'),
+            endpoint_url=config.get_config_value('quota.dynamodb_endpoint_url'),
+        )
+    if backend != 'memory':
+        logger.warning("Unknown quota backend '%s', using memory", backend)
+    return MemoryQuotaBackend()
+
+
+def get_quota_scheduler() -> QuotaScheduler:
+    """Get the shared scheduler built from the quota config section"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                config = Config.get_instance()
+                _scheduler = QuotaScheduler(
+                    daily_limit=config.get_config_value('quota.daily_limit', DEFAULT_DAILY_QUOTA),
+                    backend=build_quota_backend(config),
+                    rate_per_second=config.get_config_value('quota.rate_per_second'),
+                    burst=config.get_config_value('quota.burst'),
+                    namespace=config.get_config_value('quota.namespace', 'default'),
+                )
+    return _scheduler
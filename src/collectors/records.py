@@ -0,0 +1,356 @@
+import logging
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for counts YouTube hides (e.g. likeCount on some videos)
+MISSING_COUNT = -1
+
+
+def parse_timestamp(value: Optional[str]) -> int:
+    """Parse an RFC 3339 timestamp such as 2025-07-01T12:00:00Z into epoch seconds (0 if empty)"""
+    if not value:
+        return 0
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        logger.debug("Unparseable timestamp %r", value)
+        return 0
+
+
+def _count(value: Any) -> Optional[int]:
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() == 'true'
+    return bool(value)
+
+
+@dataclass(slots=True)
+class VideoRecord:
+    """Typed, slotted form of one parsed video snapshot"""
+
+    id: str
+    published_at: int
+    channel_id: str
+    title: str
+    channel_title: str
+    description: str
+    tags: Tuple[str, ...]
+    duration_seconds: int
+    dimension: str
+    definition: str
+    caption: bool
+    licensed_content: bool
+    view_count: Optional[int]
+    like_count: Optional[int]
+    favorite_count: Optional[int]
+    comment_count: Optional[int]
+    region: str = ''
+    captured_at: int = 0
+
+    @classmethod
+    def from_parsed(cls, video: Dict[str, Any], region: str = '', captured_at: int = 0) -> 'VideoRecord':
+        """Build a record from a parse_video_item dict"""
+        tags = video.get('tags') or ()
+        return cls(
+            id=video.get('id', ''),
+            published_at=parse_timestamp(video.get('publishedAt')),
+            channel_id=video.get('channelId', ''),
+            title=video.get('title', ''),
+            channel_title=video.get('channelTitle', ''),
+            description=video.get('description', ''),
+            tags=tuple(tags) if not isinstance(tags, str) else (),
+            duration_seconds=int(video.get('durationInSeconds') or 0),
+            dimension=video.get('dimension', ''),
+            definition=video.get('definition', ''),
+            caption=_flag(video.get('caption')),
+            licensed_content=_flag(video.get('licensedContent')),
+            view_count=_count(video.get('viewCount')),
+            like_count=_count(video.get('likeCount')),
+            favorite_count=_count(video.get('favoriteCount')),
+            comment_count=_count(video.get('commentCount')),
+            region=region,
+            captured_at=captured_at,
+        )
+
+
+RECORD_FIELDS = tuple(field.name for field in fields(VideoRecord))
+COUNT_COLUMNS = ('view_count', 'like_count', 'favorite_count', 'comment_count')
+TEXT_COLUMNS = ('title', 'description')
+CATEGORY_COLUMNS = ('id', 'channel_id', 'channel_title', 'dimension', 'definition', 'region')
+
+
+class StringColumn:
+    """Variable-length strings packed into one UTF-8 buffer plus int64 offsets"""
+
+    __slots__ = ('offsets', 'data')
+
+    def __init__(self, offsets: np.ndarray, data: bytes):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> 'StringColumn':
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, b''.join(encoded))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def to_list(self) -> List[str]:
+        return [self[index] for index in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self.data)
+
+
+class CategoryColumn:
+    """Dictionary-encoded strings: int32 codes into a list of distinct values"""
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> 'CategoryColumn':
+        lookup: Dict[str, int] = {}
+        codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32)
+        return cls(codes, list(lookup))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str:
+        return self.categories[self.codes[index]]
+
+    def to_list(self) -> List[str]:
+        return [self.categories[code] for code in self.codes.tolist()]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(value) for value in self.categories)
+
+
+class TagsColumn:
+    """Per-video tag lists as int32 offsets into dictionary-encoded tag codes"""
+
+    __slots__ = ('offsets', 'codes', 'vocabulary')
+
+    def __init__(self, offsets: np.ndarray, codes: np.ndarray, vocabulary: List[str]):
+        self.offsets = offsets
+        self.codes = codes
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_lists(cls, tag_lists: Iterable[Sequence[str]]) -> 'TagsColumn':
+        lookup: Dict[str, int] = {}
+        lengths, codes = [], []
+        for tags in tag_lists:
+            lengths.append(len(tags))
+            codes.extend(lookup.setdefault(tag, len(lookup)) for tag in tags)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(offsets, np.asarray(codes, dtype=np.int32), list(lookup))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Tuple[str, ...]:
+        return tuple(self.vocabulary[code] for code in self.codes[self.offsets[index]:self.offsets[index + 1]])
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.codes.nbytes + sum(len(tag) for tag in self.vocabulary)
+
+
+class VideoBatch:
+    """Columnar batch of video snapshots
+
+    Counts are int64 with MISSING_COUNT for hidden values, timestamps are epoch
+    seconds, repeated strings (IDs, channels, regions) are dictionary-encoded,
+    tags are one shared vocabulary, and free text is packed into UTF-8 buffers.
+    """
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records: Iterable[Union[VideoRecord, Dict[str, Any]]],
+                     region: str = '', captured_at: int = 0) -> 'VideoBatch':
+        """Build a batch from VideoRecords or parse_video_item dicts"""
+        records = [
+            record if isinstance(record, VideoRecord) else VideoRecord.from_parsed(record, region, captured_at)
+            for record in records
+        ]
+        columns: Dict[str, Any] = {}
+        for name in CATEGORY_COLUMNS:
+            columns[name] = CategoryColumn.from_strings(getattr(record, name) for record in records)
+        for name in TEXT_COLUMNS:
+            columns[name] = StringColumn.from_strings(getattr(record, name) for record in records)
+        columns['tags'] = TagsColumn.from_lists(record.tags for record in records)
+        for name in COUNT_COLUMNS:
+            columns[name] = np.fromiter(
+                (MISSING_COUNT if getattr(record, name) is None else getattr(record, name) for record in records),
+                dtype=np.int64, count=len(records))
+        columns['published_at'] = np.fromiter((record.published_at for record in records),
+                                              dtype=np.int64, count=len(records))
+        columns['captured_at'] = np.fromiter((record.captured_at for record in records),
+                                             dtype=np.int64, count=len(records))
+        columns['duration_seconds'] = np.fromiter((record.duration_seconds for record in records),
+                                                  dtype=np.int32, count=len(records))
+        columns['caption'] = np.fromiter((record.caption for record in records), dtype=bool, count=len(records))
+        columns['licensed_content'] = np.fromiter((record.licensed_content for record in records),
+                                                  dtype=bool, count=len(records))
+        return cls(columns)
+
+    @classmethod
+    def from_region_results(cls, results: Dict[str, List[Dict[str, Any]]],
+                            captured_at: int = 0) -> 'VideoBatch':
+        """Build a batch from fetch_most_popular_videos output, keeping the region key per row"""
+        return cls.from_records(
+            VideoRecord.from_parsed(video, region, captured_at)
+            for region, videos in results.items() for video in videos
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns['view_count'])
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def record(self, index: int) -> VideoRecord:
+        values = {}
+        for name in RECORD_FIELDS:
+            column = self.columns[name]
+            if isinstance(column, np.ndarray):
+                value = column[index].item()
+                if name in COUNT_COLUMNS and value == MISSING_COUNT:
+                    value = None
+                values[name] = value
+            else:
+                values[name] = column[index]
+        return VideoRecord(**values)
+
+    def records(self) -> Iterable[VideoRecord]:
+        return (self.record(index) for index in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def to_arrow(self):
+        """Convert to a pyarrow Table with dictionary-encoded string columns"""
+        import pyarrow as pa
+
+        arrays = {}
+        for name, column in self.columns.items():
+            if isinstance(column, CategoryColumn):
+                arrays[name] = pa.DictionaryArray.from_arrays(pa.array(column.codes),
+                                                              pa.array(column.categories, pa.string()))
+            elif isinstance(column, StringColumn):
+                arrays[name] = pa.LargeStringArray.from_buffers(
+                    len(column), pa.py_buffer(column.offsets), pa.py_buffer(column.data)).cast(pa.string())
+            elif isinstance(column, TagsColumn):
+                values = pa.DictionaryArray.from_arrays(pa.array(column.codes),
+                                                        pa.array(column.vocabulary, pa.string()))
+                arrays[name] = pa.ListArray.from_arrays(pa.array(column.offsets), values)
+            elif name in COUNT_COLUMNS:
+                arrays[name] = pa.array(column, mask=column == MISSING_COUNT)
+            else:
+                arrays[name] = pa.array(column)
+        return pa.table(arrays)
+
+    @classmethod
+    def from_arrow(cls, table) -> 'VideoBatch':
+        import pyarrow as pa
+
+        columns: Dict[str, Any] = {}
+        for name in table.column_names:
+            array = table.column(name).combine_chunks()
+            if name in CATEGORY_COLUMNS:
+                if not pa.types.is_dictionary(array.type):
+                    array = array.dictionary_encode()
+                columns[name] = CategoryColumn(array.indices.to_numpy().astype(np.int32),
+                                               array.dictionary.to_pylist())
+            elif name in TEXT_COLUMNS:
+                columns[name] = StringColumn.from_strings(array.to_pylist())
+            elif name == 'tags':
+                columns[name] = TagsColumn.from_lists(tags or () for tags in array.to_pylist())
+            elif name in COUNT_COLUMNS:
+                columns[name] = array.fill_null(MISSING_COUNT).to_numpy().astype(np.int64)
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=False)
+        return cls(columns)
+
+    def save(self, path: str):
+        """Write the batch as Parquet when pyarrow is installed, otherwise as compressed .npz"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            np.savez_compressed(path.with_suffix('.npz'), **self._to_arrays())
+            return path.with_suffix('.npz')
+        pq.write_table(self.to_arrow(), path.with_suffix('.parquet'), compression='zstd')
+        return path.with_suffix('.parquet')
+
+    @classmethod
+    def load(cls, path: str) -> 'VideoBatch':
+        path = Path(path)
+        if path.suffix == '.parquet':
+            import pyarrow.parquet as pq
+            return cls.from_arrow(pq.read_table(path))
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls._from_arrays(arrays)
+
+    def _to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for name, column in self.columns.items():
+            if isinstance(column, CategoryColumn):
+                arrays[f'{name}.codes'] = column.codes
+                arrays[f'{name}.categories'] = np.array(column.categories, dtype=str)
+            elif isinstance(column, StringColumn):
+                arrays[f'{name}.offsets'] = column.offsets
+                arrays[f'{name}.data'] = np.frombuffer(column.data, dtype=np.uint8)
+            elif isinstance(column, TagsColumn):
+                arrays[f'{name}.offsets'] = column.offsets
+                arrays[f'{name}.codes'] = column.codes
+                arrays[f'{name}.vocabulary'] = np.array(column.vocabulary, dtype=str)
+            else:
+                arrays[name] = column
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, arrays) -> 'VideoBatch':
+        columns: Dict[str, Any] = {}
+        for name in CATEGORY_COLUMNS:
+            columns[name] = CategoryColumn(arrays[f'{name}.codes'], arrays[f'{name}.categories'].tolist())
+        for name in TEXT_COLUMNS:
+            columns[name] = StringColumn(arrays[f'{name}.offsets'], arrays[f'{name}.data'].tobytes())
+        columns['tags'] = TagsColumn(arrays['tags.offsets'], arrays['tags.codes'],
+                                     arrays['tags.vocabulary'].tolist())
+        for name in COUNT_COLUMNS + ('published_at', 'captured_at', 'duration_seconds',
+                                     'caption', 'licensed_content'):
+            columns[name] = arrays[name]
+        return cls(columns)
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Params that never take part in the cache key (credentials, not content)
+EXCLUDED_PARAMS = frozenset({'key', 'access_token'})
+
+
+def cache_key(url: str, params: Dict[str, Any]) -> str:
+    """Hash the URL and its normalized params, leaving out credentials and empty values"""
+    normalized = sorted(
+        (name, str(value)) for name, value in (params or {}).items()
+        if value is not None and name not in EXCLUDED_PARAMS
+    )
+    raw = json.dumps([url, normalized], separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LocalDiskCacheStore:
+    """Cache entries as JSON files, evicted least-recently-used past max_bytes"""
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._total_bytes = 0
+        entries = []
+        for path in self.root.glob('*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.root / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = json.loads(f.read())
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        payload = json.dumps(entry, separators=(',', ':')).encode('utf-8')
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        tmp_path.replace(path)
+        with self._lock:
+            self._total_bytes += len(payload) - self._index.pop(key, 0)
+            self._index[key] = len(payload)
+            self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self._path(key).unlink(missing_ok=True)
+
+
+class S3CacheStore:
+    """Cache entries as S3 objects; size is bounded by a bucket lifecycle rule on the prefix"""
+
+    def __init__(self, bucket: str, prefix: str = 'http-cache/', region_name: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', region_name=region_name)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=f'{self.prefix}{key}.json')
+        except self._client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        self._client.put_object(Bucket=self.bucket, Key=f'{self.prefix}{key}.json',
+                                Body=json.dumps(entry, separators=(',', ':')).encode('utf-8'),
+                                ContentType='application/json')
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=f'{self.prefix}{key}.json')
+
+
+class ResponseCache:
+    """ETag-aware cache of API response bodies
+
+    Entries younger than max_age_seconds are served without a request; older
+    entries are revalidated with If-None-Match, and a 304 reply counts as a hit.
+    Entries older than ttl_seconds are dropped.
+    """
+
+    def __init__(self, store, ttl_seconds: int = 86400, max_age_seconds: int = 0):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self._stats = {'fresh_hits': 0, 'revalidated_hits': 0, 'misses': 0, 'bytes_saved': 0}
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            self._stats[name] += value
+
+    def lookup(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Find a usable entry; sets entry['fresh'] when it can be served without revalidation"""
+        key = cache_key(url, params)
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        age = time.time() - entry.get('stored_at', 0)
+        if age > self.ttl_seconds:
+            self.store.delete(key)
+            return None
+        entry['key'] = key
+        entry['fresh'] = age <= self.max_age_seconds
+        return entry
+
+    def record_hit(self, entry: Dict[str, Any]):
+        self._count('fresh_hits' if entry.get('fresh') else 'revalidated_hits')
+        self._count('bytes_saved', entry.get('size', 0))
+
+    def record_miss(self):
+        self._count('misses')
+
+    def store_response(self, url: str, params: Dict[str, Any], etag: Optional[str],
+                       data: Any, size: int):
+        if not etag:
+            return
+        self.store.put(cache_key(url, params), {
+            'url': url,
+            'etag': etag,
+            'stored_at': time.time(),
+            'size': size,
+            'data': data,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['fresh_hits'] + stats['revalidated_hits']
+        total = hits + stats['misses']
+        stats['hits'] = hits
+        stats['hit_ratio'] = round(hits / total, 3) if total else 0.0
+        return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Get the shared response cache from the response_cache config section, or None if disabled"""
+    global _cache, _cache_initialized
+    if not _cache_initialized:
+        with _cache_lock:
+            if not _cache_initialized:
+                config = Config.get_instance()
+                if config.get_config_value('response_cache.enabled', False):
+                    if config.get_config_value('response_cache.backend', 'disk') == 's3':
+                        store = S3CacheStore(
+                            config.get_config_value('aws.s3_bucket'),
+                            config.get_config_value('response_cache.s3_prefix', 'http-cache/'),
+                            region_name=config.get_config_value('aws.region', 'us-east-1'),
+                        )
+                    else:
+                        store = LocalDiskCacheStore(
+                            config.get_config_value('response_cache.path', 'temp/http_cache'),
+                            config.get_config_value('response_cache.max_bytes', 256 * 1024 * 1024),
+                        )
+                    _cache = ResponseCache(
+                        store,
+                        ttl_seconds=config.get_config_value('response_cache.ttl_seconds', 86400),
+                        max_age_seconds=config.get_config_value('response_cache.max_age_seconds', 0),
+                    )
+                _cache_initialized = True
+    return _cache
@@ -0,0 +1,337 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+from src.collectors.records import VideoRecord
+
+logger = logging.getLogger(__name__)
+
+# Stored per snapshot; descriptions stay in the known-video store
+COLUMNS = ('id', 'region', 'captured_at', 'published_at', 'channel_id', 'channel_title', 'title',
+           'duration_seconds', 'view_count', 'like_count', 'comment_count', 'tags')
+# Videos younger than this are scored as if they were this old (as in the virality analyzer)
+MIN_AGE_HOURS = 1.0
+
+
+def partition_date(timestamp: float) -> str:
+    """UTC date a snapshot is filed under"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+def dates_between(since: float, until: float) -> List[str]:
+    """Partition dates covering [since, until]"""
+    day = datetime.fromtimestamp(since, timezone.utc).date()
+    last = datetime.fromtimestamp(until, timezone.utc).date()
+    dates = []
+    while day <= last:
+        dates.append(day.isoformat())
+        day += timedelta(days=1)
+    return dates
+
+
+def _row(record: VideoRecord) -> Tuple:
+    return (record.id, record.region, record.captured_at, record.published_at, record.channel_id,
+            record.channel_title, record.title, record.duration_seconds, record.view_count,
+            record.like_count, record.comment_count, json.dumps(list(record.tags), ensure_ascii=False))
+
+
+class SnapshotStore:
+    """Append-only history of video statistics snapshots, partitioned by date and region
+
+    Backends implement append_records, scan and video_history; scans only
+    touch the partitions in the requested time range and regions, and only
+    return the requested columns.
+    """
+
+    def append(self, results: Dict[str, List[Dict[str, Any]]], captured_at: Optional[float] = None) -> int:
+        """Store fetch_most_popular_videos output as one batch; returns rows written"""
+        captured_at = int(time.time() if captured_at is None else captured_at)
+        return self.append_records(
+            VideoRecord.from_parsed(video, region, captured_at)
+            for region, videos in results.items() for video in videos
+        )
+
+    def append_records(self, records: Iterable[VideoRecord]) -> int:
+        raise NotImplementedError
+
+    def scan(self, columns: Sequence[str], since: float, until: float,
+             regions: Optional[Sequence[str]] = None) -> Iterator[Tuple]:
+        """Rows of the given columns captured in [since, until]"""
+        raise NotImplementedError
+
+    def video_history(self, video_id: str, since: Optional[float] = None, until: Optional[float] = None,
+                      regions: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Every snapshot of one video, oldest first"""
+        raise NotImplementedError
+
+    def top_channels_by_velocity(self, since: float, until: Optional[float] = None,
+                                 regions: Optional[Sequence[str]] = None, n: int = 10) -> List[Dict[str, Any]]:
+        """Channels ranked by the summed view velocity of their videos in the window
+
+        A video seen more than once in the window contributes the views it
+        gained per hour between its first and last snapshot; a video seen once
+        contributes its lifetime views per hour.
+        """
+        until = time.time() if until is None else until
+        videos: Dict[str, List] = {}
+        for video_id, channel_id, channel_title, published_at, captured_at, views in self.scan(
+                ('id', 'channel_id', 'channel_title', 'published_at', 'captured_at', 'view_count'),
+                since, until, regions):
+            if views is None:
+                continue
+            state = videos.get(video_id)
+            if state is None:
+                videos[video_id] = [channel_id, channel_title, published_at,
+                                    captured_at, views, captured_at, views]
+                continue
+            if captured_at < state[3]:
+                state[3], state[4] = captured_at, views
+            if captured_at > state[5]:
+                state[5], state[6] = captured_at, views
+
+        channels: Dict[str, Dict[str, Any]] = {}
+        for channel_id, channel_title, published_at, first_at, first_views, last_at, last_views in videos.values():
+            if last_at > first_at:
+                velocity = max(0, last_views - first_views) / ((last_at - first_at) / 3600)
+            else:
+                velocity = last_views / max((last_at - published_at) / 3600, MIN_AGE_HOURS)
+            channel = channels.setdefault(channel_id, {'channel_id': channel_id, 'channel_title': channel_title,
+                                                       'velocity': 0.0, 'videos': 0})
+            channel['velocity'] += velocity
+            channel['videos'] += 1
+        return sorted(channels.values(), key=lambda channel: channel['velocity'], reverse=True)[:n]
+
+
+class SQLiteSnapshotStore(SnapshotStore):
+    """One SQLite file per date and region: <root>/dt=YYYY-MM-DD/region=<REGION_lang>.sqlite3
+
+    Each file indexes id, channel_id and published_at. Rows are keyed by
+    (id, captured_at), so re-appending the same batch is a no-op.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._initialized = set()
+        self._lock = threading.Lock()
+
+    def _partition_path(self, date: str, region: str) -> Path:
+        return self.root / f'dt={date}' / f'region={region or "none"}.sqlite3'
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=30)
+        if path not in self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                ' id TEXT NOT NULL, region TEXT NOT NULL, captured_at INTEGER NOT NULL,'
+                ' published_at INTEGER NOT NULL, channel_id TEXT NOT NULL, channel_title TEXT,'
+                ' title TEXT, duration_seconds INTEGER, view_count INTEGER, like_count INTEGER,'
+                ' comment_count INTEGER, tags TEXT, PRIMARY KEY (id, captured_at)) WITHOUT ROWID;'
+                'CREATE INDEX IF NOT EXISTS snapshots_channel ON snapshots (channel_id, captured_at);'
+                'CREATE INDEX IF NOT EXISTS snapshots_published ON snapshots (published_at);'
+                'CREATE INDEX IF NOT EXISTS snapshots_captured ON snapshots (captured_at);'
+            )
+            with self._lock:
+                self._initialized.add(path)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def append_records(self, records: Iterable[VideoRecord]) -> int:
+        partitions: Dict[Tuple[str, str], List[Tuple]] = {}
+        for record in records:
+            partitions.setdefault((partition_date(record.captured_at), record.region), []).append(_row(record))
+
+        written = 0
+        marks = ','.join('?' * len(COLUMNS))
+        for (date, region), rows in partitions.items():
+            path = self._partition_path(date, region)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect(path)
+            try:
+                with conn:
+                    before = conn.total_changes
+                    conn.executemany(f'INSERT OR IGNORE INTO snapshots ({", ".join(COLUMNS)}) VALUES ({marks})', rows)
+                    written += conn.total_changes - before
+            finally:
+                conn.close()
+        return written
+
+    def partitions(self, since: Optional[float] = None, until: Optional[float] = None,
+                   regions: Optional[Sequence[str]] = None) -> List[Path]:
+        """Partition files overlapping the time range and regions"""
+        first = partition_date(since) if since is not None else ''
+        last = partition_date(until) if until is not None else '9999-12-31'
+        wanted = {f'region={region}.sqlite3' for region in regions} if regions else None
+        paths = []
+        for date_dir in sorted(self.root.glob('dt=*')):
+            if not first <= date_dir.name[3:] <= last:
+                continue
+            paths.extend(path for path in sorted(date_dir.glob('region=*.sqlite3'))
+                         if wanted is None or path.name in wanted)
+        return paths
+
+    def scan(self, columns, since, until, regions=None):
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown snapshot columns: {sorted(unknown)}")
+        query = f'SELECT {", ".join(columns)} FROM snapshots WHERE captured_at BETWEEN ? AND ?'
+        for path in self.partitions(since, until, regions):
+            conn = self._connect(path)
+            try:
+                yield from conn.execute(query, (int(since), int(until)))
+            finally:
+                conn.close()
+
+    def video_history(self, video_id, since=None, until=None, regions=None):
+        history = []
+        for path in self.partitions(since, until, regions):
+            conn = self._connect(path)
+            conn.row_factory = sqlite3.Row
+            try:
+                history.extend(dict(row) for row in conn.execute(
+                    'SELECT * FROM snapshots WHERE id = ? AND captured_at BETWEEN ? AND ?',
+                    (video_id, int(since or 0), int(until if until is not None else 2 ** 62))))
+            finally:
+                conn.close()
+        for row in history:
+            row['tags'] = json.loads(row['tags'] or '[]')
+        return sorted(history, key=lambda row: row['captured_at'])
+
+
+class DynamoDBSnapshotStore(SnapshotStore):
+    """Snapshots in DynamoDB (or DynamoDB Local through endpoint_url)
+
+    Items are partitioned by ``pk`` = "<date>#<region>" with sort key ``sk`` =
+    "<captured_at>#<id>", so a time-range scan is one Query per partition.
+    The ``by_video`` global secondary index (partition key ``id``, sort key
+    ``captured_at``) serves video histories. Scans need the region list, as
+    DynamoDB cannot enumerate partitions without a full table scan; it
+    defaults to collector.regions.
+    """
+
+    def __init__(self, table_name: str, region_name: Optional[str] = None,
+                 endpoint_url: Optional[str] = None, regions: Optional[Sequence[str]] = None):
+        import boto3
+        self.table_name = table_name
+        self._resource = boto3.resource('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+        self._table = self._resource.Table(table_name)
+        self.regions = list(regions or ())
+
+    def create_table(self):
+        """Create the table and index (for DynamoDB Local and first deployments)"""
+        self._resource.create_table(
+            TableName=self.table_name,
+            KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}, {'AttributeName': 'sk', 'KeyType': 'RANGE'}],
+            AttributeDefinitions=[
+                {'AttributeName': 'pk', 'AttributeType': 'S'},
+                {'AttributeName': 'sk', 'AttributeType': 'S'},
+                {'AttributeName': 'id', 'AttributeType': 'S'},
+                {'AttributeName': 'captured_at', 'AttributeType': 'N'},
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': 'by_video',
+                'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'},
+                              {'AttributeName': 'captured_at', 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            }],
+            BillingMode='PAY_PER_REQUEST',
+        ).wait_until_exists()
+
+    @staticmethod
+    def _item(record: VideoRecord) -> Dict[str, Any]:
+        item = dict(zip(COLUMNS, _row(record)))
+        item['tags'] = list(record.tags)
+        item['pk'] = f'{partition_date(record.captured_at)}#{record.region or "none"}'
+        item['sk'] = f'{record.captured_at:010d}#{record.id}'
+        return {name: value for name, value in item.items() if value is not None and value != []}
+
+    @staticmethod
+    def _plain(value: Any) -> Any:
+        # The resource API returns numbers as Decimal
+        if hasattr(value, 'as_integer_ratio') and not isinstance(value, (int, float)):
+            return int(value)
+        return value
+
+    def append_records(self, records):
+        written = 0
+        seen = set()
+        with self._table.batch_writer(overwrite_by_pkeys=['pk', 'sk']) as batch:
+            for record in records:
+                item = self._item(record)
+                if (item['pk'], item['sk']) in seen:
+                    continue
+                seen.add((item['pk'], item['sk']))
+                batch.put_item(Item=item)
+                written += 1
+        return written
+
+    def _query_all(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        while True:
+            response = self._table.query(**kwargs)
+            yield from response.get('Items', ())
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def scan(self, columns, since, until, regions=None):
+        from boto3.dynamodb.conditions import Key
+
+        regions = list(regions or self.regions)
+        names = {f'#c{index}': column for index, column in enumerate(columns)}
+        low, high = f'{int(since):010d}#', f'{int(until):010d}#￿'
+        for date in dates_between(since, until):
+            for region in regions:
+                for item in self._query_all(
+                        KeyConditionExpression=Key('pk').eq(f'{date}#{region}') & Key('sk').between(low, high),
+                        ProjectionExpression=', '.join(names), ExpressionAttributeNames=names):
+                    yield tuple(self._plain(item.get(column)) for column in columns)
+
+    def video_history(self, video_id, since=None, until=None, regions=None):
+        from boto3.dynamodb.conditions import Key
+
+        condition = Key('id').eq(video_id) & Key('captured_at').between(
+            int(since or 0), int(until if until is not None else 2 ** 62))
+        history = []
+        for item in self._query_all(IndexName='by_video', KeyConditionExpression=condition):
+            if regions and item.get('region') not in regions:
+                continue
+            row = {column: self._plain(item.get(column)) for column in COLUMNS}
+            row['tags'] = list(item.get('tags') or ())
+            history.append(row)
+        return history
+
+
+_store: Optional[SnapshotStore] = None
+_store_initialized = False
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> Optional[SnapshotStore]:
+    """Get the shared snapshot store from the snapshots config section, or None if disabled"""
+    global _store, _store_initialized
+    if not _store_initialized:
+        with _store_lock:
+            if not _store_initialized:
+                config = Config.get_instance()
+                if config.get_config_value('snapshots.enabled', False):
+                    if config.get_config_value('snapshots.backend', 'sqlite') == 'dynamodb':
+                        from src.collectors.streaming import region_key
+                        regions = [region_key(section.to_dict())
+                                   for section in config.get_config_value('collector.regions') or ()]
+                        _store = DynamoDBSnapshotStore(
+                            config.get_config_value('snapshots.dynamodb_table', 'youtube-snapshots'),
+                            region_name=config.get_config_value('aws.region', 'us-east-1'),
+                            endpoint_url=config.get_config_value('snapshots.dynamodb_endpoint_url'),
+                            regions=regions,
+                        )
+                    else:
+                        _store = SQLiteSnapshotStore(config.get_config_value('snapshots.path', 'temp/snapshots'))
+                _store_initialized = True
+    return _store
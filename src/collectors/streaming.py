@@ -0,0 +1,190 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from config import Config
+from src.collectors.dedup import SeenIndex
+from src.collectors.video_parser import is_short_record, parse_video_item
+from src.collectors.youtube_api import get_api_base_url, get_session, load_api_key, make_api_call
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+Page = List[Dict[str, Any]]
+Record = Dict[str, Any]
+
+_REGION_DONE = object()
+
+
+def region_key(region_config: Dict[str, str]) -> str:
+    """Build the REGION_lang key used in the collector results"""
+    return f"{region_config['region']}_{region_config['language']}"
+
+
+def page_source(region_config: Dict[str, str], api_key: Optional[str] = None,
+                session: Optional[requests.Session] = None, base_url: Optional[str] = None,
+                max_items: Optional[int] = None, part: str = 'snippet,statistics,contentDetails') -> Iterator[Page]:
+    """Yield mostPopular chart pages of one region as they land
+
+    The next page is only requested when the consumer asks for it, so a
+    downstream stage that stops pulling also stops the requests.
+    """
+    max_items = max_items or Config.get_instance().get_config_value('collector.max_items_per_region', 500)
+    url = f"{base_url or get_api_base_url()}/videos"
+    page_token = None
+    processed_videos = 0
+
+    while processed_videos < max_items:
+        params = {
+            'part': part,
+            'chart': 'mostPopular',
+            'regionCode': region_config.get('region'),
+            'relevanceLanguage': region_config.get('language'),
+            'maxResults': 50,
+            'pageToken': page_token,
+            'key': api_key
+        }
+        api_response = make_api_call(url, params, "GET", session=session)
+        if not api_response["success"]:
+            return
+        response_data = api_response["data"]
+        items = response_data.get('items') or []
+        processed_videos += len(items)
+        yield items
+        page_token = response_data.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def parse_stage(pages: Iterable[Page], key: str, seen_index: Optional[SeenIndex] = None,
+                parser: Callable[[Dict[str, Any]], Record] = parse_video_item) -> Iterator[Record]:
+    """Parse items page by page, skipping IDs repeated within the region"""
+    seen_index = seen_index if seen_index is not None else SeenIndex()
+    seen_ids = set()
+    metrics = get_metrics()
+    for items in pages:
+        records = []
+        with metrics.span('parse_page'):
+            for item in items:
+                video_id = item.get("id")
+                if video_id in seen_ids:
+                    continue
+                seen_ids.add(video_id)
+                record = seen_index.get_or_parse(item, key, parser)
+                if record:
+                    records.append(record)
+        metrics.incr('items_parsed', len(items))
+        yield from records
+
+
+def filter_stage(records: Iterable[Record],
+                 predicate: Callable[[Record], bool] = is_short_record) -> Iterator[Record]:
+    """Keep records matching predicate (Shorts duration range by default)"""
+    return (record for record in records if predicate(record))
+
+
+def take(records: Iterable[Record], limit: int) -> Iterator[Record]:
+    """Stop the chain after limit records, which also stops upstream page requests"""
+    if limit <= 0:
+        return
+    for count, record in enumerate(records, 1):
+        yield record
+        if count >= limit:
+            return
+
+
+def region_stream(region_config: Dict[str, str], target_per_region: int = 50,
+                  api_key: Optional[str] = None, session: Optional[requests.Session] = None,
+                  base_url: Optional[str] = None, seen_index: Optional[SeenIndex] = None,
+                  max_items: Optional[int] = None,
+                  predicate: Callable[[Record], bool] = is_short_record) -> Iterator[Record]:
+    """Source -> parse -> filter -> take chain for one region"""
+    pages = page_source(region_config, api_key or load_api_key(), session, base_url, max_items)
+    records = parse_stage(pages, region_key(region_config), seen_index)
+    return take(filter_stage(records, predicate), target_per_region)
+
+
+def stream_most_popular_videos(region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                               max_workers: Optional[int] = None, api_key: Optional[str] = None,
+                               session: Optional[requests.Session] = None,
+                               base_url: Optional[str] = None,
+                               seen_index: Optional[SeenIndex] = None,
+                               buffer_size: Optional[int] = None) -> Iterator[Tuple[str, Record]]:
+    """Yield (region_key, record) pairs from all regions as soon as each page is parsed
+
+    Each region's chain runs on a worker thread and hands records over through a
+    bounded queue. When the consumer falls behind, the queue fills and workers
+    block before requesting more pages, so memory stays bounded by buffer_size
+    plus one page per worker regardless of target_per_region. Closing the
+    generator early cancels the remaining work.
+    """
+    if not region_configs:
+        return
+
+    config = Config.get_instance()
+    api_key = api_key or load_api_key()
+    session = session or get_session()
+    seen_index = seen_index if seen_index is not None else SeenIndex()
+    max_workers = max_workers or config.get_config_value('collector.max_workers', 8)
+    max_workers = max(1, min(max_workers, len(region_configs)))
+    buffer_size = buffer_size or config.get_config_value('collector.stream_buffer_size', 500)
+
+    records: 'queue.Queue' = queue.Queue(maxsize=buffer_size)
+    cancelled = threading.Event()
+
+    def put(entry) -> bool:
+        while not cancelled.is_set():
+            try:
+                records.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(region_config: Dict[str, str]):
+        key = region_key(region_config)
+        logger.info("Beginning Processing the Region %s", region_config)
+        error = None
+        try:
+            for record in region_stream(region_config, target_per_region, api_key, session,
+                                        base_url, seen_index):
+                if not put((key, record)):
+                    return
+        except Exception as e:
+            error = e
+        finally:
+            put((_REGION_DONE, (region_config, error)))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collector')
+    try:
+        for region_config in region_configs:
+            executor.submit(produce, region_config)
+
+        remaining = len(region_configs)
+        while remaining:
+            key, value = records.get()
+            if key is _REGION_DONE:
+                remaining -= 1
+                region_config, error = value
+                if error is not None:
+                    logger.error("Region %s failed: %s", region_config, error)
+                else:
+                    logger.info("Ending Processing the Region %s", region_config)
+                continue
+            yield key, value
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def collect_into_dict(stream: Iterable[Tuple[str, Record]],
+                      region_order: Optional[Iterable[str]] = None) -> Dict[str, List[Record]]:
+    """Sink that groups a record stream into the {"REGION_lang": [videos]} shape"""
+    results: Dict[str, List[Record]] = {key: [] for key in region_order or ()}
+    for key, record in stream:
+        results.setdefault(key, []).append(record)
+    return {key: videos for key, videos in results.items() if videos}
@@ -0,0 +1,88 @@
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIN_SHORT_SECONDS = 5
+MAX_SHORT_SECONDS = 60
+
+# The shapes the API returns for nearly every video (PT45S, PT1M5S, PT1H2M3S)
+_SIMPLE_DURATION = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
+
+
+def parse_duration_seconds(duration: str) -> Optional[float]:
+    """Parse an ISO-8601 duration into seconds, or None if it is not a valid duration"""
+    match = _SIMPLE_DURATION.fullmatch(duration) if isinstance(duration, str) else None
+    if match is not None and match.lastindex is not None:
+        hours, minutes, seconds = match.groups()
+        return float(int(hours or 0) * 3600 + int(minutes or 0) * 60 + int(seconds or 0))
+
+    # Day components, fractional seconds and other rare shapes
+    import isodate
+
+    try:
+        return isodate.parse_duration(duration).total_seconds()
+    except (TypeError, isodate.ISO8601Error):
+        return None
+
+
+def is_short_duration(duration: str) -> bool:
+    """Whether an ISO-8601 duration falls in the Shorts range"""
+    duration_in_seconds = parse_duration_seconds(duration)
+    return duration_in_seconds is not None and MIN_SHORT_SECONDS < duration_in_seconds < MAX_SHORT_SECONDS
+
+
+def is_short_record(record: Dict[str, Any]) -> bool:
+    """Whether a parsed record's duration falls in the Shorts range"""
+    return MIN_SHORT_SECONDS < record.get("durationInSeconds", 0.0) < MAX_SHORT_SECONDS
+
+
+def parse_video_details(item: Dict[str, Any], duration_in_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Flatten a videos.list item into a record without filtering on duration"""
+    snippet = item.get("snippet", {})
+    content_details = item.get("contentDetails", {})
+    statistics = item.get("statistics", {})
+    if duration_in_seconds is None:
+        duration_in_seconds = parse_duration_seconds(content_details.get("duration", "")) or 0.0
+
+    return {
+        "id": item.get("id", ""),
+        "publishedAt": snippet.get("publishedAt", ""),
+        "channelId": snippet.get("channelId", ""),
+        "title": snippet.get("title", ""),
+        "channelTitle": snippet.get("channelTitle", ""),
+        "description": snippet.get("description", ""),
+        "tags": snippet.get("tags", ""),
+        "durationInSeconds": duration_in_seconds,
+        "dimension": content_details.get("dimension", ""),
+        "definition": content_details.get("definition", ""),
+        "caption": content_details.get("caption", ""),
+        "licensedContent": content_details.get("licensedContent", ""),
+        "viewCount": statistics.get("viewCount", ""),
+        "likeCount": statistics.get("likeCount", ""),
+        "favoriteCount": statistics.get("favoriteCount", ""),
+        "commentCount": statistics.get("commentCount", ""),
+    }
+
+
+def parse_video_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse a videos.list item into a flat record, or {} if it is not a Short"""
+    duration_in_seconds = parse_duration_seconds(item.get("contentDetails", {}).get("duration", ""))
+    if duration_in_seconds is None or not MIN_SHORT_SECONDS < duration_in_seconds < MAX_SHORT_SECONDS:
+        return {}
+    return parse_video_details(item, duration_in_seconds)
+
+
+def parse_video_page(items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse a page of videos.list items into records, dropping non-Shorts
+
+    Durations are checked before anything else is extracted, so rejected
+    items cost one regex match.
+    """
+    records = []
+    for item in items:
+        duration_in_seconds = parse_duration_seconds(item.get("contentDetails", {}).get("duration", ""))
+        if duration_in_seconds is not None and MIN_SHORT_SECONDS < duration_in_seconds < MAX_SHORT_SECONDS:
+            records.append(parse_video_details(item, duration_in_seconds))
+    return records
@@ -0,0 +1,222 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from src.collectors.credentials import CredentialPool, get_credential_pool
+from src.collectors.quota import QuotaExhaustedError, QuotaScheduler, get_quota_scheduler
+from src.collectors.response_cache import ResponseCache, get_response_cache
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_size: int = 10) -> requests.Session:
+    """Create a Session that keeps up to pool_size keep-alive connections per host"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the shared pooled session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = Config.get_instance().get_config_value('collector.pool_size', 10)
+                _session = build_session(pool_size)
+    return _session
+
+
+def get_api_base_url() -> str:
+    """Get the YouTube Data API base URL (overridable for local stub servers)"""
+    base_url = Config.get_instance().get_config_value('youtube.api_base_url', DEFAULT_API_BASE_URL)
+    return (base_url or DEFAULT_API_BASE_URL).rstrip('/')
+
+
+def load_api_key() -> Optional[str]:
+    """Load the YouTube API key from the config file"""
+    return Config.get_instance().get_config_value('youtube.apiKey')
+
+
+def error_reason(response: requests.Response) -> Optional[str]:
+    """The Data API's error reason (e.g. quotaExceeded, keyInvalid) from an error response"""
+    try:
+        error = response.json().get('error') or {}
+    except ValueError:
+        return None
+    if not isinstance(error, dict):
+        return None
+    for detail in error.get('errors') or ():
+        if detail.get('reason'):
+            return detail['reason']
+    for detail in error.get('details') or ():
+        if detail.get('reason'):
+            return detail['reason']
+    return error.get('status')
+
+
+def quota_units_charged() -> int:
+    """Quota units this process has been charged for API calls, over every pooled key
+
+    Fresh response-cache hits are not charged; a call retried on another key
+    after a quota or auth error is charged to both keys.
+    """
+    pool = get_credential_pool()
+    if pool is not None:
+        return sum(credential.scheduler.units_charged for credential in pool.credentials)
+    return get_quota_scheduler().units_charged
+
+
+def make_api_call(url: str, params: Dict[str, Any], method: str = "GET",
+                  session: Optional[requests.Session] = None,
+                  timeout: Optional[float] = None,
+                  endpoint: str = 'videos.list',
+                  quota: Optional[QuotaScheduler] = None,
+                  cache: Optional[ResponseCache] = None,
+                  credentials: Optional[CredentialPool] = None) -> Dict[str, Any]:
+    """Make an API call over the pooled session and return a structured response
+
+    GET calls go through the response cache when one is configured: a fresh
+    entry is served without a request, otherwise its ETag is sent as
+    If-None-Match and a 304 reply returns the cached body. Every request that is
+    actually sent is charged to the quota scheduler first; when the daily budget
+    cannot cover it the call is not made and a failed response is returned.
+
+    Calls with a 'key' param go through the credential pool when
+    youtube.api_keys is configured: the key is chosen (and charged) by the
+    pool, and a quota or auth error retries the call on the next key. Failed
+    responses carry the HTTP status and the API's error reason when known.
+    """
+    session = session or get_session()
+    metrics = get_metrics()
+    is_get = method.upper() != "POST"
+    cache = (cache or get_response_cache()) if is_get else None
+    if timeout is None:
+        timeout = Config.get_instance().get_config_value('collector.request_timeout', 5)
+    if credentials is None and 'key' in params:
+        credentials = get_credential_pool()
+
+    cached_entry = cache.lookup(url, params) if cache else None
+    if cached_entry and cached_entry['fresh']:
+        cache.record_hit(cached_entry)
+        metrics.incr('cache_hits', cache='response', tier='fresh')
+        return {
+            "success": True,
+            "data": cached_entry["data"]
+        }
+
+    for _ in range(len(credentials) if credentials else 1):
+        credential = None
+        try:
+            if credentials:
+                credential = credentials.acquire(endpoint)
+                params = dict(params, key=credential.key)
+            else:
+                (quota or get_quota_scheduler()).acquire(endpoint)
+        except QuotaExhaustedError as e:
+            logger.error(str(e))
+            return {
+                "success": False,
+                "error": "Quota exhausted",
+                "data": None
+            }
+
+        result = _send(session, url, params, is_get, timeout, endpoint, cache, cached_entry)
+        if credential is None or result["success"] or not credentials.report_failure(credential, result.get("reason")):
+            return result
+    return result
+
+
+def _send(session: requests.Session, url: str, params: Dict[str, Any], is_get: bool, timeout: float,
+          endpoint: str, cache: Optional[ResponseCache], cached_entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send one already-charged request and turn the reply into a structured response"""
+    metrics = get_metrics()
+    try:
+        with metrics.span('api_call', endpoint=endpoint):
+            if is_get:
+                headers = {'If-None-Match': cached_entry['etag']} if cached_entry else None
+                response = session.get(url, params=params, headers=headers, timeout=timeout)
+            else:
+                response = session.post(url, data=params, timeout=timeout)
+        metrics.incr('api_received_bytes', len(response.content), endpoint=endpoint)
+        if cached_entry and response.status_code == 304:
+            cache.record_hit(cached_entry)
+            metrics.incr('cache_hits', cache='response', tier='etag')
+            return {
+                "success": True,
+                "data": cached_entry["data"]
+            }
+        if response.status_code >= 400:
+            reason = error_reason(response)
+            logger.error("API Call failed: %s %s for %s", response.status_code, reason or response.reason, endpoint)
+            metrics.incr('api_errors', endpoint=endpoint, reason=reason or str(response.status_code))
+            return {
+                "success": False,
+                "error": f"{response.status_code} {reason or response.reason}",
+                "status": response.status_code,
+                "reason": reason,
+                "data": None
+            }
+        data = response.json()
+        if cache:
+            cache.record_miss()
+            metrics.incr('cache_misses', cache='response')
+            cache.store_response(url, params, response.headers.get('ETag') or data.get('etag'),
+                                 data, len(response.content))
+        return {
+            "success": True,
+            "data": data
+        }
+    except requests.exceptions.Timeout:
+        logger.warning("Request timed out for %s", url)
+        metrics.incr('api_errors', endpoint=endpoint, reason='timeout')
+        return {
+            "success": False,
+            "error": "Request timeout",
+            "data": None
+        }
+    except requests.exceptions.RequestException as e:
+        logger.error("API Call failed: %s", e)
+        metrics.incr('api_errors', endpoint=endpoint, reason='request')
+        return {
+            "success": False,
+            "error": str(e),
+            "data": None
+        }
+
+
+MAX_IDS_PER_CALL = 50
+
+
+def fetch_videos_by_id(video_ids: List[str], part: str, api_key: Optional[str] = None,
+                       session: Optional[requests.Session] = None,
+                       base_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Fetch videos.list items for explicit IDs, 50 IDs per call"""
+    api_key = api_key or load_api_key()
+    url = f"{base_url or get_api_base_url()}/videos"
+    items = []
+    for start in range(0, len(video_ids), MAX_IDS_PER_CALL):
+        params = {
+            'part': part,
+            'id': ','.join(video_ids[start:start + MAX_IDS_PER_CALL]),
+            'maxResults': MAX_IDS_PER_CALL,
+            'key': api_key
+        }
+        api_response = make_api_call(url, params, "GET", session=session)
+        if not api_response["success"]:
+            logger.error("Batch lookup of %s IDs stopped early: %s", len(video_ids), api_response['error'])
+            break
+        items.extend(api_response["data"].get("items") or [])
+    return items
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from config import Config
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every cached intermediate after a change in how they are produced
+KEY_VERSION = 1
+# ffmpeg muxer names for suffixes that differ from them
+MUXERS = {'.mkv': 'matroska', '.m4a': 'mp4', '.aac': 'adts'}
+# Shared metric names (and dimensions) each per-cache stat is also reported under
+STAT_METRICS = {
+    'local_hits': ('cache_hits', {'tier': 'local'}),
+    'remote_hits': ('cache_hits', {'tier': 'remote'}),
+    'misses': ('cache_misses', {}),
+    'bytes_saved': ('cache_saved_bytes', {}),
+    'bytes_stored': ('cache_stored_bytes', {}),
+    'produce_seconds': ('cache_produce_seconds', {}),
+}
+
+
+def content_key(kind: str, **parts: Any) -> str:
+    """Hash a kind plus its canonicalized parameters into a cache key"""
+    raw = json.dumps([KEY_VERSION, kind, parts], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's bytes, remembered per (path, mtime, size) so sources hash once"""
+    stat = os.stat(path)
+    stamp = (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(stamp)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with _digests_lock:
+            _digests[stamp] = digest
+    return digest
+
+
+def tts_key(text: str, voice: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Key for synthesized narration: same text, voice and settings give the same audio"""
+    return content_key('tts', text=' '.join(text.split()), voice=voice, params=params or {})
+
+
+def clip_key(source_path: str, filter_graph: str, output_args: Sequence[str] = ()) -> str:
+    """Key for a transcoded clip: the source's content hash plus how it was processed"""
+    return content_key('clip', source=file_digest(source_path), filter_graph=filter_graph,
+                       output_args=list(output_args))
+
+
+class LocalBlobStore:
+    """Cached files in a local directory, evicted least-recently-used past max_bytes"""
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024 ** 3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, Tuple[Path, int]]' = OrderedDict()
+        self._total_bytes = 0
+        entries = []
+        for path in self.root.glob('*/*'):
+            if path.name.endswith('.tmp'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.name.split('.', 1)[0], path, stat.st_size))
+        for _, key, path, size in sorted(entries):
+            self._index[key] = (path, size)
+            self._total_bytes += size
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / key[:2] / f'{key}{suffix}'
+
+    def get(self, key: str, suffix: str = '') -> Optional[Path]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None:
+                self._index.move_to_end(key)
+        path = entry[0] if entry is not None else self._path(key, suffix)
+        try:
+            # mtime carries the LRU order across restarts and worker processes
+            os.utime(path)
+        except FileNotFoundError:
+            if entry is not None:
+                with self._lock:
+                    if self._index.pop(key, None) is not None:
+                        self._total_bytes -= entry[1]
+            return None
+        if entry is None:
+            # Stored by another process sharing the directory
+            size = path.stat().st_size
+            with self._lock:
+                if key not in self._index:
+                    self._index[key] = (path, size)
+                    self._total_bytes += size
+                    self._evict()
+        return path
+
+    def put(self, key: str, source: Path, suffix: str = '') -> Path:
+        """Move a finished file into the store"""
+        path = self._path(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = source.stat().st_size
+        os.replace(source, path)
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._index[key] = (path, size)
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    def staging_path(self, key: str, suffix: str = '') -> Path:
+        """Temporary path next to the final location, so put() is an atomic rename"""
+        path = self._path(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            _, (path, size) = self._index.popitem(last=False)
+            self._total_bytes -= size
+            path.unlink(missing_ok=True)
+
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+class S3BlobStore:
+    """Shared second tier in S3; object lifetime is bounded by a lifecycle rule on the prefix"""
+
+    def __init__(self, bucket: str, prefix: str = 'asset-cache/', region_name: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', region_name=region_name)
+
+    def _key(self, key: str, suffix: str) -> str:
+        return f'{self.prefix}{key[:2]}/{key}{suffix}'
+
+    def download(self, key: str, suffix: str, destination: Path) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self._client.download_file(self.bucket, self._key(key, suffix), str(destination))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def upload(self, key: str, suffix: str, source: Path):
+        self._client.upload_file(str(source), self.bucket, self._key(key, suffix))
+
+
+class AssetCache:
+    """Content-addressed cache of generated intermediates (TTS audio, transcoded clips)
+
+    Lookups try the local disk tier, then the optional S3 tier (downloading
+    into the local tier on a hit), and only then produce the file. Stats are
+    kept per run: hits per tier, misses, bytes served from cache instead of
+    being regenerated, and seconds spent producing on misses.
+    """
+
+    def __init__(self, local: LocalBlobStore, remote: Optional[S3BlobStore] = None):
+        self.local = local
+        self.remote = remote
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'local_hits': 0, 'remote_hits': 0, 'misses': 0,
+                           'bytes_saved': 0, 'bytes_stored': 0, 'produce_seconds': 0.0}
+
+    def _count(self, name: str, value=1):
+        with self._lock:
+            self._stats[name] += value
+        metric, dimensions = STAT_METRICS[name]
+        get_metrics().incr(metric, value, cache='asset', **dimensions)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def lookup(self, key: str, suffix: str = '') -> Optional[Path]:
+        """Local path of a cached entry, fetching it from S3 if only the remote tier has it"""
+        path = self.local.get(key, suffix)
+        if path is not None:
+            self._count('local_hits')
+            self._count('bytes_saved', path.stat().st_size)
+            return path
+        if self.remote is not None:
+            staging = self.local.staging_path(key, suffix)
+            try:
+                if self.remote.download(key, suffix, staging):
+                    path = self.local.put(key, staging, suffix)
+                    self._count('remote_hits')
+                    self._count('bytes_saved', path.stat().st_size)
+                    return path
+            except Exception as e:
+                logger.warning("S3 asset cache lookup failed for %s: %s", key, e)
+            finally:
+                staging.unlink(missing_ok=True)
+        return None
+
+    def get_or_create(self, key: str, produce: Callable[[Path], None], suffix: str = '') -> Path:
+        """Cached file for key, calling produce(path) to write it on a miss
+
+        Concurrent requests for the same key in this process produce it once.
+        """
+        with self._key_lock(key):
+            path = self.lookup(key, suffix)
+            if path is not None:
+                return path
+            self._count('misses')
+            staging = self.local.staging_path(key, suffix)
+            start = time.perf_counter()
+            try:
+                produce(staging)
+                self._count('produce_seconds', time.perf_counter() - start)
+                path = self.local.put(key, staging, suffix)
+            finally:
+                staging.unlink(missing_ok=True)
+            self._count('bytes_stored', path.stat().st_size)
+            if self.remote is not None:
+                try:
+                    self.remote.upload(key, suffix, path)
+                except Exception as e:
+                    logger.warning("S3 asset cache upload failed for %s: %s", key, e)
+            return path
+
+    def synthesize_speech(self, text: str, voice: str, synthesize: Callable[[str, str, Dict[str, Any], Path], None],
+                          params: Optional[Dict[str, Any]] = None, suffix: str = '.wav') -> Path:
+        """Narration audio for text, synthesized by the TTS backend only on a miss"""
+        params = params or {}
+        return self.get_or_create(tts_key(text, voice, params),
+                                  lambda path: synthesize(text, voice, params, path), suffix)
+
+    def transcode_clip(self, source_path: str, filter_graph: str, output_args: Sequence[str] = (),
+                       suffix: str = '.mp4', ffmpeg_path: str = 'ffmpeg') -> Path:
+        """source_path run through an ffmpeg filter graph, transcoded once per distinct input"""
+        def produce(path: Path):
+            command = [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y', '-i', source_path,
+                       '-vf', filter_graph, *output_args, '-f', MUXERS.get(suffix, suffix.lstrip('.')), str(path)]
+            subprocess.run(command, capture_output=True, check=True)
+
+        return self.get_or_create(clip_key(source_path, filter_graph, output_args), produce, suffix)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['local_hits'] + stats['remote_hits']
+        total = hits + stats['misses']
+        stats['hits'] = hits
+        stats['hit_ratio'] = round(hits / total, 3) if total else 0.0
+        stats['produce_seconds'] = round(stats['produce_seconds'], 3)
+        stats['local_bytes'] = self.local.total_bytes()
+        return stats
+
+
+_cache: Optional[AssetCache] = None
+_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache() -> Optional[AssetCache]:
+    """Get the shared asset cache from the asset_cache config section, or None if disabled"""
+    global _cache, _cache_initialized
+    if not _cache_initialized:
+        with _cache_lock:
+            if not _cache_initialized:
+                config = Config.get_instance()
+                if config.get_config_value('asset_cache.enabled', False):
+                    local = LocalBlobStore(
+                        config.get_config_value('asset_cache.path', 'temp/asset_cache'),
+                        config.get_config_value('asset_cache.max_bytes', 2 * 1024 ** 3),
+                    )
+                    remote = None
+                    if config.get_config_value('asset_cache.backend', 'disk') == 's3':
+                        remote = S3BlobStore(
+                            config.get_config_value('aws.s3_bucket'),
+                            config.get_config_value('asset_cache.s3_prefix', 'asset-cache/'),
+                            region_name=config.get_config_value('aws.region', 'us-east-1'),
+                        )
+                    _cache = AssetCache(local, remote)
+                _cache_initialized = True
+    return _cache
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import Config
+from src.generators.asset_cache import AssetCache, get_asset_cache, tts_key
+from src.telemetry.metrics import get_metrics
+from src.telemetry.structured_logging import LazyJson
+
+logger = logging.getLogger(__name__)
+
+
+def write_wav(path: Path, pcm: bytes, sample_rate: int, channels: int = 1):
+    """Wrap 16-bit PCM in a WAV container"""
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+
+
+class SpeechBackend:
+    """Turns narration text into a WAV file at the given path"""
+
+    name = 'base'
+
+    def params(self) -> Dict[str, Any]:
+        """Settings that change the audio, so they are part of the cache key"""
+        return {}
+
+    def synthesize(self, text: str, voice: str, params: Dict[str, Any], path: Path):
+        raise NotImplementedError
+
+
+class SyntheticSpeechBackend(SpeechBackend):
+    """Deterministic offline backend: one short tone per word, pitched by the word's hash
+
+    latency_per_word simulates a TTS service's cost, for benchmarks.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, sample_rate: int = 16000, word_seconds: float = 0.3, latency_per_word: float = 0.0):
+        self.sample_rate = sample_rate
+        self.word_seconds = word_seconds
+        self.latency_per_word = latency_per_word
+
+    def params(self):
+        return {'sample_rate': self.sample_rate, 'word_seconds': self.word_seconds}
+
+    def synthesize(self, text, voice, params, path):
+        words = text.split()
+        if self.latency_per_word:
+            time.sleep(self.latency_per_word * len(words))
+        t = np.arange(int(self.sample_rate * self.word_seconds), dtype=np.float32) / self.sample_rate
+        envelope = np.sin(np.pi * t / self.word_seconds)
+        tones = []
+        for word in words:
+            seed = int.from_bytes(hashlib.sha256(f'{voice}:{word}'.encode('utf-8')).digest()[:2], 'big')
+            tones.append(0.3 * 32767 * envelope * np.sin(2 * np.pi * (150 + seed % 250) * t))
+        pcm = np.concatenate(tones).astype(np.int16) if tones else np.zeros(0, dtype=np.int16)
+        write_wav(path, pcm.tobytes(), self.sample_rate)
+
+
+class PollyBackend(SpeechBackend):
+    """Narration from Amazon Polly, as 16-bit PCM wrapped in WAV"""
+
+    name = 'polly'
+
+    def __init__(self, engine: str = 'neural', sample_rate: int = 16000, region_name: Optional[str] = None):
+        import boto3
+        self.engine = engine
+        self.sample_rate = sample_rate
+        self._client = boto3.client('polly', region_name=region_name)
+
+    def params(self):
+        return {'engine': self.engine, 'sample_rate': self.sample_rate}
+
+    def synthesize(self, text, voice, params, path):
+        response = self._client.synthesize_speech(Text=text, VoiceId=voice, Engine=self.engine,
+                                                  OutputFormat='pcm', SampleRate=str(self.sample_rate))
+        write_wav(path, response['AudioStream'].read(), self.sample_rate)
+
+
+SPEECH_BACKENDS: Dict[str, Callable[[Config], SpeechBackend]] = {
+    'synthetic': lambda config: SyntheticSpeechBackend(),
+    'polly': lambda config: PollyBackend(
+        engine=config.get_config_value('narration.polly_engine', 'neural'),
+        region_name=config.get_config_value('aws.region', 'us-east-1'),
+    ),
+}
+
+
+class NarrationGenerator:
+    """Narration audio for generated scripts, synthesized through the asset cache
+
+    Identical text with the same voice and backend settings is synthesized
+    once and then served from the cache, locally or from S3, by later runs
+    and other Lambda containers. Without a cache every narration is
+    synthesized into output_dir. last_report holds the call's numbers,
+    including the cache's hit ratio and bytes saved.
+    """
+
+    def __init__(self, backend: SpeechBackend, voice: str, cache: Optional[AssetCache] = None,
+                 output_dir: str = 'temp/narration', max_workers: int = 4):
+        self.backend = backend
+        self.voice = voice
+        self.cache = cache
+        self.output_dir = Path(output_dir)
+        self.max_workers = max(1, max_workers)
+        self.last_report: Dict[str, Any] = {}
+
+    def _narrate(self, text: str) -> str:
+        params = self.backend.params()
+        if self.cache is not None:
+            return str(self.cache.synthesize_speech(text, self.voice, self.backend.synthesize, params))
+        path = self.output_dir / f'{tts_key(text, self.voice, params)}.wav'
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+            self.backend.synthesize(text, self.voice, params, tmp_path)
+            tmp_path.replace(path)
+        return str(path)
+
+    def narrate(self, texts: Iterable[str]) -> List[str]:
+        """WAV path per text, in order"""
+        start = time.perf_counter()
+        texts = list(texts)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(texts) or 1),
+                                thread_name_prefix='narration') as pool:
+            paths = list(pool.map(self._narrate, texts))
+        seconds = time.perf_counter() - start
+        self.last_report = {
+            'narrations': len(texts),
+            'backend': self.backend.name,
+            'seconds': round(seconds, 3),
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+        get_metrics().observe('narration', seconds, backend=self.backend.name)
+        logger.info("Narration: %s", LazyJson(self.last_report))
+        return paths
+
+
+_generator: Optional[NarrationGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_narration_generator() -> NarrationGenerator:
+    """Get the shared narration generator from the narration config section"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                config = Config.get_instance()
+                backend_name = config.get_config_value('narration.backend', 'synthetic')
+                if backend_name not in SPEECH_BACKENDS:
+                    raise ValueError(f"Unknown narration backend '{backend_name}'; known: {sorted(SPEECH_BACKENDS)}")
+                _generator = NarrationGenerator(
+                    SPEECH_BACKENDS[backend_name](config),
+                    config.get_config_value('narration.voice', 'Joanna'),
+                    cache=get_asset_cache(),
+                    output_dir=config.get_config_value('narration.output_path', 'temp/narration'),
+                    max_workers=config.get_config_value('narration.max_workers', 4),
+                )
+    return _generator
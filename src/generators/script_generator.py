@@ -0,0 +1,409 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+from src.generators.asset_cache import content_key
+from src.telemetry.metrics import get_metrics
+from src.telemetry.structured_logging import LazyJson
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = (
+    "Write a script for a YouTube Short of 30 to 45 seconds.\n"
+    "Topic: {topic}\n"
+    "Region: {region}\n"
+    "Keywords: {keywords}\n"
+    "Structure: a one-line hook, three short beats, and a call to action."
+)
+
+
+def build_prompt(brief: Dict[str, Any]) -> str:
+    """Prompt for one content brief from the generate stage"""
+    return PROMPT_TEMPLATE.format(
+        topic=brief.get('source_title', ''),
+        region=brief.get('region', ''),
+        keywords=', '.join(brief.get('keywords') or ()) or 'none',
+    )
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form for memoization: NFC, trimmed lines, collapsed whitespace"""
+    prompt = unicodedata.normalize('NFC', prompt)
+    return '\n'.join(' '.join(line.split()) for line in prompt.strip().splitlines() if line.strip())
+
+
+def prompt_key(prompt: str, backend: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Memo key: the same normalized prompt on the same backend settings gives the same script"""
+    return content_key('script', prompt=normalize_prompt(prompt), backend=backend, params=params or {})
+
+
+class ScriptBackend:
+    """Turns prompts into scripts; generate_batch gets at most max_batch_size prompts per call"""
+
+    name = 'base'
+    max_batch_size = 1
+
+    def params(self) -> Dict[str, Any]:
+        """Settings that change the output, so they are part of the memo key"""
+        return {}
+
+    def generate_batch(self, prompts: Sequence[str]) -> List[str]:
+        raise NotImplementedError
+
+
+class TemplateBackend(ScriptBackend):
+    """Deterministic offline backend: fills script templates from the prompt's fields
+
+    The same prompt always gives the same script. call_latency and
+    prompt_latency simulate a remote model's per-request and per-prompt cost,
+    for benchmarks.
+    """
+
+    name = 'template'
+    max_batch_size = 64
+
+    HOOKS = (
+        "Nobody is talking about this: {topic}.",
+        "You scrolled past {topic} today. Here's why it blew up.",
+        "Three seconds to explain {topic}. Go.",
+        "This is the fastest way to understand {topic}.",
+    )
+    BEATS = (
+        "It started with {keyword}.",
+        "Then everyone noticed {keyword}.",
+        "The twist: {keyword} changes everything.",
+        "Watch what happens with {keyword}.",
+    )
+    CALLS = (
+        "Follow for the next one.",
+        "Comment which part surprised you.",
+        "Share this with someone who needs it.",
+    )
+
+    def __init__(self, call_latency: float = 0.0, prompt_latency: float = 0.0):
+        self.call_latency = call_latency
+        self.prompt_latency = prompt_latency
+
+    def _script(self, prompt: str) -> str:
+        fields = {}
+        for line in prompt.splitlines():
+            name, sep, value = line.partition(':')
+            if sep:
+                fields[name.strip().lower()] = value.strip()
+        topic = fields.get('topic') or 'this'
+        keywords = [word.strip() for word in fields.get('keywords', '').split(',')
+                    if word.strip() and word.strip() != 'none'] or [topic]
+        seed = int.from_bytes(hashlib.sha256(prompt.encode('utf-8')).digest()[:8], 'big')
+        beats = [self.BEATS[(seed + i) % len(self.BEATS)].format(keyword=keywords[i % len(keywords)])
+                 for i in range(3)]
+        return '\n'.join([self.HOOKS[seed % len(self.HOOKS)].format(topic=topic), *beats,
+                          self.CALLS[(seed >> 16) % len(self.CALLS)]])
+
+    def generate_batch(self, prompts):
+        if self.call_latency or self.prompt_latency:
+            time.sleep(self.call_latency + self.prompt_latency * len(prompts))
+        return [self._script(prompt) for prompt in prompts]
+
+
+class BedrockBackend(ScriptBackend):
+    """Scripts from a text model on Amazon Bedrock, one request per prompt
+
+    Bedrock has no multi-prompt request, so a batch is one call per prompt;
+    the generator's worker pool provides the concurrency.
+    """
+
+    name = 'bedrock'
+    max_batch_size = 1
+
+    def __init__(self, model_id: str, region_name: Optional[str] = None, max_tokens: int = 400,
+                 temperature: float = 0.7):
+        import boto3
+        if not model_id:
+            raise ValueError("scripts.bedrock_model_id is required for the bedrock backend")
+        self.model_id = model_id
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self._client = boto3.client('bedrock-runtime', region_name=region_name)
+
+    def params(self):
+        return {'model_id': self.model_id, 'max_tokens': self.max_tokens, 'temperature': self.temperature}
+
+    def generate_batch(self, prompts):
+        scripts = []
+        for prompt in prompts:
+            response = self._client.converse(
+                modelId=self.model_id,
+                messages=[{'role': 'user', 'content': [{'text': prompt}]}],
+                inferenceConfig={'maxTokens': self.max_tokens, 'temperature': self.temperature},
+            )
+            content = response['output']['message']['content']
+            scripts.append(''.join(block.get('text', '') for block in content).strip())
+        return scripts
+
+
+BACKENDS: Dict[str, Callable[[Config], ScriptBackend]] = {
+    'template': lambda config: TemplateBackend(),
+    'bedrock': lambda config: BedrockBackend(
+        config.get_config_value('scripts.bedrock_model_id'),
+        region_name=config.get_config_value('aws.region', 'us-east-1'),
+        max_tokens=config.get_config_value('scripts.max_tokens', 400),
+        temperature=config.get_config_value('scripts.temperature', 0.7),
+    ),
+}
+
+
+def register_backend(name: str, factory: Callable[[Config], ScriptBackend]):
+    """Make a backend selectable through scripts.backend"""
+    BACKENDS[name] = factory
+
+
+class SQLiteScriptMemo:
+    """Generated scripts by prompt key in a local SQLite file, expiring after ttl_seconds"""
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS scripts ('
+                         ' key TEXT PRIMARY KEY, script TEXT NOT NULL, created_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS scripts_created_at ON scripts (created_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        found = {}
+        cutoff = time.time() - self.ttl_seconds
+        with self._connect() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found.update(conn.execute(
+                    f'SELECT key, script FROM scripts WHERE created_at >= ? AND key IN ({",".join("?" * len(chunk))})',
+                    (cutoff, *chunk)).fetchall())
+        return found
+
+    def put_many(self, scripts: Dict[str, str]):
+        """Store scripts and drop the expired ones in the same transaction"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM scripts WHERE created_at < ?', (now - self.ttl_seconds,))
+            conn.executemany('INSERT OR REPLACE INTO scripts (key, script, created_at) VALUES (?, ?, ?)',
+                             [(key, script, now) for key, script in scripts.items()])
+
+    def evict_expired(self) -> int:
+        with self._connect() as conn:
+            return conn.execute('DELETE FROM scripts WHERE created_at < ?',
+                                (time.time() - self.ttl_seconds,)).rowcount
+
+
+class DynamoDBScriptMemo:
+    """Generated scripts shared by every Lambda invocation
+
+    The table needs a string partition key named ``pk``; DynamoDB's TTL on the
+    ``expires_at`` attribute deletes old entries, and reads skip entries that
+    have expired but not been deleted yet.
+    """
+
+    def __init__(self, table_name: str, ttl_seconds: float = 86400, region_name: Optional[str] = None,
+                 endpoint_url: Optional[str] = None):
+        import boto3
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self._client = boto3.client('dynamodb', region_name=region_name, endpoint_url=endpoint_url)
+
+    def get_many(self, keys):
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), 100):
+            request = {self.table_name: {'Keys': [{'pk': {'S': f'script#{key}'}} for key in keys[start:start + 100]],
+                                         'ProjectionExpression': 'pk, script, expires_at'}}
+            while request:
+                response = self._client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table_name, ()):
+                    if float(item['expires_at']['N']) > now:
+                        found[item['pk']['S'].split('#', 1)[1]] = item['script']['S']
+                request = response.get('UnprocessedKeys') or None
+        return found
+
+    def put_many(self, scripts):
+        expires_at = str(int(time.time() + self.ttl_seconds))
+        items = [{'PutRequest': {'Item': {'pk': {'S': f'script#{key}'}, 'script': {'S': script},
+                                          'expires_at': {'N': expires_at}}}}
+                 for key, script in scripts.items()]
+        for start in range(0, len(items), 25):
+            request = {self.table_name: items[start:start + 25]}
+            while request:
+                request = self._client.batch_write_item(RequestItems=request).get('UnprocessedItems') or None
+
+    def evict_expired(self) -> int:
+        return 0
+
+
+def build_script_memo(config: Optional[Config] = None):
+    """Script memo from the scripts config section, or None when memoization is off"""
+    config = config or Config.get_instance()
+    ttl_seconds = config.get_config_value('scripts.ttl_seconds', 86400)
+    backend = config.get_config_value('scripts.memo_backend', 'sqlite')
+    if not ttl_seconds or not backend:
+        return None
+    if backend == 'dynamodb':
+        return DynamoDBScriptMemo(
+            config.get_config_value('scripts.memo_table', 'script-memo'),
+            ttl_seconds,
+            region_name=config.get_config_value('aws.region', 'us-east-1'),
+            endpoint_url=config.get_config_value('scripts.memo_endpoint_url'),
+        )
+    return SQLiteScriptMemo(config.get_config_value('scripts.memo_path', 'temp/script_memo.sqlite3'), ttl_seconds)
+
+
+class ScriptGenerator:
+    """Generate scripts for many briefs at once: memo lookups first, then concurrent backend batches
+
+    Identical prompts within a call are generated once. Misses are grouped
+    into batches of batch_size (capped at the backend's max_batch_size) and
+    the batches run on max_workers threads. A failed batch is retried up to
+    max_retries times with exponential backoff; the scripts of the batches
+    that succeeded are memoized even when another batch still fails, so a
+    retried call does not pay for them twice. Each call's numbers are kept
+    in last_report.
+    """
+
+    def __init__(self, backend: ScriptBackend, memo=None, batch_size: int = 8, max_workers: int = 4,
+                 max_retries: int = 2, retry_base_delay: float = 1.0):
+        self.backend = backend
+        self.memo = memo
+        self.batch_size = max(1, min(batch_size, backend.max_batch_size))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.last_report: Dict[str, Any] = {}
+
+    def _run_batches(self, batches: List[List[str]], prompts: Dict[str, str]) -> Tuple[Dict[str, str], int]:
+        """Scripts for every batch and the number of batch retries; raises if some batches still fail
+
+        The scripts of the batches that did succeed are memoized before raising.
+        """
+        scripts: Dict[str, str] = {}
+        pending = batches
+        error: Optional[Exception] = None
+        retries = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches)),
+                                thread_name_prefix='scripts') as pool:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    delay = self.retry_base_delay * 2 ** (attempt - 1)
+                    logger.warning("%s script batches failed, retrying in %.1fs: %s", len(pending), delay, error)
+                    get_metrics().incr('retries', len(pending), operation='scripts')
+                    retries += len(pending)
+                    time.sleep(delay)
+                futures = {pool.submit(self.backend.generate_batch, [prompts[key] for key in batch]): batch
+                           for batch in pending}
+                failed = []
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        result = list(future.result())
+                        if len(result) != len(batch):
+                            raise ValueError(f"{self.backend.name} returned {len(result)} scripts "
+                                             f"for a batch of {len(batch)} prompts")
+                        scripts.update(zip(batch, result))
+                    except Exception as e:
+                        error = e
+                        failed.append(batch)
+                pending = failed
+                if not pending:
+                    break
+
+        if self.memo is not None and scripts:
+            try:
+                self.memo.put_many(scripts)
+            except Exception as e:
+                logger.warning("Failed to store generated scripts: %s", e)
+        if pending:
+            raise RuntimeError(f"{len(pending)} of {len(batches)} script batches failed after "
+                               f"{self.max_retries} retries: {error}") from error
+        return scripts, retries
+
+    def generate(self, briefs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Script per brief, in order: {'id', 'prompt_key', 'script', 'cached'}"""
+        start = time.perf_counter()
+        briefs = list(briefs)
+        prompts = [build_prompt(brief) for brief in briefs]
+        params = self.backend.params()
+        keys = [prompt_key(prompt, self.backend.name, params) for prompt in prompts]
+
+        unique = dict(zip(keys, prompts))
+        scripts: Dict[str, str] = {}
+        if self.memo is not None and unique:
+            try:
+                scripts.update(self.memo.get_many(list(unique)))
+            except Exception as e:
+                logger.warning("Script memo lookup failed, generating everything: %s", e)
+        cached = set(scripts)
+
+        missing = [key for key in unique if key not in scripts]
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        generate_start = time.perf_counter()
+        retries = 0
+        if batches:
+            generated, retries = self._run_batches(batches, unique)
+            scripts.update(generated)
+        generate_seconds = time.perf_counter() - generate_start
+
+        seconds = time.perf_counter() - start
+        self.last_report = {
+            'prompts': len(prompts),
+            'unique_prompts': len(unique),
+            'memo_hits': len(cached),
+            'generated': len(missing),
+            'batches': len(batches),
+            'retried_batches': retries,
+            'batch_size': self.batch_size,
+            'seconds': round(seconds, 4),
+            'generated_per_second': round(len(missing) / generate_seconds, 1) if missing else None,
+            'prompts_per_second': round(len(prompts) / seconds, 1) if seconds else None,
+        }
+        metrics = get_metrics()
+        metrics.incr('cache_hits', len(cached), cache='scripts')
+        metrics.incr('cache_misses', len(missing), cache='scripts')
+        metrics.observe('script_generation', generate_seconds, backend=self.backend.name)
+        logger.info("Scripts: %s", LazyJson(self.last_report))
+
+        return [
+            {'id': brief.get('id'), 'prompt_key': key, 'script': scripts[key], 'cached': key in cached}
+            for brief, key in zip(briefs, keys)
+        ]
+
+
+_generator: Optional[ScriptGenerator] = None
+_generator_lock = threading.Lock()
+
+
+def get_script_generator() -> ScriptGenerator:
+    """Get the shared script generator from the scripts config section"""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                config = Config.get_instance()
+                backend_name = config.get_config_value('scripts.backend', 'template')
+                if backend_name not in BACKENDS:
+                    raise ValueError(f"Unknown script backend '{backend_name}'; known: {sorted(BACKENDS)}")
+                _generator = ScriptGenerator(
+                    BACKENDS[backend_name](config),
+                    build_script_memo(config),
+                    batch_size=config.get_config_value('scripts.batch_size', 8),
+                    max_workers=config.get_config_value('scripts.max_workers', 4),
+                    max_retries=config.get_config_value('scripts.max_retries', 2),
+                    retry_base_delay=config.get_config_value('scripts.retry_base_delay', 1.0),
+                )
+    return _generator
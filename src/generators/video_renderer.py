@@ -0,0 +1,475 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from src.generators.asset_cache import get_asset_cache
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'synthetic:'
+# Asset cache counters summed over the jobs of a render_many call
+ASSET_CACHE_COUNTERS = ('local_hits', 'remote_hits', 'misses', 'bytes_saved', 'bytes_stored')
+AUDIO_CHANNELS = 2
+# Backgrounds are decoded taller than the frame so segments can pan over them
+PAN_HEADROOM = 1.15
+
+
+@dataclass
+class Segment:
+    """A stretch of the Short over one background, with an optional caption"""
+
+    background: str
+    duration: float
+    caption: str = ''
+
+
+@dataclass
+class RenderJob:
+    """One Short to render; asset references are file paths or synthetic: specs"""
+
+    job_id: str
+    output_path: str
+    segments: List[Segment]
+    music: Optional[str] = None
+    narration: Optional[str] = None
+    font: Optional[str] = None
+    width: int = 1080
+    height: int = 1920
+    fps: int = 30
+    sample_rate: int = 44100
+
+    @property
+    def duration(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+
+@dataclass
+class RenderSettings:
+    """Encoder settings shared by every worker process"""
+
+    ffmpeg_path: str = 'ffmpeg'
+    preset: str = 'veryfast'
+    crf: int = 23
+    threads_per_job: int = 1
+    audio_bitrate: str = '128k'
+    cache_bytes: int = 512 * 1024 * 1024
+    music_gain: float = 0.3
+    extra_output_args: Tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_config(cls, config: Optional[Config] = None) -> 'RenderSettings':
+        config = config or Config.get_instance()
+        return cls(
+            ffmpeg_path=config.get_config_value('generator.ffmpeg_path', 'ffmpeg'),
+            preset=config.get_config_value('generator.preset', 'veryfast'),
+            crf=config.get_config_value('generator.crf', 23),
+            threads_per_job=config.get_config_value('generator.threads_per_job', 1),
+            audio_bitrate=config.get_config_value('generator.audio_bitrate', '128k'),
+            cache_bytes=config.get_config_value('generator.asset_cache_bytes', 512 * 1024 * 1024),
+            music_gain=config.get_config_value('generator.music_gain', 0.3),
+        )
+
+
+def _synthetic_params(ref: str) -> List[str]:
+    return ref[len(SYNTHETIC_PREFIX):].split(':')
+
+
+def synthetic_background(spec: List[str], width: int, height: int) -> np.ndarray:
+    """Gradient background from a 'synthetic:gradient:<seed>' spec"""
+    rng = np.random.default_rng(int(spec[1]) if len(spec) > 1 else 0)
+    top, bottom = rng.integers(0, 256, 3), rng.integers(0, 256, 3)
+    ramp = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    rows = (top * (1 - ramp) + bottom * ramp).astype(np.uint8)
+    return np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (height, width, 3)))
+
+
+def synthetic_audio(spec: List[str], sample_rate: int, seconds: float = 8.0) -> np.ndarray:
+    """Stereo sine bed from a 'synthetic:tone:<hz>' spec"""
+    frequency = float(spec[1]) if len(spec) > 1 else 220.0
+    t = np.arange(int(sample_rate * seconds), dtype=np.float32) / sample_rate
+    wave = (0.4 * 32767 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+    return np.repeat(wave[:, None], AUDIO_CHANNELS, axis=1)
+
+
+def fit_filter(width: int, height: int) -> str:
+    """Scale to cover width x height, then crop the overflow"""
+    return f'scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}'
+
+
+def decode_image(ffmpeg_path: str, ref: str, width: int, height: int) -> np.ndarray:
+    """Decode and scale an image (or a video's first frame) to an RGB array"""
+    if ref.startswith(SYNTHETIC_PREFIX):
+        return synthetic_background(_synthetic_params(ref), width, height)
+    command = [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-i', ref, '-frames:v', '1',
+               '-vf', fit_filter(width, height), '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
+    result = subprocess.run(command, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(height, width, 3)
+
+
+def decode_audio(ffmpeg_path: str, ref: str, sample_rate: int) -> np.ndarray:
+    """Decode an audio file to interleaved int16 PCM at sample_rate"""
+    if ref.startswith(SYNTHETIC_PREFIX):
+        return synthetic_audio(_synthetic_params(ref), sample_rate)
+    command = [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-i', ref, '-vn',
+               '-f', 's16le', '-ac', str(AUDIO_CHANNELS), '-ar', str(sample_rate), 'pipe:1']
+    result = subprocess.run(command, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, AUDIO_CHANNELS)
+
+
+class DecodedAssetCache:
+    """In-memory LRU of decoded assets, bounded by bytes
+
+    Each worker process keeps one, so a background or music bed used by
+    several jobs is decoded once per process instead of once per render.
+    With an asset_cache, background clips are first cut down to a still at
+    the frame size through it, so a large source is transcoded once across
+    runs and processes rather than once per process.
+    """
+
+    def __init__(self, max_bytes: int, ffmpeg_path: str = 'ffmpeg', asset_cache=None):
+        self.max_bytes = max_bytes
+        self.ffmpeg_path = ffmpeg_path
+        self.asset_cache = asset_cache
+        self._entries: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._fonts: Dict[str, str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple, decode: Callable[[], np.ndarray]) -> np.ndarray:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = decode()
+        value.setflags(write=False)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self._bytes += value.nbytes
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return value
+
+    def _still(self, ref: str, width: int, height: int) -> str:
+        if self.asset_cache is None or ref.startswith(SYNTHETIC_PREFIX):
+            return ref
+        return str(self.asset_cache.transcode_clip(ref, fit_filter(width, height), ('-frames:v', '1'),
+                                                    suffix='.png', ffmpeg_path=self.ffmpeg_path))
+
+    def background(self, ref: str, width: int, height: int) -> np.ndarray:
+        return self._get(('image', ref, width, height),
+                         lambda: decode_image(self.ffmpeg_path, self._still(ref, width, height), width, height))
+
+    def asset_cache_counters(self) -> Dict[str, int]:
+        if self.asset_cache is None:
+            return {}
+        stats = self.asset_cache.stats()
+        return {name: stats[name] for name in ASSET_CACHE_COUNTERS}
+
+    def audio(self, ref: str, sample_rate: int) -> np.ndarray:
+        return self._get(('audio', ref, sample_rate),
+                         lambda: decode_audio(self.ffmpeg_path, ref, sample_rate))
+
+    def font(self, ref: str) -> str:
+        """Font files are handed to ffmpeg's drawtext by path; resolve and check once"""
+        with self._lock:
+            path = self._fonts.get(ref)
+            if path is not None:
+                self.hits += 1
+                return path
+            self.misses += 1
+        path = Path(ref).resolve()
+        if not path.is_file():
+            raise FileNotFoundError(f"Font not found: {ref}")
+        with self._lock:
+            self._fonts[ref] = str(path)
+        return str(path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries) + len(self._fonts), 'bytes': self._bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def _escape_drawtext(text: str) -> str:
+    """Escape caption text for drawtext, then for the filtergraph it sits in"""
+    text = ' '.join(text.split()).replace('\\', '\\\\').replace('%', '\\%')
+    value = "'" + text.replace("'", "'\\''") + "'"
+    return ''.join('\\' + char if char in "\\'[],;:" else char for char in value)
+
+
+def caption_filters(job: RenderJob, font_path: Optional[str]) -> List[str]:
+    """drawtext filters showing each segment's caption during that segment"""
+    filters = []
+    start = 0.0
+    for segment in job.segments:
+        end = start + segment.duration
+        if segment.caption:
+            options = [f"text={_escape_drawtext(segment.caption)}", 'fontcolor=white',
+                       f'fontsize={job.height // 28}', 'borderw=4', 'bordercolor=black',
+                       'x=(w-text_w)/2', 'y=h*0.72', f"enable=between(t\\,{start:.3f}\\,{end:.3f})"]
+            if font_path:
+                options.insert(0, f"fontfile={_escape_drawtext(font_path)}")
+            filters.append('drawtext=' + ':'.join(options))
+        start = end
+    return filters
+
+
+def build_ffmpeg_command(job: RenderJob, settings: RenderSettings, audio_input: str,
+                         font_path: Optional[str] = None) -> List[str]:
+    """ffmpeg reading raw RGB frames from stdin and s16le PCM from audio_input"""
+    command = [
+        settings.ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{job.width}x{job.height}',
+        '-r', str(job.fps), '-i', 'pipe:0',
+        '-f', 's16le', '-ar', str(job.sample_rate), '-ac', str(AUDIO_CHANNELS), '-i', audio_input,
+    ]
+    filters = caption_filters(job, font_path)
+    if filters:
+        command += ['-vf', ','.join(filters)]
+    command += [
+        '-c:v', 'libx264', '-preset', settings.preset, '-crf', str(settings.crf),
+        '-pix_fmt', 'yuv420p', '-threads', str(settings.threads_per_job),
+        '-c:a', 'aac', '-b:a', settings.audio_bitrate,
+        '-shortest', '-movflags', '+faststart', *settings.extra_output_args, job.output_path,
+    ]
+    return command
+
+
+def iter_frames(job: RenderJob, cache: DecodedAssetCache) -> Iterable[memoryview]:
+    """Raw frames of the whole job; each segment pans slowly down its background
+
+    Frames are row slices of the cached background, so they are handed to the
+    pipe without copying.
+    """
+    pan_height = int(job.height * PAN_HEADROOM)
+    for segment in job.segments:
+        background = cache.background(segment.background, job.width, pan_height)
+        frame_count = max(1, round(segment.duration * job.fps))
+        travel = pan_height - job.height
+        for index in range(frame_count):
+            offset = travel * index // max(1, frame_count - 1)
+            yield background[offset:offset + job.height].data
+
+
+def mix_audio(job: RenderJob, cache: DecodedAssetCache, music_gain: float) -> np.ndarray:
+    """Music bed looped to the job length, ducked under the narration when there is one"""
+    total = int(round(job.duration * job.sample_rate))
+    mix = np.zeros((total, AUDIO_CHANNELS), dtype=np.int32)
+    if job.music:
+        music = cache.audio(job.music, job.sample_rate)
+        if len(music):
+            gain = music_gain if job.narration else 1.0
+            mix += (np.resize(music, (total, AUDIO_CHANNELS)) * gain).astype(np.int32)
+    if job.narration:
+        narration = cache.audio(job.narration, job.sample_rate)[:total]
+        mix[:len(narration)] += narration
+    return np.clip(mix, -32768, 32767).astype(np.int16)
+
+
+def _write_all(stream, chunks: Iterable) -> Optional[BaseException]:
+    try:
+        for chunk in chunks:
+            stream.write(chunk)
+    except BrokenPipeError as e:
+        return e
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+    return None
+
+
+_worker_cache: Optional[DecodedAssetCache] = None
+_worker_settings: Optional[RenderSettings] = None
+
+
+def _init_worker(settings: RenderSettings):
+    global _worker_cache, _worker_settings
+    _worker_settings = settings
+    _worker_cache = DecodedAssetCache(settings.cache_bytes, settings.ffmpeg_path, get_asset_cache())
+
+
+def render_job(job: RenderJob, settings: Optional[RenderSettings] = None,
+               cache: Optional[DecodedAssetCache] = None) -> Dict[str, Any]:
+    """Render one Short with a single ffmpeg process fed entirely through pipes
+
+    Video frames go to ffmpeg's stdin. On POSIX the mixed audio goes through a
+    second pipe passed to ffmpeg as an inherited descriptor; Windows cannot
+    pass extra descriptors, so there the audio is staged in a temporary file.
+    """
+    settings = settings or _worker_settings or RenderSettings.from_config()
+    cache = cache or _worker_cache or DecodedAssetCache(settings.cache_bytes, settings.ffmpeg_path,
+                                                        get_asset_cache())
+    start = time.perf_counter()
+    counters_before = cache.asset_cache_counters()
+    staged_audio = None
+    try:
+        Path(job.output_path).parent.mkdir(parents=True, exist_ok=True)
+        font_path = cache.font(job.font) if job.font else None
+        audio = mix_audio(job, cache, settings.music_gain)
+        chunk = job.sample_rate * AUDIO_CHANNELS * 2
+        audio_bytes = audio.data.cast('B')
+        audio_chunks = (audio_bytes[offset:offset + chunk] for offset in range(0, len(audio_bytes), chunk))
+
+        if os.name == 'posix':
+            read_fd, write_fd = os.pipe()
+            command = build_ffmpeg_command(job, settings, f'pipe:{read_fd}', font_path)
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       pass_fds=(read_fd,))
+            os.close(read_fd)
+            audio_stream = os.fdopen(write_fd, 'wb')
+        else:
+            import tempfile
+            with tempfile.NamedTemporaryFile(suffix='.pcm', delete=False) as staged:
+                for piece in audio_chunks:
+                    staged.write(piece)
+            staged_audio = staged.name
+            command = build_ffmpeg_command(job, settings, staged_audio, font_path)
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            audio_stream, audio_chunks = None, ()
+
+        # Both inputs are fed at once; ffmpeg reads them interleaved and would
+        # stall on a full pipe if one were written after the other
+        stderr_chunks: List[bytes] = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        audio_writer = None
+        if audio_stream is not None:
+            audio_writer = threading.Thread(target=_write_all, args=(audio_stream, audio_chunks), daemon=True)
+            audio_writer.start()
+        frame_count = 0
+
+        def counted_frames():
+            nonlocal frame_count
+            for frame in iter_frames(job, cache):
+                frame_count += 1
+                yield frame
+
+        _write_all(process.stdin, counted_frames())
+        if audio_writer is not None:
+            audio_writer.join()
+        return_code = process.wait()
+        stderr_reader.join()
+        if return_code != 0:
+            message = b''.join(stderr_chunks).decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"ffmpeg exited with {return_code}: {message[-500:]}")
+
+        return {
+            "success": True,
+            "data": {
+                'job_id': job.job_id,
+                'output_path': job.output_path,
+                'frames': frame_count,
+                'duration': job.duration,
+                'render_seconds': time.perf_counter() - start,
+                'pid': os.getpid(),
+                'cache': cache.stats(),
+                'asset_cache': {name: value - counters_before[name]
+                                for name, value in cache.asset_cache_counters().items()},
+            }
+        }
+    except Exception as e:
+        logger.error("Render of %s failed: %s", job.job_id, e)
+        return {
+            "success": False,
+            "error": str(e),
+            "data": {'job_id': job.job_id},
+        }
+    finally:
+        if staged_audio:
+            Path(staged_audio).unlink(missing_ok=True)
+
+
+def default_worker_count() -> int:
+    configured = Config.get_instance().get_config_value('generator.render_workers')
+    return max(1, configured or os.cpu_count() or 1)
+
+
+class VideoRenderer:
+    """Render several Shorts at once over a pool of worker processes
+
+    Each worker runs one ffmpeg at a time with threads_per_job encoder
+    threads, so the pool (sized to the cores by default) rather than ffmpeg's
+    own threading provides the parallelism. Workers keep their DecodedAssetCache
+    between jobs.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, settings: Optional[RenderSettings] = None):
+        self.max_workers = max_workers or default_worker_count()
+        self.settings = settings or RenderSettings.from_config()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.last_report: Dict[str, Any] = {}
+
+    def check_ffmpeg(self) -> bool:
+        return shutil.which(self.settings.ffmpeg_path) is not None
+
+    def __enter__(self) -> 'VideoRenderer':
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                         initargs=(self.settings,))
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def render_many(self, jobs: Iterable[RenderJob]) -> List[Dict[str, Any]]:
+        """Render jobs concurrently; results come back in completion order"""
+        if self._pool is None:
+            with self:
+                return self.render_many(jobs)
+        # Jobs run in worker processes, so their timings are recorded here from the results
+        metrics = get_metrics()
+        start = time.perf_counter()
+        futures = {self._pool.submit(render_job, job): job for job in jobs}
+        results = []
+        asset_cache = dict.fromkeys(ASSET_CACHE_COUNTERS, 0)
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                job = futures[future]
+                logger.error("Render worker for %s died: %s", job.job_id, e)
+                result = {"success": False, "error": str(e), "data": {'job_id': job.job_id}}
+            if result['success']:
+                metrics.observe('render', result['data']['render_seconds'])
+                metrics.incr('render_frames', result['data']['frames'])
+                for name, value in result['data']['asset_cache'].items():
+                    asset_cache[name] += value
+            else:
+                metrics.incr('render_failures')
+            results.append(result)
+        # Workers count into their own asset caches; this is the sum for these jobs
+        hits = asset_cache['local_hits'] + asset_cache['remote_hits']
+        self.last_report = {
+            'jobs': len(results),
+            'failures': sum(1 for result in results if not result['success']),
+            'seconds': round(time.perf_counter() - start, 3),
+            'asset_cache': dict(asset_cache, hit_ratio=round(hits / (hits + asset_cache['misses']), 3)
+                                if hits + asset_cache['misses'] else 0.0),
+        }
+        logger.info("Rendered %s jobs: asset cache %s", self.last_report['jobs'], self.last_report['asset_cache'])
+        return results
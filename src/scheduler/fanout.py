@@ -0,0 +1,431 @@
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import Config
+from src.scheduler.pipeline import build_checkpoint_store, run_with_retries
+from src.telemetry.metrics import get_metrics
+from src.telemetry.structured_logging import LazyJson
+
+logger = logging.getLogger(__name__)
+
+# A received message: (receipt used to delete it, decoded body)
+Received = Tuple[str, Dict[str, Any]]
+SQS_BATCH_SIZE = 10
+SQS_MAX_WAIT_SECONDS = 20
+
+
+def shard(items: Sequence[Any], size: int) -> List[List[Any]]:
+    """Split items into consecutive shards of at most size items"""
+    size = max(1, size)
+    return [list(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def shard_key(run_id: str, shard_id: str) -> str:
+    """Result store key of one shard of a run"""
+    return f'{run_id}.{shard_id}'
+
+
+class InProcessQueue:
+    """Queue held in memory, for tests and single-process local runs
+
+    Received messages stay invisible for visibility_timeout seconds and come
+    back if they are not deleted by then, as on SQS.
+    """
+
+    def __init__(self, visibility_timeout: float = 900.0):
+        self.visibility_timeout = visibility_timeout
+        self._ready: deque = deque()
+        self._inflight: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._receipts = itertools.count()
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._ready) + len(self._inflight)
+
+    def send_many(self, messages: Sequence[Dict[str, Any]]):
+        with self._condition:
+            self._ready.extend(json.loads(json.dumps(message)) for message in messages)
+            self._condition.notify_all()
+
+    def _requeue_expired(self, now: float):
+        for receipt, (deadline, message) in list(self._inflight.items()):
+            if deadline <= now:
+                del self._inflight[receipt]
+                self._ready.append(message)
+
+    def receive(self, max_messages: int = 1, wait_seconds: float = 0.0) -> List[Received]:
+        deadline = time.monotonic() + wait_seconds
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._requeue_expired(now)
+                if self._ready or now >= deadline:
+                    break
+                self._condition.wait(min(deadline - now, 1.0))
+            received = []
+            while self._ready and len(received) < max_messages:
+                receipt = str(next(self._receipts))
+                message = self._ready.popleft()
+                self._inflight[receipt] = (now + self.visibility_timeout, message)
+                received.append((receipt, message))
+            return received
+
+    def delete(self, receipt: str):
+        with self._condition:
+            self._inflight.pop(receipt, None)
+
+
+class FileQueue:
+    """Queue backed by a local directory, shared by processes on the same machine
+
+    Every message is a JSON file in ready/. A receiver claims one by renaming
+    it into inflight/ under a name that starts with its visibility deadline;
+    the rename is atomic, so exactly one process gets each message. Claims
+    past their deadline are renamed back into ready/ by the next receive.
+    """
+
+    def __init__(self, path: str, visibility_timeout: float = 900.0, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._ready = self.path / 'ready'
+        self._inflight = self.path / 'inflight'
+        self._ready.mkdir(parents=True, exist_ok=True)
+        self._inflight.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(os.listdir(self._ready)) + len(os.listdir(self._inflight))
+
+    def send_many(self, messages: Sequence[Dict[str, Any]]):
+        for message in messages:
+            name = f'{time.time_ns():020d}-{uuid.uuid4().hex}.json'
+            tmp_path = self.path / f'{name}.tmp'
+            tmp_path.write_text(json.dumps(message, separators=(',', ':')), encoding='utf-8')
+            tmp_path.replace(self._ready / name)
+
+    def _requeue_expired(self):
+        now = time.time()
+        for receipt in os.listdir(self._inflight):
+            deadline, _, name = receipt.partition('.')
+            if int(deadline) / 1000 <= now:
+                try:
+                    os.rename(self._inflight / receipt, self._ready / name)
+                except FileNotFoundError:
+                    pass
+
+    def receive(self, max_messages: int = 1, wait_seconds: float = 0.0) -> List[Received]:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            self._requeue_expired()
+            received = []
+            for name in sorted(os.listdir(self._ready)):
+                receipt = f'{int((time.time() + self.visibility_timeout) * 1000)}.{name}'
+                try:
+                    os.rename(self._ready / name, self._inflight / receipt)
+                except FileNotFoundError:
+                    # Another receiver claimed it first
+                    continue
+                received.append((receipt, json.loads((self._inflight / receipt).read_text(encoding='utf-8'))))
+                if len(received) >= max_messages:
+                    break
+            if received or time.monotonic() >= deadline:
+                return received
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+
+    def delete(self, receipt: str):
+        (self._inflight / receipt).unlink(missing_ok=True)
+
+
+class SQSQueue:
+    """Amazon SQS queue; Lambda workers can also take its messages through an event source mapping"""
+
+    def __init__(self, queue_url: str, region_name: Optional[str] = None,
+                 visibility_timeout: Optional[int] = None):
+        import boto3
+        if not queue_url:
+            raise ValueError("fanout.queue_url is required for the sqs queue backend")
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self._client = boto3.client('sqs', region_name=region_name)
+
+    def send_many(self, messages: Sequence[Dict[str, Any]]):
+        for start in range(0, len(messages), SQS_BATCH_SIZE):
+            entries = [{'Id': str(index), 'MessageBody': json.dumps(message, separators=(',', ':'))}
+                       for index, message in enumerate(messages[start:start + SQS_BATCH_SIZE])]
+            response = self._client.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            if response.get('Failed'):
+                raise RuntimeError(f"SQS rejected {len(response['Failed'])} messages: "
+                                   f"{response['Failed'][0].get('Message')}")
+
+    def receive(self, max_messages: int = 1, wait_seconds: float = 0.0) -> List[Received]:
+        kwargs = {
+            'QueueUrl': self.queue_url,
+            'MaxNumberOfMessages': max(1, min(max_messages, SQS_BATCH_SIZE)),
+            'WaitTimeSeconds': int(min(wait_seconds, SQS_MAX_WAIT_SECONDS)),
+        }
+        if self.visibility_timeout is not None:
+            kwargs['VisibilityTimeout'] = int(self.visibility_timeout)
+        response = self._client.receive_message(**kwargs)
+        return [(message['ReceiptHandle'], json.loads(message['Body'])) for message in response.get('Messages', ())]
+
+    def delete(self, receipt: str):
+        self._client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt)
+
+
+_memory_queue: Optional[InProcessQueue] = None
+_memory_queue_lock = threading.Lock()
+
+
+def build_fanout_queue(config: Optional[Config] = None):
+    """Shard queue from the fanout config section
+
+    The memory backend is one queue per process, shared by the coordinator
+    and any workers running in it.
+    """
+    global _memory_queue
+    config = config or Config.get_instance()
+    backend = config.get_config_value('fanout.queue_backend', 'file')
+    visibility_timeout = config.get_config_value('fanout.visibility_timeout', 900)
+    if backend == 'sqs':
+        return SQSQueue(config.get_config_value('fanout.queue_url'),
+                        region_name=config.get_config_value('aws.region', 'us-east-1'),
+                        visibility_timeout=visibility_timeout)
+    if backend == 'memory':
+        with _memory_queue_lock:
+            if _memory_queue is None:
+                _memory_queue = InProcessQueue(visibility_timeout)
+        return _memory_queue
+    return FileQueue(config.get_config_value('fanout.queue_path', 'temp/fanout'), visibility_timeout)
+
+
+def collect_shard(payload: Dict[str, Any], **options: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """Collect the regions of one shard; options go to fetch_most_popular_videos"""
+    from src.collectors.popular_videos import fetch_most_popular_videos
+
+    return fetch_most_popular_videos(payload['regions'], payload['target_per_region'], **options)
+
+
+def render_shard(payload: Dict[str, Any], **options: Any) -> List[Dict[str, Any]]:
+    """Render the jobs of one shard one after another; options go to render_job"""
+    from src.generators.video_renderer import RenderJob, Segment, render_job
+
+    results = []
+    for job in payload['jobs']:
+        job = RenderJob(**dict(job, segments=[Segment(**segment) for segment in job['segments']]))
+        results.append(render_job(job, **options))
+    return results
+
+
+SHARD_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'collect': collect_shard,
+    'render': render_shard,
+}
+
+
+class FanoutWorker:
+    """Process shard messages and write each shard's result to the result store
+
+    Processing is idempotent: a shard whose result is already stored (a
+    redelivered message, or a coordinator retry) is acknowledged without
+    running it again. A shard that still fails after max_retries retries is
+    stored as failed, so the coordinator's barrier is not left waiting on it.
+    """
+
+    def __init__(self, queue=None, store=None, handlers: Optional[Dict[str, Callable]] = None,
+                 max_retries: int = 3, base_delay: float = 1.0):
+        self.queue = queue
+        self.store = store
+        self.handlers = handlers or SHARD_HANDLERS
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    def process(self, message: Dict[str, Any]) -> str:
+        """Run one shard unless its result exists; returns completed, failed or skipped"""
+        key = shard_key(message['run_id'], message['shard_id'])
+        if self.store.load(key) is not None:
+            logger.info("Shard %s already has a result, skipping it", key)
+            get_metrics().incr('fanout_shards', status='skipped')
+            return 'skipped'
+
+        handler = self.handlers[message['kind']]
+        start = time.perf_counter()
+        result = {'kind': message['kind'], 'worker': f'{socket.gethostname()}:{os.getpid()}'}
+        try:
+            with get_metrics().span('fanout_shard', kind=message['kind']):
+                output, attempts = run_with_retries(lambda: handler(message['payload']), self.max_retries,
+                                                    self.base_delay, f"Shard {key}")
+            result.update(status='completed', attempts=attempts, output=output)
+        except Exception as e:
+            logger.error("Shard %s failed: %s", key, e)
+            result.update(status='failed', error=str(e))
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        self.store.save(key, result)
+        get_metrics().incr('fanout_shards', status=result['status'])
+        return result['status']
+
+    def run(self, idle_seconds: float = 5.0, max_messages: Optional[int] = None,
+            remaining_time: Optional[Callable[[], float]] = None, time_margin: float = 30.0) -> Dict[str, int]:
+        """Poll the queue until it stays empty for idle_seconds; returns counts per outcome"""
+        counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+        while max_messages is None or sum(counts.values()) < max_messages:
+            if remaining_time is not None and remaining_time() < time_margin:
+                logger.warning("Worker stopping: not enough time left for another shard")
+                break
+            received = self.queue.receive(1, idle_seconds)
+            if not received:
+                break
+            for receipt, message in received:
+                counts[self.process(message)] += 1
+                self.queue.delete(receipt)
+        return counts
+
+    def handle_records(self, records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Process the messages of an SQS event source invocation
+
+        Returns the partial batch response, so only messages whose result
+        could not be stored are delivered again.
+        """
+        failures = []
+        for record in records:
+            try:
+                self.process(json.loads(record['body']))
+            except Exception as e:
+                logger.error("Could not process message %s: %s", record.get('messageId'), e)
+                failures.append({'itemIdentifier': record.get('messageId')})
+        return {'batchItemFailures': failures}
+
+
+class FanoutCoordinator:
+    """Scatter shards over the queue and gather their results with a barrier
+
+    scatter() records the shard IDs of a run in a manifest next to the
+    results, so a retried coordinator invocation with the same run ID only
+    waits again instead of sending the shards twice. gather() polls the
+    result store until every shard has a result, the timeout passes, or the
+    remaining time falls under the margin.
+    """
+
+    def __init__(self, queue, store, poll_interval: float = 1.0, timeout: float = 600.0,
+                 remaining_time: Optional[Callable[[], float]] = None, time_margin: float = 30.0):
+        self.queue = queue
+        self.store = store
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.remaining_time = remaining_time
+        self.time_margin = time_margin
+        self.last_report: Dict[str, Any] = {}
+
+    def scatter(self, run_id: str, kind: str, payloads: Sequence[Dict[str, Any]]) -> List[str]:
+        """Send one message per payload not yet sent for this run; returns the shard IDs"""
+        shard_ids = [f'{kind}-{index:04d}' for index in range(len(payloads))]
+        manifest_key = shard_key(run_id, f'{kind}-manifest')
+        manifest = self.store.load(manifest_key)
+        if manifest and manifest.get('shards') == shard_ids:
+            logger.info("Run %s: %s %s shards were already sent, gathering them", run_id, len(shard_ids), kind)
+            return shard_ids
+        messages = [
+            {'run_id': run_id, 'shard_id': shard_id, 'kind': kind, 'payload': payload}
+            for shard_id, payload in zip(shard_ids, payloads)
+            if self.store.load(shard_key(run_id, shard_id)) is None
+        ]
+        self.queue.send_many(messages)
+        self.store.save(manifest_key, {'shards': shard_ids, 'sent_at': time.time()})
+        logger.info("Run %s: sent %s of %s %s shards", run_id, len(messages), len(shard_ids), kind)
+        return shard_ids
+
+    def gather(self, run_id: str, shard_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Wait for the results of shard_ids; shards without one by the deadline are left out"""
+        deadline = time.monotonic() + self.timeout
+        pending = list(shard_ids)
+        results: Dict[str, Dict[str, Any]] = {}
+        while True:
+            for shard_id in list(pending):
+                result = self.store.load(shard_key(run_id, shard_id))
+                if result is not None:
+                    results[shard_id] = result
+                    pending.remove(shard_id)
+            if not pending or time.monotonic() >= deadline:
+                break
+            if self.remaining_time is not None and self.remaining_time() < self.time_margin:
+                logger.warning("Run %s: not enough time left to wait for %s shards", run_id, len(pending))
+                break
+            time.sleep(self.poll_interval)
+        return results
+
+    def run(self, run_id: str, kind: str, payloads: Sequence[Dict[str, Any]]) -> List[Any]:
+        """Scatter payloads, wait for all of them and return the completed outputs in shard order
+
+        Raises TimeoutError when some shards have no result yet; running the
+        same run ID again picks the wait up where it stopped.
+        """
+        start = time.perf_counter()
+        shard_ids = self.scatter(run_id, kind, payloads)
+        results = self.gather(run_id, shard_ids)
+        missing = [shard_id for shard_id in shard_ids if shard_id not in results]
+        failed = {shard_id: result.get('error') for shard_id, result in results.items()
+                  if result.get('status') != 'completed'}
+        self.last_report = {
+            'kind': kind,
+            'shards': len(shard_ids),
+            'completed': len(results) - len(failed),
+            'failed': failed,
+            'missing': missing,
+            'workers': len({result.get('worker') for result in results.values()}),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        logger.info("Run %s fan-out: %s", run_id, LazyJson(self.last_report))
+        if missing:
+            raise TimeoutError(f"{len(missing)} of {len(shard_ids)} {kind} shards of run {run_id} "
+                               f"did not finish in time")
+        return [results[shard_id]['output'] for shard_id in shard_ids if shard_id not in failed]
+
+    def collect(self, run_id: str, region_configs: List[Dict[str, str]], target_per_region: int = 50,
+                regions_per_shard: int = 8) -> Dict[str, List[Dict[str, Any]]]:
+        """fetch_most_popular_videos over the workers, regions_per_shard regions per message"""
+        payloads = [{'regions': regions, 'target_per_region': target_per_region}
+                    for regions in shard(region_configs, regions_per_shard)]
+        merged: Dict[str, List[Dict[str, Any]]] = {}
+        for output in self.run(run_id, 'collect', payloads):
+            merged.update(output)
+        return merged
+
+    def render(self, run_id: str, jobs: Sequence[Any], jobs_per_shard: int = 1) -> List[Dict[str, Any]]:
+        """render_job over the workers for RenderJob instances; results in job order"""
+        payloads = [{'jobs': [asdict(job) for job in chunk]} for chunk in shard(jobs, jobs_per_shard)]
+        return [result for output in self.run(run_id, 'render', payloads) for result in output]
+
+
+def build_fanout_worker(config: Optional[Config] = None) -> FanoutWorker:
+    """Worker over the configured queue and result store"""
+    config = config or Config.get_instance()
+    return FanoutWorker(
+        build_fanout_queue(config),
+        build_checkpoint_store(config),
+        max_retries=config.get_config_value('pipeline.max_retries', 3),
+        base_delay=config.get_config_value('pipeline.retry_base_delay', 1.0),
+    )
+
+
+def build_fanout_coordinator(config: Optional[Config] = None,
+                             remaining_time: Optional[Callable[[], float]] = None) -> FanoutCoordinator:
+    """Coordinator over the configured queue and result store"""
+    config = config or Config.get_instance()
+    return FanoutCoordinator(
+        build_fanout_queue(config),
+        build_checkpoint_store(config),
+        poll_interval=config.get_config_value('fanout.poll_interval', 1.0),
+        timeout=config.get_config_value('fanout.gather_timeout_seconds', 600),
+        remaining_time=remaining_time,
+        time_margin=config.get_config_value('pipeline.time_margin_seconds', 30),
+    )
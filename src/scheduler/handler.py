@@ -1,78 +1,140 @@
 import json
 import logging
 import os
-from datetime import datetime
-import boto3
 import sys
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+
+# Heavy dependencies (boto3, requests, isodate, numpy) are imported on first
+# use so a cold start only pays for what the invocation actually needs
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
 
 from config import Config
 
-def setup_logging():
-    """Configure logging based on configuration settings"""
-    config = Config.get_instance()
-    
-    # Create log folder if needed (local environment)
-    if config.should_create_log_folder and config.log_file_path:
-        from pathlib import Path
-        log_path = Path(config.log_file_path)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Get handlers based on configuration
-    handlers = []
-    
-    if config.log_handler == 'file' and config.log_file_path:
-        # File handler for local development
-        handlers.append(logging.FileHandler(config.log_file_path, encoding='utf-8'))
-    
-    if config.log_handler == 'console' or config.environment == 'production':
-        # Console handler (always include for production/Lambda)
-        handlers.append(logging.StreamHandler())
-    
-    # Configure logging
-    logging.basicConfig(
-        level=getattr(logging, config.log_level),
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=handlers,
-        force=True  # Override any existing configuration
-    )
-
-# Initialize configuration and logging
-setup_logging()
 logger = logging.getLogger(__name__)
 
+_logging_configured = False
+_logging_lock = threading.Lock()
+
+
+def ensure_logging():
+    """Configure logging once per container instead of once per invocation"""
+    global _logging_configured
+    if not _logging_configured:
+        with _logging_lock:
+            if not _logging_configured:
+                from src.telemetry.structured_logging import setup_logging
+
+                setup_logging()
+                _logging_configured = True
+
+
+@lru_cache(maxsize=None)
+def get_aws_client(service: str, region_name: str):
+    """boto3 client cached at module scope, so warm containers reuse it"""
+    import boto3
+
+    return boto3.client(service, region_name=region_name)
+
+
+def pipeline_run_id(event) -> str:
+    """Run ID for checkpoints: stable across Lambda retries of the same event
+
+    An explicit run_id wins, then the EventBridge event id; otherwise the
+    current scheduler period, so a manual re-run inside the period resumes.
+    """
+    event = event or {}
+    if event.get('run_id') or event.get('id'):
+        return str(event.get('run_id') or event.get('id'))
+    period = int(Config.get_instance().get_config_value('scheduler.frequency_hours', 6)) * 3600
+    now = int(datetime.now(timezone.utc).timestamp())
+    return datetime.fromtimestamp(now - now % period, timezone.utc).strftime('run-%Y%m%dT%H%M')
+
+
+def is_sqs_event(event) -> bool:
+    records = (event or {}).get('Records') if isinstance(event, dict) else None
+    return bool(records) and records[0].get('eventSource') == 'aws:sqs'
+
+
+def worker_handler(event, context):
+    """Fan-out worker: process shard messages delivered by SQS, or poll the queue until it is empty"""
+    from src.scheduler.fanout import build_fanout_worker
+
+    config = Config.get_instance()
+    worker = build_fanout_worker(config)
+    if is_sqs_event(event):
+        return worker.handle_records(event['Records'])
+
+    remaining_time = None
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        remaining_time = lambda: context.get_remaining_time_in_millis() / 1000
+    counts = worker.run(idle_seconds=config.get_config_value('fanout.worker_idle_seconds', 5),
+                        remaining_time=remaining_time,
+                        time_margin=config.get_config_value('pipeline.time_margin_seconds', 30))
+    logger.info("Fan-out worker done: %s", counts)
+    return {'statusCode': 200, 'body': json.dumps({'status': 'success', 'shards': counts})}
+
+
 def lambda_handler(event, context):
-    """Main scheduler handler with configuration-based setup"""
+    """Main scheduler handler with configuration-based setup
+
+    SQS events and events with "mode": "worker" go to the fan-out worker;
+    everything else runs the pipeline, which shards collection over the
+    workers when fanout.enabled is set.
+    """
     
+    ensure_logging()
     config = Config.get_instance()
     
+    if is_sqs_event(event) or (isinstance(event, dict) and event.get('mode') == 'worker'):
+        try:
+            return worker_handler(event, context)
+        finally:
+            from src.telemetry.metrics import flush_metrics
+            from src.telemetry.structured_logging import flush_logging
+
+            flush_metrics()
+            flush_logging()
+    
     try:
         logger.info("VIRAL SHORTS PIPELINE STARTED")
-        logger.info(f"Environment: {config.environment}")
-        logger.info(f"Triggered at: {datetime.now().isoformat()}")
-        logger.info(f"Event: {json.dumps(event, indent=2)}")
+        logger.info("Environment: %s", config.environment)
+        logger.info("Triggered at: %s", datetime.now().isoformat())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Event: %s", json.dumps(event))
         
         # Get AWS configuration from config system
         aws_region = config.get_config_value('aws.region', 'us-east-1')
         timeout = config.get_config_value('aws.timeout', 30)
         
-        # Test AWS connection with configured settings
-        try:
-            events_client = boto3.client('events', region_name=aws_region)
-            logger.info("SUCCESS: AWS connection successful")
-            logger.debug(f"AWS region: {aws_region}, timeout: {timeout}")
-        except Exception as aws_error:
-            logger.error(f"ERROR: AWS connection failed: {aws_error}")
-            raise
+        # The lean handler skips the eager client check; outside it the
+        # client is built once per container and reused by warm invocations
+        if not config.get_config_value('scheduler.lean_handler', True):
+            try:
+                get_aws_client('events', aws_region)
+                logger.info("SUCCESS: AWS client ready")
+                logger.debug("AWS region: %s, timeout: %s", aws_region, timeout)
+            except Exception as aws_error:
+                logger.error("ERROR: AWS client setup failed: %s", aws_error)
+                raise
         
         # Get pipeline configuration
         max_retries = config.get_config_value('pipeline.max_retries', 3)
         batch_size = config.get_config_value('pipeline.batch_size', 10)
         
+        from src.scheduler.pipeline import run_pipeline
+        
+        remaining_time = None
+        if hasattr(context, 'get_remaining_time_in_millis'):
+            remaining_time = lambda: context.get_remaining_time_in_millis() / 1000
+        run = run_pipeline(pipeline_run_id(event), (event or {}).get('stages'), remaining_time)
+        
         pipeline_status = {
-            'status': 'success',
+            'status': 'success' if run['status'] == 'completed' else run['status'],
             'timestamp': datetime.now().isoformat(),
             'environment': config.environment,
             'config': {
@@ -80,19 +142,25 @@ def lambda_handler(event, context):
                 'batch_size': batch_size,
                 'aws_region': aws_region
             },
-            'message': f'Scheduler running successfully in {config.environment} environment'
+            'pipeline': run,
+            'message': f"Pipeline run {run['run_id']} {run['status']} in {config.environment} environment"
         }
         
-        logger.info("SUCCESS: Pipeline completed successfully")
-        logger.debug(f"Pipeline config: retries={max_retries}, batch_size={batch_size}")
+        if run['status'] == 'completed':
+            logger.info("SUCCESS: Pipeline completed successfully")
+        else:
+            logger.warning("Pipeline run %s %s: %s", run['run_id'], run['status'], run['stages'])
+        logger.debug("Pipeline config: retries=%s, batch_size=%s", max_retries, batch_size)
         
+        # 202: stopped early to stay inside the Lambda timeout; re-invoke with the same run_id to resume
+        status_code = {'completed': 200, 'incomplete': 202}.get(run['status'], 500)
         return {
-            'statusCode': 200,
+            'statusCode': status_code,
             'body': json.dumps(pipeline_status)
         }
         
     except Exception as e:
-        logger.error(f"ERROR: Pipeline failed: {str(e)}")
+        logger.error("ERROR: Pipeline failed: %s", e)
         return {
             'statusCode': 500,
             'body': json.dumps({
@@ -102,6 +170,13 @@ def lambda_handler(event, context):
                 'environment': config.environment
             })
         }
+    finally:
+        from src.telemetry.metrics import flush_metrics
+        from src.telemetry.structured_logging import flush_logging
+
+        flush_metrics()
+        # The container is frozen once the handler returns, so drain the log writer first
+        flush_logging()
 
 # For local testing
 if __name__ == "__main__":
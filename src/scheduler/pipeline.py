@@ -0,0 +1,477 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+DEFAULT_STAGES = ('collect', 'analyze', 'generate', 'upload')
+
+
+def run_with_retries(fn: Callable[[], Any], max_retries: int = 3, base_delay: float = 1.0,
+                     description: str = 'call', give_up_on: Tuple[type, ...] = ()) -> Tuple[Any, int]:
+    """Call fn, retrying failures with exponential backoff; returns (result, attempts)
+
+    Exceptions in give_up_on are raised immediately, e.g. an exhausted quota
+    that no amount of waiting within this invocation will fix.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(), attempt
+        except give_up_on:
+            raise
+        except Exception as e:
+            if attempt > max_retries:
+                raise
+            get_metrics().incr('retries', operation='pipeline')
+            delay = base_delay * 2 ** (attempt - 1)
+            logger.warning("%s failed (attempt %s/%s), retrying in %.1fs: %s",
+                           description, attempt, max_retries + 1, delay, e)
+            time.sleep(delay)
+
+
+class LocalCheckpointStore:
+    """Checkpoints as JSON files in a local directory"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, run_id: str) -> Path:
+        return self.path / f'{run_id}.json'
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(run_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, run_id: str, checkpoint: Dict[str, Any]):
+        path = self._file(run_id)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, separators=(',', ':'))
+        tmp_path.replace(path)
+
+
+class S3CheckpointStore:
+    """Checkpoints as S3 objects, so a retried Lambda invocation sees them"""
+
+    def __init__(self, bucket: str, prefix: str = 'checkpoints/', region_name: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', region_name=region_name)
+
+    def load(self, run_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=f'{self.prefix}{run_id}.json')
+        except self._client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def save(self, run_id: str, checkpoint: Dict[str, Any]):
+        self._client.put_object(Bucket=self.bucket, Key=f'{self.prefix}{run_id}.json',
+                                Body=json.dumps(checkpoint, separators=(',', ':')).encode('utf-8'),
+                                ContentType='application/json')
+
+
+def build_checkpoint_store(config: Optional[Config] = None):
+    """Checkpoint store from the pipeline config section"""
+    config = config or Config.get_instance()
+    if config.get_config_value('pipeline.checkpoint_backend', 'disk') == 's3':
+        return S3CheckpointStore(
+            config.get_config_value('aws.s3_bucket'),
+            config.get_config_value('pipeline.checkpoint_s3_prefix', 'checkpoints/'),
+            region_name=config.get_config_value('aws.region', 'us-east-1'),
+        )
+    return LocalCheckpointStore(config.get_config_value('pipeline.checkpoint_path', 'temp/checkpoints'))
+
+
+@dataclass
+class Stage:
+    """A pipeline step; run receives a StageContext and returns a JSON-serializable output"""
+
+    name: str
+    run: Callable[['StageContext'], Any]
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageContext:
+    """What a running stage sees: its dependencies' outputs and batched fan-out"""
+
+    executor: 'PipelineExecutor'
+    stage: str
+    inputs: Dict[str, Any]
+    failed_items: List[Dict[str, Any]] = field(default_factory=list)
+
+    def map(self, fn: Callable[[Any], Any], items: Sequence[Any],
+            key: Callable[[Any], str] = lambda item: item['id']) -> List[Any]:
+        """Run fn over items concurrently, batch_size at a time, each with retries
+
+        Results are checkpointed after every batch, so a resumed run only
+        processes the items that had not finished. Items that still fail after
+        their retries are left out of the result and reported in the stage status.
+        """
+        executor = self.executor
+        done = executor.partial_results(self.stage)
+        pending = [item for item in items if key(item) not in done]
+        if len(pending) < len(items):
+            logger.info("%s: resuming, %s of %s items already done", self.stage, len(items) - len(pending), len(items))
+
+        def attempt(item):
+            with get_metrics().span('stage_item', stage=self.stage):
+                result, _ = run_with_retries(lambda: fn(item), executor.max_retries, executor.base_delay,
+                                             f"{self.stage} item {key(item)}", executor.give_up_on)
+            return result
+
+        for start in range(0, len(pending), executor.batch_size):
+            batch = pending[start:start + executor.batch_size]
+            futures = [(item, executor.pool.submit(attempt, item)) for item in batch]
+            for item, future in futures:
+                try:
+                    done[key(item)] = future.result()
+                except Exception as e:
+                    logger.error("%s: item %s failed: %s", self.stage, key(item), e)
+                    self.failed_items.append({'id': key(item), 'error': str(e)})
+            executor.save_partial(self.stage, done)
+        return [done[key(item)] for item in items if key(item) in done]
+
+
+class PipelineExecutor:
+    """Run a DAG of stages, checkpointing after each one
+
+    Stages whose dependencies are satisfied run concurrently. A finished
+    stage's output is written to the checkpoint store under the run ID; running
+    the same run ID again (a retried Lambda invocation after a timeout) restores
+    finished stages instead of recomputing them. No new stage is started once
+    the remaining time falls under the configured margin.
+    """
+
+    def __init__(self, stages: Sequence[Stage], store=None, max_retries: int = 3,
+                 base_delay: float = 1.0, batch_size: int = 10, max_workers: int = 4,
+                 remaining_time: Optional[Callable[[], float]] = None, time_margin: float = 30.0,
+                 give_up_on: Tuple[type, ...] = ()):
+        self.stages = {stage.name: stage for stage in stages}
+        self.store = store
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.remaining_time = remaining_time
+        self.time_margin = time_margin
+        self.give_up_on = give_up_on
+        self._lock = threading.Lock()
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.run_id: Optional[str] = None
+        self.checkpoint: Dict[str, Any] = {}
+
+    def partial_results(self, stage: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.checkpoint['partial'].get(stage, {}))
+
+    def save_partial(self, stage: str, results: Dict[str, Any]):
+        with self._lock:
+            self.checkpoint['partial'][stage] = dict(results)
+            self._save()
+
+    def _save(self):
+        if self.store is not None:
+            try:
+                self.store.save(self.run_id, self.checkpoint)
+            except Exception as e:
+                logger.error("Could not save checkpoint for run %s: %s", self.run_id, e)
+
+    def _load(self, run_id: str) -> Dict[str, Any]:
+        checkpoint = None
+        if self.store is not None:
+            try:
+                checkpoint = self.store.load(run_id)
+            except Exception as e:
+                logger.error("Could not load checkpoint for run %s, starting over: %s", run_id, e)
+        if not checkpoint or checkpoint.get('version') != CHECKPOINT_VERSION:
+            checkpoint = {'version': CHECKPOINT_VERSION, 'run_id': run_id, 'stages': {}, 'partial': {}}
+        return checkpoint
+
+    def _out_of_time(self) -> bool:
+        return self.remaining_time is not None and self.remaining_time() < self.time_margin
+
+    def _run_stage(self, stage: Stage) -> Dict[str, Any]:
+        with self._lock:
+            inputs = {name: self.checkpoint['stages'][name]['output'] for name in stage.depends_on}
+        context = StageContext(self, stage.name, inputs)
+        start = time.perf_counter()
+        with get_metrics().span('stage', stage=stage.name):
+            output, attempts = run_with_retries(lambda: stage.run(context), self.max_retries, self.base_delay,
+                                                f"Stage {stage.name}", self.give_up_on)
+        return {
+            'status': 'completed',
+            'seconds': round(time.perf_counter() - start, 3),
+            'attempts': attempts,
+            'failed_items': context.failed_items,
+            'output': output,
+        }
+
+    def run(self, run_id: str) -> Dict[str, Any]:
+        """Run (or resume) the pipeline; returns the overall status and per-stage timings"""
+        self.run_id = run_id
+        self.checkpoint = self._load(run_id)
+        finished = {name for name, state in self.checkpoint['stages'].items()
+                    if state.get('status') == 'completed'}
+        restored = set(finished)
+        failed: Dict[str, str] = {}
+        for name, stage in self.stages.items():
+            missing = [dep for dep in stage.depends_on if dep not in self.stages and dep not in finished]
+            if missing and name not in finished:
+                failed[name] = f"needs output of stages {missing}, which are neither selected nor checkpointed"
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as stage_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as self.pool:
+            running = {}
+            while True:
+                ready = [
+                    stage for name, stage in self.stages.items()
+                    if name not in finished and name not in failed and name not in running.values()
+                    and set(stage.depends_on) <= finished
+                ]
+                if ready and self._out_of_time():
+                    logger.warning("Run %s: not enough time left to start %s", run_id, [s.name for s in ready])
+                    ready = []
+                for stage in ready:
+                    logger.info("Run %s: starting stage %s", run_id, stage.name)
+                    running[stage_pool.submit(self._run_stage, stage)] = stage.name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        state = future.result()
+                    except Exception as e:
+                        logger.error("Run %s: stage %s failed: %s", run_id, name, e)
+                        failed[name] = str(e)
+                        continue
+                    with self._lock:
+                        self.checkpoint['stages'][name] = state
+                        self.checkpoint['partial'].pop(name, None)
+                        self._save()
+                    finished.add(name)
+                    logger.info("Run %s: stage %s completed in %.2fs", run_id, name, state['seconds'])
+        self.pool = None
+
+        stages = {}
+        for name in self.stages:
+            if name in finished:
+                state = self.checkpoint['stages'][name]
+                stages[name] = {
+                    'status': 'restored' if name in restored else 'completed',
+                    'seconds': state['seconds'],
+                    'attempts': state['attempts'],
+                    'failed_items': len(state.get('failed_items', ())),
+                }
+            elif name in failed:
+                stages[name] = {'status': 'failed', 'error': failed[name]}
+            else:
+                stages[name] = {'status': 'pending'}
+
+        if failed:
+            status = 'failed'
+        elif len(finished) < len(self.stages):
+            status = 'incomplete'
+        else:
+            status = 'completed'
+        return {
+            'run_id': run_id,
+            'status': status,
+            'seconds': round(time.perf_counter() - start, 3),
+            'stages': stages,
+        }
+
+    def output(self, stage: str) -> Any:
+        """Output of a finished stage in the current run"""
+        return self.checkpoint['stages'][stage]['output']
+
+
+def collect_stage(context: StageContext) -> Dict[str, List[Dict[str, Any]]]:
+    """Fetch Shorts for every configured region and record their statistics snapshots"""
+    from src.collectors.popular_videos import fetch_most_popular_videos
+    from src.collectors.snapshot_store import get_snapshot_store
+
+    config = Config.get_instance()
+    region_configs = config.get_config_value('collector.regions')
+    region_configs = [section.to_dict() for section in region_configs or ()]
+    target_per_region = config.get_config_value('collector.target_per_region', 50)
+    if config.get_config_value('fanout.enabled', False):
+        from src.scheduler.fanout import build_fanout_coordinator
+
+        coordinator = build_fanout_coordinator(config, context.executor.remaining_time)
+        results = coordinator.collect(context.executor.run_id, region_configs, target_per_region,
+                                      config.get_config_value('fanout.regions_per_shard', 8))
+    else:
+        results = fetch_most_popular_videos(region_configs, target_per_region)
+
+    store = get_snapshot_store()
+    if store is not None:
+        try:
+            written = store.append(results)
+            logger.info("Stored %s video snapshots", written)
+        except Exception as e:
+            logger.warning("Failed to store video snapshots: %s", e)
+    return results
+
+
+def analyze_stage(context: StageContext) -> Dict[str, Any]:
+    """Rank collected Shorts by virality and update the trend index"""
+    from src.analyzers.trend_index import TrendIndex
+    from src.analyzers.virality import top_viral_videos
+    from src.collectors.records import VideoBatch
+
+    config = Config.get_instance()
+    results = context.inputs['collect']
+    batch = VideoBatch.from_region_results(results, int(time.time()))
+
+    cluster_ids = None
+    if config.get_config_value('analyzer.near_duplicates.enabled', False):
+        from src.analyzers.near_duplicates import NearDuplicateIndex
+
+        duplicates_path = config.get_config_value('analyzer.near_duplicates.path')
+        duplicates = NearDuplicateIndex.load(
+            duplicates_path,
+            num_perm=config.get_config_value('analyzer.near_duplicates.num_perm', 32),
+            bands=config.get_config_value('analyzer.near_duplicates.bands', 8),
+            threshold=config.get_config_value('analyzer.near_duplicates.threshold', 0.5),
+            retention_days=config.get_config_value('analyzer.near_duplicates.retention_days', 14),
+        )
+        added = duplicates.add_results(results)
+        if duplicates_path:
+            try:
+                duplicates.save(duplicates_path)
+            except OSError as e:
+                logger.warning("Could not save near-duplicate index to %s: %s", duplicates_path, e)
+        cluster_ids = duplicates.cluster_ids(batch['id'].categories)
+        logger.info("Near-duplicate index: %s new videos, %s total, %s clusters among %s collected",
+                    added, len(duplicates), len(set(cluster_ids.values())), len(cluster_ids))
+    candidates = top_viral_videos(batch, k=config.get_config_value('analyzer.top_k', 10), cluster_ids=cluster_ids)
+
+    rising_terms = []
+    index_path = config.get_config_value('analyzer.trend_index_path')
+    if index_path:
+        index = TrendIndex.load(index_path)
+        index.add_results(results)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            # The next run starts from an older (or empty) index; this run's terms are still valid
+            logger.warning("Could not save trend index to %s: %s", index_path, e)
+        rising_terms = [term for term, *_ in index.rising_terms(n=20)]
+    return {'candidates': candidates, 'rising_terms': rising_terms}
+
+
+def generate_candidate(candidate: Dict[str, Any], rising_terms: Sequence[str] = ()) -> Dict[str, Any]:
+    """Content brief for one viral candidate"""
+    title_words = set(candidate['title'].lower().split())
+    return {
+        'id': candidate['id'],
+        'region': candidate['region'],
+        'source_title': candidate['title'],
+        'keywords': [term for term in rising_terms if term in title_words][:5] or list(rising_terms[:3]),
+    }
+
+
+def generate_stage(context: StageContext) -> List[Dict[str, Any]]:
+    """Build a content brief per candidate, generate all their scripts in one batched call, then narrate them"""
+    from src.generators.script_generator import get_script_generator
+
+    analysis = context.inputs['analyze']
+    briefs = context.map(lambda candidate: generate_candidate(candidate, analysis['rising_terms']),
+                         analysis['candidates'])
+    scripts = get_script_generator().generate(briefs)
+    generated = [dict(brief, script=result['script']) for brief, result in zip(briefs, scripts)]
+    if generated and Config.get_instance().get_config_value('narration.enabled', False):
+        from src.generators.narration import get_narration_generator
+
+        paths = get_narration_generator().narrate([item['script'] for item in generated])
+        for item, path in zip(generated, paths):
+            item['narration_path'] = path
+    return generated
+
+
+def upload_stage(context: StageContext) -> Dict[str, Any]:
+    """Upload every generated item that has a rendered video, resuming interrupted uploads"""
+    generated = context.inputs['generate']
+    rendered = [item for item in generated if item.get('video_path')]
+    pending = [item['id'] for item in generated if not item.get('video_path')]
+    if pending:
+        logger.info("%s generated items have no rendered video to upload", len(pending))
+    if not rendered:
+        return {'uploaded': [], 'pending': pending}
+
+    from src.uploaders.resumable import ResumableUploader
+
+    uploader = ResumableUploader()
+
+    def upload(item):
+        result = uploader.upload_file(item['video_path'], item.get('metadata') or {}, upload_id=item['id'])
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        return result['data']['video'].get('id')
+
+    uploaded = context.map(upload, rendered)
+    return {'uploaded': uploaded, 'pending': pending}
+
+
+STAGE_FUNCTIONS = {
+    'collect': (collect_stage, ()),
+    'analyze': (analyze_stage, ('collect',)),
+    'generate': (generate_stage, ('analyze',)),
+    'upload': (upload_stage, ('generate',)),
+}
+
+
+def build_stages(names: Iterable[str] = DEFAULT_STAGES) -> List[Stage]:
+    """Stages by name; dependencies left out of the selection are read from the checkpoint"""
+    return [Stage(name, *STAGE_FUNCTIONS[name]) for name in names]
+
+
+def run_pipeline(run_id: str, stage_names: Optional[Iterable[str]] = None,
+                 remaining_time: Optional[Callable[[], float]] = None, store=None) -> Dict[str, Any]:
+    """Run the configured pipeline stages under run_id, resuming from its checkpoint"""
+    from src.collectors.quota import QuotaExhaustedError
+
+    config = Config.get_instance()
+    if stage_names is None:
+        stage_names = config.get_config_value('pipeline.stages', DEFAULT_STAGES)
+    executor = PipelineExecutor(
+        build_stages(stage_names),
+        store=store if store is not None else build_checkpoint_store(config),
+        max_retries=config.get_config_value('pipeline.max_retries', 3),
+        base_delay=config.get_config_value('pipeline.retry_base_delay', 1.0),
+        batch_size=config.get_config_value('pipeline.batch_size', 10),
+        max_workers=config.get_config_value('pipeline.max_workers', 4),
+        remaining_time=remaining_time,
+        time_margin=config.get_config_value('pipeline.time_margin_seconds', 30),
+        give_up_on=(QuotaExhaustedError,),
+    )
+    from src.generators.asset_cache import get_asset_cache
+
+    asset_cache = get_asset_cache()
+    if asset_cache is not None:
+        asset_cache.reset_stats()
+    run = executor.run(run_id)
+    if asset_cache is not None:
+        run['asset_cache'] = asset_cache.stats()
+        logger.info("Run %s asset cache: %s", run_id, run['asset_cache'])
+    return run
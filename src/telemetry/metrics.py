@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+DimensionKey = Tuple[Tuple[str, str], ...]
+
+
+def unit_of(name: str) -> str:
+    """CloudWatch unit for a counter, from its name's suffix"""
+    if name.endswith('_bytes'):
+        return 'Bytes'
+    if name.endswith('_seconds'):
+        return 'Seconds'
+    return 'Count'
+
+
+def _key(name: str, dimensions: Dict[str, Any]) -> Tuple[str, DimensionKey]:
+    if not dimensions:
+        return name, ()
+    if len(dimensions) == 1:
+        return name, tuple(dimensions.items())
+    return name, tuple(sorted(dimensions.items()))
+
+
+def _sort_key(entry) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    name, dims = entry[0]
+    return name, tuple((k, str(v)) for k, v in dims)
+
+
+class _Span:
+    """Times the block it wraps into a timer; failures are also counted as <name>_errors"""
+
+    __slots__ = ('metrics', 'name', 'dimensions', 'start')
+
+    def __init__(self, metrics: 'Metrics', name: str, dimensions: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.dimensions = dimensions
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.dimensions)
+        if exc_type is not None:
+            self.metrics.incr(f'{self.name}_errors', **self.dimensions)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """In-process counters and timers, exported as CloudWatch EMF or Prometheus text
+
+    Counters sum values; timers keep count, sum and max seconds. Both are
+    keyed by name plus dimensions (keyword arguments), so keep dimension
+    values low-cardinality: endpoints, stages, cache tiers, never video IDs.
+    """
+
+    enabled = True
+
+    def __init__(self, namespace: str = 'YoutubeAutomation'):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, DimensionKey], float] = {}
+        self._timers: Dict[Tuple[str, DimensionKey], List[float]] = {}
+
+    def incr(self, name: str, value: float = 1, **dimensions: Any):
+        key = _key(name, dimensions)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **dimensions: Any):
+        key = _key(name, dimensions)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def span(self, name: str, **dimensions: Any):
+        """Context manager timing its block"""
+        return _Span(self, name, dimensions)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values as plain data: {'counters': [...], 'timers': [...]}"""
+        with self._lock:
+            counters = [{'name': name, 'dimensions': {k: str(v) for k, v in dims}, 'value': value}
+                        for (name, dims), value in sorted(self._counters.items(), key=_sort_key)]
+            timers = [{'name': name, 'dimensions': {k: str(v) for k, v in dims}, 'count': int(count),
+                       'sum': round(total, 6), 'max': round(peak, 6)}
+                      for (name, dims), (count, total, peak) in sorted(self._timers.items(), key=_sort_key)]
+        return {'counters': counters, 'timers': timers}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def to_emf(self, timestamp: Optional[float] = None) -> List[Dict[str, Any]]:
+        """One Embedded Metric Format document per distinct dimension set"""
+        timestamp_ms = int((time.time() if timestamp is None else timestamp) * 1000)
+        documents: Dict[DimensionKey, Dict[str, Any]] = {}
+
+        def document(dims: DimensionKey) -> Dict[str, Any]:
+            if dims not in documents:
+                documents[dims] = {
+                    '_aws': {'Timestamp': timestamp_ms, 'CloudWatchMetrics': [{
+                        'Namespace': self.namespace,
+                        'Dimensions': [[name for name, _ in dims]],
+                        'Metrics': [],
+                    }]},
+                    **dict(dims),
+                }
+            return documents[dims]
+
+        def add(dims: DimensionKey, name: str, unit: str, value: float):
+            doc = document(dims)
+            doc['_aws']['CloudWatchMetrics'][0]['Metrics'].append({'Name': name, 'Unit': unit})
+            doc[name] = value
+
+        snapshot = self.snapshot()
+        for counter in snapshot['counters']:
+            dims = tuple(counter['dimensions'].items())
+            add(dims, counter['name'], unit_of(counter['name']), counter['value'])
+        for timer in snapshot['timers']:
+            dims = tuple(timer['dimensions'].items())
+            add(dims, f"{timer['name']}_seconds", 'Seconds', timer['sum'])
+            add(dims, f"{timer['name']}_count", 'Count', timer['count'])
+            add(dims, f"{timer['name']}_max_seconds", 'Seconds', timer['max'])
+        return list(documents.values())
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format: counters as *_total, timers as summaries"""
+        prefix = re.sub(r'(?<!^)(?=[A-Z])', '_', self.namespace).lower()
+
+        def labels(dims: Dict[str, str]) -> str:
+            if not dims:
+                return ''
+            escaped = (k + '="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                       for k, v in dims.items())
+            return '{' + ','.join(escaped) + '}'
+
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+        for counter in snapshot['counters']:
+            metric = f"{prefix}_{counter['name']}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f"{metric}{labels(counter['dimensions'])} {counter['value']:g}")
+        for timer in snapshot['timers']:
+            metric = f"{prefix}_{timer['name']}_seconds"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f'# TYPE {metric} summary')
+            label_text = labels(timer['dimensions'])
+            lines.append(f"{metric}_sum{label_text} {timer['sum']:g}")
+            lines.append(f"{metric}_count{label_text} {timer['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def flush(self, emf: bool = True, prometheus_path: Optional[str] = None):
+        """Export EMF documents to stdout and/or the Prometheus dump, then reset
+
+        Lambda ships stdout to CloudWatch Logs, which extracts EMF documents as metrics.
+        """
+        if emf:
+            for doc in self.to_emf():
+                sys.stdout.write(json.dumps(doc, separators=(',', ':')) + '\n')
+            sys.stdout.flush()
+        if prometheus_path:
+            path = Path(prometheus_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            tmp.write_text(self.to_prometheus(), encoding='utf-8')
+            tmp.replace(path)
+        self.reset()
+
+
+class NullMetrics(Metrics):
+    """Metrics turned off: every call returns immediately"""
+
+    enabled = False
+
+    def incr(self, name, value=1, **dimensions):
+        pass
+
+    def observe(self, name, seconds, **dimensions):
+        pass
+
+    def span(self, name, **dimensions):
+        return NULL_SPAN
+
+    def flush(self, emf=True, prometheus_path=None):
+        pass
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics from the metrics config section (NullMetrics when disabled)"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                config = Config.get_instance()
+                if config.get_config_value('metrics.enabled', False):
+                    _metrics = Metrics(config.get_config_value('metrics.namespace', 'YoutubeAutomation'))
+                else:
+                    _metrics = NullMetrics()
+    return _metrics
+
+
+def incr(name: str, value: float = 1, **dimensions: Any):
+    """Add to a counter on the shared metrics"""
+    get_metrics().incr(name, value, **dimensions)
+
+
+def observe(name: str, seconds: float, **dimensions: Any):
+    """Record a duration on the shared metrics"""
+    get_metrics().observe(name, seconds, **dimensions)
+
+
+def span(name: str, **dimensions: Any):
+    """Time a block on the shared metrics"""
+    return get_metrics().span(name, **dimensions)
+
+
+def timed(name: str, **dimensions: Any) -> Callable:
+    """Decorator timing every call of the wrapped function"""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_metrics().span(name, **dimensions):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def flush_metrics():
+    """Export and reset the shared metrics as configured (metrics.emf, metrics.prometheus_path)"""
+    metrics = get_metrics()
+    if not metrics.enabled:
+        return
+    config = Config.get_instance()
+    try:
+        metrics.flush(config.get_config_value('metrics.emf', True),
+                      config.get_config_value('metrics.prometheus_path'))
+    except Exception as e:
+        logger.warning("Failed to export metrics: %s", e)
@@ -0,0 +1,268 @@
+import atexit
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from config import Config
+
+# Query parameters, dict keys and headers whose values are never written to the log
+SECRET_FIELDS = ('key', 'apikey', 'api_key', 'access_token', 'refresh_token', 'client_secret',
+                 'password', 'token', 'authorization', 'x-goog-api-key')
+_SECRET_VALUE = re.compile(
+    r'(?i)(?<![\w-])(' + '|'.join(re.escape(field) for field in SECRET_FIELDS) + r')'
+    r'''(['"]?\s*[:=]\s*['"]?)(?:Bearer\s+)?[^'"&\s,;}]+'''
+)
+_BEARER = re.compile(r'Bearer\s+[A-Za-z0-9._~+/-]+=*')
+_GOOGLE_API_KEY = re.compile(r'AIza[0-9A-Za-z_-]{35}')
+REDACTED = '[REDACTED]'
+
+# LogRecord attributes; anything else on a record came from extra= and is emitted as a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact(text: str) -> str:
+    """Mask API keys, tokens and passwords in a formatted message"""
+    if not text:
+        return text
+    text = _SECRET_VALUE.sub(lambda m: f'{m.group(1)}{m.group(2)}{REDACTED}', text)
+    text = _BEARER.sub(f'Bearer {REDACTED}', text)
+    return _GOOGLE_API_KEY.sub(REDACTED, text)
+
+
+def _redact_value(name: str, value: Any) -> Any:
+    if name.lower() in SECRET_FIELDS:
+        return REDACTED
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, dict):
+        return {k: _redact_value(str(k), v) for k, v in value.items()}
+    return value
+
+
+class LazyJson:
+    """Log argument rendered as JSON only if the record is actually formatted"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, exception and extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created))
+                         + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': redact(record.getMessage()),
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = redact(record.exc_text)
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and not name.startswith('_'):
+                entry[name] = _redact_value(name, value)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RedactingFormatter(logging.Formatter):
+    """The plain-text format, with secrets masked"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact(super().format(record))
+
+
+class BatchingQueueHandler(QueueHandler):
+    """Hand records to a background writer instead of doing I/O on the logging thread
+
+    The message is rendered here (args can change after the call returns) but
+    JSON encoding, redaction and writing happen on the writer thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Flush:
+    __slots__ = ('done',)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class BatchWriter:
+    """Background thread draining the log queue, formatting records and writing them in batches
+
+    Each wake-up takes everything queued (up to batch_size records) and writes
+    it to every stream with one write() and one flush().
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, streams: List[TextIO], formatter: logging.Formatter,
+                 batch_size: int = 256):
+        self.queue = log_queue
+        self.streams = streams
+        self.formatter = formatter
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch, waiters, stop = [], [], False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _Flush):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.done.set()
+            if stop:
+                return
+
+    def _write(self, batch: List[logging.LogRecord]):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(json.dumps({'level': 'ERROR', 'logger': __name__,
+                                         'message': f'Could not format log record from {record.name}'}))
+        text = '\n'.join(lines) + '\n'
+        for stream in self.streams:
+            try:
+                stream.write(text)
+                stream.flush()
+            except Exception:
+                pass
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until everything queued so far is written"""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        self.queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def stop(self, timeout: float = 2.0):
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+
+
+_writer: Optional[BatchWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _streams(config: Config, handler: str, file_path: Optional[str]) -> List[TextIO]:
+    streams = []
+    if handler == 'file' and file_path:
+        if config.should_create_log_folder:
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        streams.append(open(file_path, 'a', encoding='utf-8'))
+    if handler == 'console' or config.environment == 'production':
+        # Console output always goes to Lambda's CloudWatch stream in production
+        streams.append(sys.stderr)
+    return streams
+
+
+def setup_logging(level: Optional[str] = None, handler: Optional[str] = None,
+                  file_path: Optional[str] = None, log_format: Optional[str] = None,
+                  use_queue: Optional[bool] = None):
+    """Configure the root logger from the logging config section
+
+    Records go through a BatchingQueueHandler to a background BatchWriter
+    (logging.async: false writes synchronously instead), formatted as JSON
+    lines (logging.format: json) or the classic text format, with secrets
+    redacted either way. Calling it again replaces the previous setup.
+    """
+    global _writer
+    config = Config.get_instance()
+    level = level or config.log_level
+    handler = handler or config.log_handler
+    file_path = file_path or config.log_file_path
+    log_format = log_format or config.get_config_value('logging.format', 'json')
+    if use_queue is None:
+        use_queue = config.get_config_value('logging.async', True)
+
+    if log_format == 'json':
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = RedactingFormatter('%(asctime)s - %(levelname)s - %(message)s')
+    streams = _streams(config, handler, file_path)
+
+    with _writer_lock:
+        shutdown_logging()
+        root = logging.getLogger()
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+            existing.close()
+        if use_queue:
+            log_queue = queue.SimpleQueue()
+            _writer = BatchWriter(log_queue, streams, formatter,
+                                  config.get_config_value('logging.batch_size', 256))
+            _writer.start()
+            root.addHandler(BatchingQueueHandler(log_queue))
+        else:
+            for stream in streams:
+                stream_handler = logging.StreamHandler(stream)
+                stream_handler.setFormatter(formatter)
+                root.addHandler(stream_handler)
+        root.setLevel(getattr(logging, level))
+
+
+def flush_logging(timeout: float = 2.0) -> bool:
+    """Block until queued records are written (call before a Lambda invocation returns)"""
+    writer = _writer
+    return writer.flush(timeout) if writer is not None else True
+
+
+def shutdown_logging():
+    """Write what is queued and stop the background writer"""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        for stream in _writer.streams:
+            if stream not in (sys.stderr, sys.stdout):
+                stream.close()
+        _writer = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,325 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+from config import Config
+from src.collectors.quota import QuotaExhaustedError, QuotaScheduler, get_quota_scheduler
+from src.collectors.youtube_api import get_session
+from src.telemetry.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_URL = 'https://www.googleapis.com/upload/youtube/v3/videos'
+# Chunks other than the last must be a multiple of 256 KiB
+CHUNK_GRANULARITY = 256 * 1024
+RESUME_INCOMPLETE = 308
+_RANGE = re.compile(r'bytes=0-(\d+)')
+
+
+class UploadSessionExpired(Exception):
+    """The server no longer knows the session; a new one has to be started"""
+
+
+class UploadStalled(Exception):
+    """The server kept answering without taking more of the upload"""
+
+
+def round_chunk_size(chunk_size: int) -> int:
+    """Round a chunk size down to the protocol's 256 KiB granularity (at least one unit)"""
+    return max(CHUNK_GRANULARITY, chunk_size // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+
+
+def file_fingerprint(path: str) -> str:
+    """Identify a file version by path, size and mtime, for matching persisted sessions"""
+    stat = os.stat(path)
+    raw = f'{Path(path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+class LocalSessionStore:
+    """Upload session URIs as JSON files, so a retried upload continues the same session"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, upload_id: str) -> Path:
+        return self.path / f'{upload_id}.json'
+
+    def load(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(upload_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, upload_id: str, session: Dict[str, Any]):
+        path = self._file(upload_id)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f)
+        tmp_path.replace(path)
+
+    def delete(self, upload_id: str):
+        self._file(upload_id).unlink(missing_ok=True)
+
+
+class S3SessionStore:
+    """Upload session URIs in S3, visible to whichever Lambda container retries the upload"""
+
+    def __init__(self, bucket: str, prefix: str = 'upload-sessions/', region_name: Optional[str] = None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', region_name=region_name)
+
+    def load(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=f'{self.prefix}{upload_id}.json')
+        except self._client.exceptions.NoSuchKey:
+            return None
+        return json.loads(response['Body'].read())
+
+    def save(self, upload_id: str, session: Dict[str, Any]):
+        self._client.put_object(Bucket=self.bucket, Key=f'{self.prefix}{upload_id}.json',
+                                Body=json.dumps(session).encode('utf-8'), ContentType='application/json')
+
+    def delete(self, upload_id: str):
+        self._client.delete_object(Bucket=self.bucket, Key=f'{self.prefix}{upload_id}.json')
+
+
+def build_session_store(config: Optional[Config] = None):
+    """Session store from the uploader config section"""
+    config = config or Config.get_instance()
+    if config.get_config_value('uploader.session_backend', 'disk') == 's3':
+        return S3SessionStore(
+            config.get_config_value('aws.s3_bucket'),
+            config.get_config_value('uploader.session_s3_prefix', 'upload-sessions/'),
+            region_name=config.get_config_value('aws.region', 'us-east-1'),
+        )
+    return LocalSessionStore(config.get_config_value('uploader.session_path', 'temp/upload_sessions'))
+
+
+@contextmanager
+def mapped_file(path: str) -> Iterator[memoryview]:
+    """Read-only memory map of a file as a memoryview; slices of it are not copied"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+class ResumableUploader:
+    """Upload videos with the YouTube resumable upload protocol
+
+    A session is opened with the video metadata (charged to the quota
+    scheduler as one videos.insert) and its URI is persisted. The file is
+    then sent in chunk_size pieces read straight from a memory map, so
+    memory use does not grow with the video. After a failed chunk, or in a
+    later invocation, the server is asked how many bytes it has and the
+    upload continues from there.
+    """
+
+    def __init__(self, access_token: Union[str, Callable[[], str], None] = None,
+                 chunk_size: Optional[int] = None, upload_url: Optional[str] = None,
+                 store=None, quota: Optional[QuotaScheduler] = None,
+                 session: Optional[requests.Session] = None, max_retries: Optional[int] = None,
+                 retry_base_delay: Optional[float] = None, timeout: Optional[float] = None):
+        config = Config.get_instance()
+        self.access_token = access_token or config.get_config_value('youtube.oauth_access_token')
+        self.chunk_size = round_chunk_size(
+            chunk_size or config.get_config_value('uploader.chunk_size', 8 * 1024 * 1024))
+        self.upload_url = upload_url or config.get_config_value('uploader.upload_url', DEFAULT_UPLOAD_URL)
+        self.store = store if store is not None else build_session_store(config)
+        self.quota = quota or get_quota_scheduler()
+        self.session = session or get_session()
+        self.max_retries = config.get_config_value('uploader.max_retries', 5) if max_retries is None else max_retries
+        self.retry_base_delay = (config.get_config_value('uploader.retry_base_delay', 1.0)
+                                 if retry_base_delay is None else retry_base_delay)
+        self.timeout = timeout or config.get_config_value('uploader.request_timeout', 60)
+
+    def _headers(self, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        token = self.access_token() if callable(self.access_token) else self.access_token
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        headers.update(extra or {})
+        return headers
+
+    def start_session(self, total: int, metadata: Dict[str, Any], content_type: str = 'video/*') -> str:
+        """Open an upload session for total bytes; returns the session URI"""
+        self.quota.acquire('videos.insert')
+        parts = ','.join(part for part in ('snippet', 'status', 'recordingDetails') if part in metadata) or 'snippet'
+        response = self.session.post(
+            self.upload_url,
+            params={'uploadType': 'resumable', 'part': parts},
+            headers=self._headers({
+                'Content-Type': 'application/json; charset=UTF-8',
+                'X-Upload-Content-Length': str(total),
+                'X-Upload-Content-Type': content_type,
+            }),
+            data=json.dumps(metadata).encode('utf-8'),
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        session_uri = response.headers.get('Location')
+        if not session_uri:
+            raise RuntimeError('Upload session response has no Location header')
+        return session_uri
+
+    def _handle_chunk_response(self, response: requests.Response) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """(next offset, None) while incomplete, (None, video resource) when done"""
+        if response.status_code == RESUME_INCOMPLETE:
+            match = _RANGE.match(response.headers.get('Range', ''))
+            return (int(match.group(1)) + 1 if match else 0), None
+        if response.status_code in (404, 410):
+            raise UploadSessionExpired(f"Upload session gone ({response.status_code})")
+        response.raise_for_status()
+        return None, response.json()
+
+    def query_offset(self, session_uri: str, total: int) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """Ask the server how many bytes of the session it already has"""
+        response = self.session.put(session_uri, headers=self._headers({
+            'Content-Length': '0',
+            'Content-Range': f'bytes */{total}',
+        }), timeout=self.timeout)
+        return self._handle_chunk_response(response)
+
+    def _send_chunks(self, session_uri: str, view: memoryview, offset: int,
+                     progress: Optional[Callable[[int, int], None]]) -> Dict[str, Any]:
+        """Send the rest of the file from offset; a chunk that moves the upload no further counts as a failure"""
+        total = len(view)
+        failures = 0
+        metrics = get_metrics()
+        while True:
+            end = min(offset + self.chunk_size, total)
+            chunk = view[offset:end]
+            failed = False
+            try:
+                response = self.session.put(session_uri, data=chunk, headers=self._headers({
+                    'Content-Length': str(end - offset),
+                    'Content-Range': f'bytes {offset}-{end - 1}/{total}' if total else f'bytes */{total}',
+                }), timeout=self.timeout)
+                metrics.incr('upload_sent_bytes', end - offset)
+                if response.status_code >= 500 or response.status_code == 429:
+                    raise requests.HTTPError(f"{response.status_code} on chunk at {offset}", response=response)
+                next_offset, resource = self._handle_chunk_response(response)
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                failures += 1
+                if failures > self.max_retries or (isinstance(e, requests.HTTPError) and e.response is not None
+                                                   and 400 <= e.response.status_code < 500
+                                                   and e.response.status_code != 429):
+                    raise
+                failed = True
+                metrics.incr('retries', operation='upload_chunk')
+                delay = self.retry_base_delay * 2 ** (failures - 1)
+                logger.warning("Chunk at byte %s failed (%s), resuming in %.1fs", offset, e, delay)
+                time.sleep(delay)
+                next_offset, resource = self.query_offset(session_uri, total)
+            finally:
+                chunk.release()
+            if resource is not None:
+                return resource
+            if next_offset > offset:
+                failures = 0
+            elif not failed:
+                # A 308 whose Range did not move: resending the same chunk right away would loop forever
+                failures += 1
+                if failures > self.max_retries:
+                    raise UploadStalled(f"Upload stuck at byte {next_offset} of {total} "
+                                        f"after {failures} attempts")
+                metrics.incr('retries', operation='upload_chunk')
+                delay = self.retry_base_delay * 2 ** (failures - 1)
+                logger.warning("Chunk at byte %s was not taken, resending in %.1fs", offset, delay)
+                time.sleep(delay)
+            offset = next_offset
+            if progress:
+                progress(offset, total)
+
+    def upload_file(self, path: str, metadata: Dict[str, Any], upload_id: Optional[str] = None,
+                    content_type: str = 'video/*',
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Upload one video, resuming a persisted session when there is one"""
+        upload_id = upload_id or file_fingerprint(path)
+        start = time.perf_counter()
+        resumed_from = 0
+        try:
+            total = os.path.getsize(path)
+            saved = self.store.load(upload_id)
+            with mapped_file(path) as view:
+                for _ in range(2):
+                    if saved and saved.get('total') == total:
+                        session_uri = saved['session_uri']
+                        try:
+                            offset, resource = self.query_offset(session_uri, total)
+                        except UploadSessionExpired:
+                            logger.info("Upload session for %s expired, starting a new one", upload_id)
+                            saved = None
+                            continue
+                        resumed_from = offset or 0
+                        if resumed_from:
+                            logger.info("Resuming upload %s at byte %s of %s", upload_id, resumed_from, total)
+                    else:
+                        session_uri = self.start_session(total, metadata, content_type)
+                        self.store.save(upload_id, {'session_uri': session_uri, 'total': total,
+                                                    'path': str(path), 'created_at': time.time()})
+                        offset, resource = 0, None
+                    try:
+                        if resource is None:
+                            resource = self._send_chunks(session_uri, view, offset, progress)
+                        break
+                    except UploadSessionExpired:
+                        saved = None
+                else:
+                    raise RuntimeError('Upload session expired twice in a row')
+            self.store.delete(upload_id)
+            get_metrics().observe('upload', time.perf_counter() - start)
+            return {
+                "success": True,
+                "data": {
+                    'upload_id': upload_id,
+                    'video': resource,
+                    'bytes': total,
+                    'resumed_from': resumed_from,
+                    'seconds': time.perf_counter() - start,
+                }
+            }
+        except QuotaExhaustedError as e:
+            logger.error(str(e))
+            return {"success": False, "error": "Quota exhausted", "data": {'upload_id': upload_id}}
+        except Exception as e:
+            logger.error("Upload of %s failed, session kept for resume: %s", path, e)
+            get_metrics().incr('upload_failures')
+            return {"success": False, "error": str(e), "data": {'upload_id': upload_id}}
+
+    def upload_many(self, uploads: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Upload several videos concurrently; each item has path, metadata and optionally upload_id
+
+        Every new session is charged as a videos.insert, so once the day's quota
+        cannot cover another upload the remaining items fail with "Quota
+        exhausted" without sending any bytes.
+        """
+        if max_workers is None:
+            max_workers = Config.get_instance().get_config_value('uploader.max_workers', 3)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(uploads) or 1))) as executor:
+            futures = [
+                executor.submit(self.upload_file, item['path'], item.get('metadata') or {},
+                                item.get('upload_id'), item.get('content_type', 'video/*'))
+                for item in uploads
+            ]
+            return [future.result() for future in futures]
@@ -8,38 +8,9 @@ from config import Config
 import os
 import json
 import isodate
-from ratelimit import limits, sleep_and_retry
 
-import requests
-
-def setup_logging():
-    """Configure logging based on configuration settings"""
-    config = Config.get_instance()
-    
-    # Create log folder if needed (local environment)
-    if config.should_create_log_folder and config.log_file_path:
-        from pathlib import Path
-        log_path = Path(config.log_file_path)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Get handlers based on configuration
-    handlers = []
-    
-    if config.log_handler == 'file' and config.log_file_path:
-        # File handler for local development
-        handlers.append(logging.FileHandler(config.log_file_path, encoding='utf-8'))
-    
-    if config.log_handler == 'console' or config.environment == 'production':
-        # Console handler (always include for production/Lambda)
-        handlers.append(logging.StreamHandler())
-    
-    # Configure logging
-    logging.basicConfig(
-        level=getattr(logging, config.log_level),
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=handlers,
-        force=True  # Override any existing configuration
-    )
+from src.collectors.youtube_api import make_api_call
+from src.telemetry.structured_logging import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -50,37 +21,13 @@ def load_api_key():
     youTubeAPIKey = config.config.youtube.apiKey
     return youTubeAPIKey
 
-@sleep_and_retry
-@limits(calls=5,period=60)
-def make_API_Call(url, params, methodType="GET"):
-    """Helper method to make an API call and return a structured response"""
-    try:
-        if methodType.upper() == "POST":
-            logger.debug(f"Params being passed are: {params}")
-            response = requests.post(url, data=params,timeout=5)
-        else:
-            logger.debug(f"Params being passed are: {params}")
-            response = requests.get(url, params=params,timeout=5)
-        response.raise_for_status()  # raises HTTPError for bad responses (4xx or 5xx)
-        return {
-            "success": True,
-            "data": response.json()
-        }
-    except requests.exceptions.Timeout:
-        logger.warning(f" Request timed out for {url}")
-        return {
-            "success": False,
-            "error": "Request timeout",       # include error detail for debugging
-            "data": None
-        }
+def make_API_Call(url, params, methodType="GET", endpoint="videos.list"):
+    """Helper method to make an API call and return a structured response
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f" API Call failed: {e}")
-        return {
-            "success": False,
-            "error": str(e),       # include error detail for debugging
-            "data": None
-        }
+    Delegates to the collectors' make_api_call, so the script goes through the
+    same response cache, quota scheduler and API key pool as the pipeline.
+    """
+    return make_api_call(url, params, methodType, endpoint=endpoint)
 
 def videoItemParser(item):
     currentVideoDetails = {}
@@ -114,10 +61,12 @@ def videoItemParser(item):
 def fetch_most_popular_videos(region_configs,target_per_region=50):
     """Main method to fetch the youtube shorts based on the region configuration"""
     final_results={}
+    parsedVideos={}
     api_key = load_api_key()
     for region_config in region_configs:
         logger.info(f"Beginning Processing the Region {region_config}")
         collected_videos=[]
+        seenVideoIds=set()
         pageToken = None
         processedVideos = 0
 
@@ -136,13 +85,16 @@ def fetch_most_popular_videos(region_configs,target_per_region=50):
                 responseData = apiResponse["data"]
                 if responseData.get('items'):
                     for item in responseData.get('items'):
-                        if any(item.get("id")==existingItems["id"] for existingItems in collected_videos):
-                            processedVideos+=1
-                        else:
-                            processedVideos+=1
-                            processedVideoItem = videoItemParser(item)
-                            if processedVideoItem:
-                                collected_videos.append(processedVideoItem)
+                        processedVideos+=1
+                        videoId = item.get("id")
+                        if videoId in seenVideoIds:
+                            continue
+                        seenVideoIds.add(videoId)
+                        if videoId not in parsedVideos:
+                            parsedVideos[videoId] = videoItemParser(item)
+                        processedVideoItem = parsedVideos[videoId]
+                        if processedVideoItem:
+                            collected_videos.append(processedVideoItem)
                 if(responseData.get("nextPageToken")):
                     pageToken = responseData.get("nextPageToken")
                 else:
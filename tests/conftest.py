@@ -0,0 +1,17 @@
+"""Unit tests, run offline with the benchmark overrides (no caches, metrics or state kept between tests)
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ['APP_ENV'] = 'benchmark'
+
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from config import Config
+
+Config.reset()
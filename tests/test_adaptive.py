@@ -0,0 +1,81 @@
+import pytest
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors import youtube_api
+from src.collectors.adaptive import PAGE_SIZE, AdaptiveCollector, YieldTracker
+from src.collectors.response_cache import LocalDiskCacheStore, ResponseCache
+from src.collectors.youtube_api import build_session
+
+REGIONS = [{'region': 'US', 'language': 'en'}, {'region': 'IN', 'language': 'en'}]
+
+
+def test_pages_no_run_reached_are_unknown():
+    tracker = YieldTracker(explore_every=0)
+    tracker.start_run('US_en')
+    tracker.record('US_en', 0, PAGE_SIZE, 10)
+    tracker.record('US_en', 1, PAGE_SIZE, 10)
+
+    assert tracker.start_run('US_en') is False
+    assert tracker.predicted_shorts('US_en', 2, 10) is None
+    assert tracker.predicted_shorts('US_en', 1, 2) == pytest.approx(10)
+
+
+def test_pages_past_the_chart_end_count_as_empty():
+    tracker = YieldTracker(explore_every=0)
+    for page in range(4):
+        tracker.record('US_en', page, PAGE_SIZE, 5 if page < 2 else 0)
+    tracker.record_end('US_en', 3)
+
+    assert tracker.yields()['US_en'] == [0.1, 0.1, 0.0]
+    assert tracker.predicted_shorts('US_en', 2, 10) == 0
+    assert tracker.predicted_shorts('US_en', 1, 10) == pytest.approx(5)
+
+
+def test_chart_growing_past_its_end_makes_the_rest_unknown_again():
+    tracker = YieldTracker(explore_every=0)
+    tracker.record('US_en', 0, PAGE_SIZE, 5)
+    tracker.record_end('US_en', 1)
+    tracker.record('US_en', 1, PAGE_SIZE, 5)
+
+    assert tracker.predicted_shorts('US_en', 2, 10) is None
+
+
+def test_history_round_trips_with_the_chart_end(tmp_path):
+    path = str(tmp_path / 'yield.json')
+    tracker = YieldTracker(path, explore_every=0)
+    tracker.record('US_en', 0, PAGE_SIZE, 5)
+    tracker.record_end('US_en', 1)
+    tracker.save()
+
+    assert YieldTracker(path).predicted_shorts('US_en', 1, 10) == 0
+
+
+def test_save_to_an_unwritable_path_is_logged(tmp_path, caplog):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    tracker = YieldTracker(str(blocker / 'yield.json'))
+    tracker.record('US_en', 0, PAGE_SIZE, 5)
+    tracker.save()
+    assert 'Could not save Shorts yield history' in caplog.text
+
+
+def test_quota_units_are_the_units_charged(tmp_path, monkeypatch):
+    cache = ResponseCache(LocalDiskCacheStore(str(tmp_path / 'cache')), max_age_seconds=3600)
+    monkeypatch.setattr(youtube_api, 'get_response_cache', lambda: cache)
+    with StubYouTubeServer(pages=2, latency=0.0) as server:
+        def collect():
+            collector = AdaptiveCollector(YieldTracker(), max_items=100)
+            before = server.stats['requests']
+            collector.collect(REGIONS, 20, max_workers=2, api_key='test', session=build_session(2),
+                              base_url=server.base_url)
+            return collector.last_report, server.stats['requests'] - before
+
+        report, requests = collect()
+        assert requests > 0
+        assert report['quota_units'] == requests
+
+        # Served from the response cache, so nothing is charged
+        report, requests = collect()
+        assert requests == 0
+        assert report['quota_units'] == 0
+        assert report['shorts'] > 0
@@ -0,0 +1,75 @@
+import pytest
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors import credentials as credentials_module
+from src.collectors.credentials import ApiCredential, CredentialPool
+from src.collectors.quota import MemoryQuotaBackend, QuotaExhaustedError, QuotaScheduler
+from src.collectors.youtube_api import build_session, make_api_call
+
+
+def make_pool(backend, limits, refresh_seconds=0.0):
+    return CredentialPool([
+        ApiCredential(name, f'{name}-key', QuotaScheduler(daily_limit=limit, backend=backend, namespace=f'test:{name}'))
+        for name, limit in limits.items()
+    ], refresh_seconds=refresh_seconds)
+
+
+def test_calls_go_to_the_key_with_the_most_quota_left():
+    pool = make_pool(MemoryQuotaBackend(), {'small': 3, 'big': 5})
+    names = [pool.acquire('videos.list').name for _ in range(4)]
+    assert names[:2] == ['big', 'big']
+    assert sorted(names[2:]) == ['big', 'small']
+
+
+def test_quota_failure_disables_the_key_for_every_process():
+    backend = MemoryQuotaBackend()
+    pool = make_pool(backend, {'first': 100, 'second': 50})
+    first = pool.acquire('videos.list')
+    assert first.name == 'first'
+
+    assert pool.report_failure(first, 'quotaExceeded') is True
+    assert pool.failovers == 1
+    assert pool.acquire('videos.list').name == 'second'
+    stats = {entry['name']: entry for entry in pool.stats()}
+    assert stats['first']['disabled'] and stats['first']['disabled_reason'] == 'quotaExceeded'
+    assert stats['first']['remaining'] == 0
+
+    # Another process sharing the backend learns about it from the charged-off remainder
+    other = make_pool(backend, {'first': 100, 'second': 50})
+    assert other.acquire('videos.list').name == 'second'
+
+
+def test_other_errors_leave_the_key_in_rotation():
+    pool = make_pool(MemoryQuotaBackend(), {'only': 10})
+    credential = pool.acquire('videos.list')
+    assert pool.report_failure(credential, 'rateLimitExceeded') is False
+    assert pool.report_failure(credential, None) is False
+    assert pool.acquire('videos.list') is credential
+
+
+def test_disabled_key_returns_the_next_quota_day(monkeypatch):
+    day = ['2026-01-14']
+    monkeypatch.setattr(credentials_module, 'quota_day', lambda now=None: day[0])
+    pool = make_pool(MemoryQuotaBackend(), {'only': 10})
+    credential = pool.acquire('videos.list')
+    pool.report_failure(credential, 'keyInvalid')
+    with pytest.raises(QuotaExhaustedError):
+        pool.acquire('videos.list')
+
+    day[0] = '2026-01-15'
+    assert pool.acquire('videos.list') is credential
+
+
+def test_make_api_call_fails_over_to_the_next_key():
+    pool = make_pool(MemoryQuotaBackend(), {'bad': 100, 'good': 50})
+    params = {'part': 'id', 'chart': 'mostPopular', 'maxResults': 50, 'key': 'unused'}
+    with StubYouTubeServer(pages=1, latency=0.0, invalid_keys={'bad-key'}) as server:
+        result = make_api_call(f'{server.base_url}/videos', params, session=build_session(1), credentials=pool)
+        assert result['success'] is True
+        assert server.stats['key_invalid'] == 1
+        assert server.key_requests == {'bad-key': 1, 'good-key': 1}
+
+        pool.report_failure(pool.credentials[1], 'quotaExceeded')
+        result = make_api_call(f'{server.base_url}/videos', params, session=build_session(1), credentials=pool)
+        assert result == {'success': False, 'error': 'Quota exhausted', 'data': None}
+        assert server.stats['requests'] == 2
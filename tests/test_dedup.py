@@ -0,0 +1,71 @@
+from src.collectors.dedup import BloomFilter, RotatingBloomFilter, SeenIndex
+
+
+def false_positive_rate(bloom, probes=20000):
+    return sum(f'probe{index}' in bloom for index in range(probes)) / probes
+
+
+def test_false_positive_rate_stays_bounded_as_keys_accumulate():
+    rotating = RotatingBloomFilter(capacity=1000, error_rate=0.01)
+    fixed = BloomFilter(capacity=1000, error_rate=0.01)
+    for index in range(20000):
+        rotating.add(f'video{index}')
+        fixed.add(f'video{index}')
+
+    assert false_positive_rate(rotating) < 0.03
+    assert false_positive_rate(fixed) > 0.9
+
+
+def test_keys_are_remembered_for_one_to_two_generations():
+    bloom = RotatingBloomFilter(capacity=100, error_rate=0.001)
+    for index in range(100):
+        bloom.add(f'old{index}')
+    for index in range(100):
+        bloom.add(f'new{index}')
+    assert all(f'old{index}' in bloom for index in range(100))
+
+    for index in range(100):
+        bloom.add(f'newer{index}')
+    assert sum(f'old{index}' in bloom for index in range(100)) < 5
+    assert all(f'new{index}' in bloom for index in range(100))
+
+
+def test_generations_round_trip(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    bloom = RotatingBloomFilter(capacity=10)
+    for index in range(15):
+        bloom.add(f'video{index}')
+    bloom.save(path)
+
+    loaded = RotatingBloomFilter.load(path, capacity=10)
+    assert loaded.count == 5
+    assert loaded.previous is not None
+    assert all(f'video{index}' in loaded for index in range(15))
+
+
+def test_single_filter_history_is_kept_for_one_more_generation(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    legacy = BloomFilter(capacity=10)
+    legacy.add('legacy')
+    legacy.save(path)
+
+    loaded = RotatingBloomFilter.load(path, capacity=10)
+    assert 'legacy' in loaded
+    loaded.add('fresh')
+    assert loaded.previous is not None and 'legacy' in loaded and 'fresh' in loaded
+
+
+def test_only_shorts_go_into_the_history(tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    index = SeenIndex.with_history(path)
+    parse = lambda item: {'id': item['id']} if item['short'] else None
+    index.get_or_parse({'id': 'short', 'short': True}, 'US_en', parse)
+    index.get_or_parse({'id': 'long', 'short': False}, 'US_en', parse)
+    index.save_history()
+
+    next_run = SeenIndex.with_history(path, skip_seen=True)
+    assert next_run.get_or_parse({'id': 'short', 'short': True}, 'US_en', parse) is None
+    assert next_run.get_or_parse({'id': 'other', 'short': True}, 'US_en', parse) == {'id': 'other',
+                                                                                     'seenBefore': False}
+    assert not next_run.seen_in_previous_runs('long')
+    assert next_run.repeat_count() == 1
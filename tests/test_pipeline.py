@@ -0,0 +1,218 @@
+import json
+
+import pytest
+
+from src.collectors.quota import QuotaExhaustedError
+from src.scheduler import handler, pipeline
+from src.scheduler.pipeline import LocalCheckpointStore, PipelineExecutor, Stage
+
+
+class RecordingStore(LocalCheckpointStore):
+    """LocalCheckpointStore that remembers the partial results of every save"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.partial_saves = []
+
+    def save(self, run_id, checkpoint):
+        self.partial_saves.append({stage: sorted(done) for stage, done in checkpoint['partial'].items()})
+        super().save(run_id, checkpoint)
+
+
+class Clock:
+    """remaining_time stand-in that a stage can wind down"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self):
+        return self.seconds
+
+
+def make_executor(stages, store, **kwargs):
+    kwargs.setdefault('max_retries', 0)
+    return PipelineExecutor(stages, store, base_delay=0.0, **kwargs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RecordingStore(str(tmp_path / 'checkpoints'))
+
+
+def test_resume_after_failed_stage_restores_finished_stages(store):
+    calls = {'collect': 0, 'analyze': 0}
+
+    def collect(context):
+        calls['collect'] += 1
+        return [1, 2, 3]
+
+    def analyze(context):
+        calls['analyze'] += 1
+        if calls['analyze'] == 1:
+            raise RuntimeError('analyzer down')
+        return sum(context.inputs['collect'])
+
+    stages = [Stage('collect', collect), Stage('analyze', analyze, ('collect',))]
+    first = make_executor(stages, store).run('run-1')
+    assert first['status'] == 'failed'
+    assert first['stages']['collect']['status'] == 'completed'
+    assert first['stages']['analyze'] == {'status': 'failed', 'error': 'analyzer down'}
+
+    executor = make_executor(stages, store)
+    second = executor.run('run-1')
+    assert second['status'] == 'completed'
+    assert second['stages']['collect']['status'] == 'restored'
+    assert second['stages']['analyze']['status'] == 'completed'
+    assert executor.output('analyze') == 6
+    assert calls == {'collect': 1, 'analyze': 2}
+
+
+def test_stage_retries_within_a_run(store):
+    attempts = []
+
+    def flaky(context):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError('transient')
+        return 'ok'
+
+    run = make_executor([Stage('collect', flaky)], store, max_retries=2).run('run-1')
+    assert run['status'] == 'completed'
+    assert run['stages']['collect']['attempts'] == 3
+
+
+def test_resume_after_time_margin(store):
+    clock = Clock(100.0)
+
+    def collect(context):
+        clock.seconds = 10.0
+        return 'videos'
+
+    calls = []
+
+    def analyze(context):
+        calls.append(context.inputs['collect'])
+        return 'ranked'
+
+    stages = [Stage('collect', collect), Stage('analyze', analyze, ('collect',))]
+    first = make_executor(stages, store, remaining_time=clock, time_margin=30.0).run('run-1')
+    assert first['status'] == 'incomplete'
+    assert first['stages']['collect']['status'] == 'completed'
+    assert first['stages']['analyze'] == {'status': 'pending'}
+    assert calls == []
+
+    second = make_executor(stages, store, remaining_time=Clock(100.0), time_margin=30.0).run('run-1')
+    assert second['status'] == 'completed'
+    assert second['stages']['collect']['status'] == 'restored'
+    assert calls == ['videos']
+
+
+def test_map_checkpoints_each_batch_and_resumes_pending_items(store):
+    items = [{'id': f'v{index}'} for index in range(6)]
+    processed = []
+    broken = {'v4'}
+
+    def work(item):
+        processed.append(item['id'])
+        if item['id'] in broken:
+            raise RuntimeError('render failed')
+        return item['id'].upper()
+
+    def generate(context):
+        results = context.map(work, items)
+        if context.failed_items:
+            raise RuntimeError(f"{len(context.failed_items)} items failed")
+        return results
+
+    stages = [Stage('generate', generate)]
+    first = make_executor(stages, store, batch_size=2).run('run-1')
+    assert first['status'] == 'failed'
+    assert [save['generate'] for save in store.partial_saves] == [
+        ['v0', 'v1'], ['v0', 'v1', 'v2', 'v3'], ['v0', 'v1', 'v2', 'v3', 'v5'],
+    ]
+    assert sorted(processed) == [item['id'] for item in items]
+
+    processed.clear()
+    broken.clear()
+    executor = make_executor(stages, store, batch_size=2)
+    second = executor.run('run-1')
+    assert second['status'] == 'completed'
+    assert processed == ['v4']
+    assert executor.output('generate') == ['V0', 'V1', 'V2', 'V3', 'V4', 'V5']
+    # Partial results are dropped once the stage's output is checkpointed
+    assert store.load('run-1')['partial'] == {}
+
+
+def test_map_leaves_out_items_that_keep_failing(store):
+    def generate(context):
+        return context.map(lambda item: 1 / item['n'], [{'id': 'a', 'n': 1}, {'id': 'b', 'n': 0}])
+
+    executor = make_executor([Stage('generate', generate)], store)
+    run = executor.run('run-1')
+    assert run['status'] == 'completed'
+    assert run['stages']['generate']['failed_items'] == 1
+    assert executor.output('generate') == [1.0]
+
+
+def test_checkpoint_from_another_version_is_ignored(store):
+    store.save('run-1', {'version': pipeline.CHECKPOINT_VERSION + 1, 'run_id': 'run-1',
+                         'stages': {'collect': {'status': 'completed', 'output': 'stale'}}, 'partial': {}})
+    executor = make_executor([Stage('collect', lambda context: 'fresh')], store)
+    assert executor.run('run-1')['stages']['collect']['status'] == 'completed'
+    assert executor.output('collect') == 'fresh'
+
+
+class LambdaContext:
+    def __init__(self, clock):
+        self.clock = clock
+
+    def get_remaining_time_in_millis(self):
+        return int(self.clock() * 1000)
+
+
+def test_lambda_handler_returns_202_until_the_run_finishes(tmp_path, monkeypatch):
+    clock = Clock(900.0)
+    calls = []
+
+    def collect(context):
+        calls.append('collect')
+        clock.seconds = 5.0
+        return {'US': []}
+
+    def analyze(context):
+        calls.append('analyze')
+        return {'candidates': [], 'rising_terms': []}
+
+    monkeypatch.setitem(pipeline.STAGE_FUNCTIONS, 'collect', (collect, ()))
+    monkeypatch.setitem(pipeline.STAGE_FUNCTIONS, 'analyze', (analyze, ('collect',)))
+    monkeypatch.setattr(pipeline, 'build_checkpoint_store',
+                        lambda config=None: LocalCheckpointStore(str(tmp_path / 'checkpoints')))
+    event = {'run_id': 'run-1', 'stages': ['collect', 'analyze']}
+
+    response = handler.lambda_handler(event, LambdaContext(clock))
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 202
+    assert body['status'] == 'incomplete'
+    assert body['pipeline']['stages']['analyze'] == {'status': 'pending'}
+
+    clock.seconds = 900.0
+    response = handler.lambda_handler(event, LambdaContext(clock))
+    body = json.loads(response['body'])
+    assert response['statusCode'] == 200
+    assert body['status'] == 'success'
+    assert body['pipeline']['stages']['collect']['status'] == 'restored'
+    assert calls == ['collect', 'analyze']
+
+
+def test_lambda_handler_returns_500_for_a_failed_run(tmp_path, monkeypatch):
+    def collect(context):
+        # Not retried: an exhausted quota stays exhausted for the rest of the invocation
+        raise QuotaExhaustedError('videos.list', 1, 0, 3600)
+
+    monkeypatch.setitem(pipeline.STAGE_FUNCTIONS, 'collect', (collect, ()))
+    monkeypatch.setattr(pipeline, 'build_checkpoint_store',
+                        lambda config=None: LocalCheckpointStore(str(tmp_path / 'checkpoints')))
+
+    response = handler.lambda_handler({'run_id': 'run-1', 'stages': ['collect']}, LambdaContext(Clock(900.0)))
+    assert response['statusCode'] == 500
+    assert json.loads(response['body'])['pipeline']['stages']['collect']['status'] == 'failed'
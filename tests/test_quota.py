@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from src.collectors import quota
+from src.collectors.quota import (MemoryQuotaBackend, QuotaBackend, QuotaExhaustedError, QuotaScheduler,
+                                  SQLiteQuotaBackend, quota_day, seconds_until_reset)
+
+
+class FailingBackend(QuotaBackend):
+    """Backend whose writes fail until it is told to recover"""
+
+    def __init__(self):
+        self.inner = MemoryQuotaBackend()
+        self.failing = True
+
+    def consume(self, namespace, day, endpoint, units, limit):
+        if self.failing:
+            raise ConnectionError('quota table unreachable')
+        return self.inner.consume(namespace, day, endpoint, units, limit)
+
+    def usage(self, namespace, day):
+        return self.inner.usage(namespace, day)
+
+
+def test_quota_day_rolls_over_at_pacific_midnight():
+    assert quota_day(datetime(2026, 1, 15, 7, 59, tzinfo=timezone.utc)) == '2026-01-14'
+    assert quota_day(datetime(2026, 1, 15, 8, 0, tzinfo=timezone.utc)) == '2026-01-15'
+    assert seconds_until_reset(datetime(2026, 1, 15, 7, 0, tzinfo=timezone.utc)) == 3600
+
+
+def test_exhausted_budget_is_available_again_the_next_day(monkeypatch):
+    day = ['2026-01-14']
+    monkeypatch.setattr(quota, 'quota_day', lambda now=None: day[0])
+    scheduler = QuotaScheduler(daily_limit=2, backend=MemoryQuotaBackend())
+    scheduler.acquire('videos.list')
+    scheduler.acquire('videos.list')
+    with pytest.raises(QuotaExhaustedError) as raised:
+        scheduler.acquire('videos.list')
+    assert raised.value.remaining == 0
+
+    day[0] = '2026-01-15'
+    scheduler.acquire('videos.list')
+    assert scheduler.metrics()['used'] == 1
+    assert scheduler.units_charged == 3
+
+
+def test_tokens_are_given_back_when_the_backend_fails():
+    backend = FailingBackend()
+    scheduler = QuotaScheduler(daily_limit=100, backend=backend, rate_per_second=0.001, burst=2)
+    with pytest.raises(ConnectionError):
+        scheduler.try_acquire('videos.list')
+
+    backend.failing = False
+    assert scheduler.try_acquire('videos.list') == 0
+    assert scheduler.try_acquire('videos.list') == 0
+    assert scheduler.try_acquire('videos.list') > 0
+    assert scheduler.units_charged == 2
+
+
+def test_tokens_are_given_back_when_the_backend_refuses():
+    backend = MemoryQuotaBackend()
+    backend.consume('default', quota_day(), 'videos.list', 99, 100)
+    scheduler = QuotaScheduler(daily_limit=100, backend=backend, rate_per_second=0.001, burst=2)
+    with pytest.raises(QuotaExhaustedError):
+        scheduler.try_acquire('videos.update')
+    assert scheduler.try_acquire('videos.list') == 0
+    assert scheduler.metrics()['rejected'] == 1
+
+
+def test_call_costing_more_than_burst_leaves_the_bucket_in_debt():
+    scheduler = QuotaScheduler(daily_limit=10 ** 6, backend=MemoryQuotaBackend(), rate_per_second=100, burst=10)
+    assert scheduler.try_acquire('search.list') == 0
+    # 100 units against a bucket of 10: the next call waits for the other 90 and its own unit
+    assert scheduler.try_acquire('videos.list') == pytest.approx(0.91, abs=0.02)
+
+
+def test_sqlite_backend_never_grants_past_the_limit_under_contention(tmp_path):
+    path = str(tmp_path / 'quota.sqlite3')
+    SQLiteQuotaBackend(path)
+    granted = []
+    lock = threading.Lock()
+
+    def worker():
+        # One backend per thread, like separate processes sharing the file
+        backend = SQLiteQuotaBackend(path)
+        count = sum(backend.consume('default', '2026-01-15', 'videos.list', 1, 150) for _ in range(40))
+        with lock:
+            granted.append(count)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(granted) == 150
+    assert SQLiteQuotaBackend(path).usage('default', '2026-01-15') == {'videos.list': 150}
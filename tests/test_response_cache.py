@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.stub_youtube_server import StubYouTubeServer
+from src.collectors import response_cache
+from src.collectors.quota import MemoryQuotaBackend, QuotaScheduler
+from src.collectors.response_cache import LocalDiskCacheStore, ResponseCache, cache_key
+from src.collectors.youtube_api import build_session, make_api_call
+
+URL = 'https://example.test/youtube/v3/videos'
+PARAMS = {'part': 'id', 'chart': 'mostPopular', 'pageToken': None, 'key': 'one'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def make_cache(tmp_path, ttl_seconds=3600, max_age_seconds=60):
+    return ResponseCache(LocalDiskCacheStore(str(tmp_path / 'cache')), ttl_seconds, max_age_seconds)
+
+
+def test_cache_key_ignores_credentials_and_empty_params():
+    assert cache_key(URL, PARAMS) == cache_key(URL, dict(PARAMS, key='two', pageToken=None))
+    assert cache_key(URL, PARAMS) != cache_key(URL, dict(PARAMS, pageToken='CDIQAA'))
+
+
+def test_entries_are_fresh_until_max_age_then_revalidated(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.store_response(URL, PARAMS, '"etag"', {'items': []}, 100)
+
+    clock[0] += 60
+    assert cache.lookup(URL, PARAMS)['fresh'] is True
+    clock[0] += 1
+    entry = cache.lookup(URL, PARAMS)
+    assert entry['fresh'] is False and entry['etag'] == '"etag"'
+
+
+def test_entries_past_the_ttl_are_dropped(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.store_response(URL, PARAMS, '"etag"', {'items': []}, 100)
+
+    clock[0] += 3601
+    assert cache.lookup(URL, PARAMS) is None
+    clock[0] -= 3601
+    assert cache.lookup(URL, PARAMS) is None
+    assert list((tmp_path / 'cache').glob('*.json')) == []
+
+
+def test_responses_without_an_etag_are_not_cached(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.store_response(URL, PARAMS, None, {'items': []}, 100)
+    assert cache.lookup(URL, PARAMS) is None
+
+
+def test_make_api_call_serves_fresh_entries_and_revalidates_stale_ones(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    scheduler = QuotaScheduler(daily_limit=100, backend=MemoryQuotaBackend())
+    with StubYouTubeServer(pages=1, latency=0.0) as server:
+        url = f'{server.base_url}/videos'
+        params = {'part': 'id', 'chart': 'mostPopular', 'maxResults': 50}
+
+        def call():
+            return make_api_call(url, params, session=build_session(1), quota=scheduler, cache=cache)
+
+        first = call()
+        assert first['success'] and server.stats['requests'] == 1
+
+        # Fresh: served without a request and without charging quota
+        assert call()['data'] == first['data']
+        assert server.stats['requests'] == 1 and scheduler.units_charged == 1
+
+        # Stale: revalidated with If-None-Match; the 304 is charged but its body comes from the cache
+        clock[0] += 61
+        assert call()['data'] == first['data']
+        assert server.stats['requests'] == 2 and scheduler.units_charged == 2
+
+        # Expired: fetched again from scratch
+        clock[0] += 3600
+        assert call()['success']
+        assert server.stats['requests'] == 3
+
+    stats = cache.stats()
+    assert (stats['fresh_hits'], stats['revalidated_hits'], stats['misses']) == (1, 1, 2)
+    assert stats['hit_ratio'] == 0.5
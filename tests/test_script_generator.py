@@ -0,0 +1,43 @@
+import pytest
+
+from src.generators.script_generator import ScriptGenerator, SQLiteScriptMemo, TemplateBackend
+
+BRIEFS = [{'id': f'v{index}', 'region': 'US', 'source_title': f'trend {index}', 'keywords': [f'topic{index}']}
+          for index in range(6)]
+
+
+class ShortBatchBackend(TemplateBackend):
+    """Drops the last script of its first short_calls batches"""
+
+    def __init__(self, short_calls):
+        super().__init__()
+        self.short_calls = short_calls
+        self.calls = 0
+
+    def generate_batch(self, prompts):
+        self.calls += 1
+        scripts = super().generate_batch(prompts)
+        return scripts[:-1] if self.calls <= self.short_calls else scripts
+
+
+def test_short_batch_is_retried():
+    backend = ShortBatchBackend(short_calls=1)
+    generator = ScriptGenerator(backend, batch_size=2, max_workers=1, retry_base_delay=0.0)
+
+    results = generator.generate(BRIEFS)
+    assert [result['script'] for result in results] == [
+        result['script'] for result in ScriptGenerator(TemplateBackend(), batch_size=2).generate(BRIEFS)]
+    assert generator.last_report['retried_batches'] == 1
+    assert backend.calls == 4
+
+
+def test_batch_that_stays_short_fails_the_call(tmp_path):
+    memo = SQLiteScriptMemo(str(tmp_path / 'scripts.sqlite3'))
+    backend = ShortBatchBackend(short_calls=10)
+    generator = ScriptGenerator(backend, memo, batch_size=6, max_retries=1, retry_base_delay=0.0)
+
+    with pytest.raises(RuntimeError, match='returned 5 scripts for a batch of 6 prompts'):
+        generator.generate(BRIEFS)
+    # Nothing from the short batch was memoized under the wrong prompts
+    assert memo.get_many([result['prompt_key'] for result in
+                          ScriptGenerator(TemplateBackend()).generate(BRIEFS)]) == {}
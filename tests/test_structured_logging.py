@@ -0,0 +1,48 @@
+import io
+import json
+import logging
+
+import pytest
+
+from src.telemetry.structured_logging import JsonFormatter, LazyJson
+
+
+class CountingReport(dict):
+    """A report that counts how often it is serialized"""
+
+    serialized = 0
+
+    def items(self):
+        CountingReport.serialized += 1
+        return super().items()
+
+
+@pytest.fixture
+def log():
+    logger = logging.getLogger('tests.structured_logging')
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.propagate = False
+    yield logger, stream
+    logger.removeHandler(handler)
+    logger.propagate = True
+
+
+def test_lazy_json_is_not_serialized_below_the_level(log):
+    logger, stream = log
+    logger.setLevel(logging.WARNING)
+    CountingReport.serialized = 0
+    logger.info("Report: %s", LazyJson(CountingReport(pages=3)))
+    assert CountingReport.serialized == 0
+    assert stream.getvalue() == ''
+
+
+def test_messages_are_json_with_secrets_redacted(log):
+    logger, stream = log
+    logger.setLevel(logging.INFO)
+    logger.info("Report: %s for %s", LazyJson({'pages': 3}), 'https://example.test/videos?key=AIzaSecret&part=id')
+    entry = json.loads(stream.getvalue())
+    assert entry['level'] == 'INFO'
+    assert entry['message'] == 'Report: {"pages": 3} for https://example.test/videos?key=[REDACTED]&part=id'
@@ -0,0 +1,81 @@
+import pytest
+import requests
+
+from src.collectors.quota import MemoryQuotaBackend, QuotaScheduler
+from src.uploaders.resumable import (CHUNK_GRANULARITY, RESUME_INCOMPLETE, LocalSessionStore, ResumableUploader,
+                                     UploadStalled)
+
+SESSION_URI = 'http://upload.test/session/1'
+
+
+def make_response(status, headers=None, body=b''):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+class ScriptedSession:
+    """requests.Session stand-in whose PUTs are answered by a function of the Content-Range"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.puts = []
+
+    def post(self, url, **kwargs):
+        return make_response(200, {'Location': SESSION_URI})
+
+    def put(self, url, data=None, headers=None, timeout=None):
+        self.puts.append(headers['Content-Range'])
+        return self.answer(headers['Content-Range'], len(self.puts))
+
+
+def received(upto):
+    return make_response(RESUME_INCOMPLETE, {'Range': f'bytes=0-{upto - 1}'})
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'\0' * (2 * CHUNK_GRANULARITY))
+    return str(path)
+
+
+def make_uploader(tmp_path, session, max_retries=3):
+    return ResumableUploader('token', chunk_size=CHUNK_GRANULARITY, upload_url='http://upload.test/videos',
+                             store=LocalSessionStore(str(tmp_path / 'sessions')),
+                             quota=QuotaScheduler(10 ** 6, MemoryQuotaBackend()), session=session,
+                             max_retries=max_retries, retry_base_delay=0.0)
+
+
+def test_upload_that_never_progresses_gives_up(tmp_path, video):
+    session = ScriptedSession(lambda content_range, count: received(CHUNK_GRANULARITY))
+    uploader = make_uploader(tmp_path, session, max_retries=3)
+
+    result = uploader.upload_file(video, {'snippet': {'title': 'stuck'}}, upload_id='stuck')
+    assert result['success'] is False
+    assert 'stuck at byte' in result['error']
+    # The first chunk is taken; the second one is sent once plus max_retries times
+    assert session.puts.count(f'bytes {CHUNK_GRANULARITY}-{2 * CHUNK_GRANULARITY - 1}/{2 * CHUNK_GRANULARITY}') == 4
+    # The session is kept, so a later invocation can resume it
+    assert uploader.store.load('stuck')['session_uri'] == SESSION_URI
+
+
+def test_stalled_chunk_is_resent_until_it_is_taken(tmp_path, video):
+    # Chunk 1 is taken, the first try of chunk 2 is not, the second one finishes the upload
+    answers = [received(CHUNK_GRANULARITY), received(CHUNK_GRANULARITY), make_response(200, body=b'{"id": "abc"}')]
+    session = ScriptedSession(lambda content_range, count: answers[count - 1])
+
+    result = make_uploader(tmp_path, session).upload_file(video, {}, upload_id='slow')
+    assert result['success'] is True
+    assert result['data']['video'] == {'id': 'abc'}
+    assert len(session.puts) == 3
+
+
+def test_send_chunks_raises_upload_stalled(tmp_path):
+    session = ScriptedSession(lambda content_range, count: received(0))
+    uploader = make_uploader(tmp_path, session, max_retries=1)
+    with pytest.raises(UploadStalled):
+        uploader._send_chunks(SESSION_URI, memoryview(b'\0' * CHUNK_GRANULARITY), 0, None)
+    assert len(session.puts) == 2